@@ -5,10 +5,8 @@ random.seed(42)
 import asyncio
 from utils.word_functions import (
     load_word_pools, 
-    create_audio_file, 
-    cleanup_audio_file,
+    create_audio_clip,
     DEFAULT_CATEGORIES,
-    DEFAULT_VOCABULARY_FILE,
     LEVEL_DESCRIPTIONS,
     SPEED_OPTIONS,
     SPEED_LABELS
@@ -17,18 +15,24 @@ from utils.word_functions import (
 from utils.json_manager import (
     delete_word_from_json,
     load_vocabulary_with_expressions,
-    load_vocabulary_from_file,
+    search_vocabulary,
+    suggest_words,
+    fuzzy_lookup,
+    get_word_count,
+    get_level_statistics,
+    format_word_location,
     load_learned_words,
-    save_word_pools_to_file,
     save_learned_words_to_file,
     save_to_learned,
     save_to_mailed,
     save_mailed_words_to_file,
     load_mailed_words,
     delete_word_from_file,
-    update_word_audio,
+    move_words,
+    move_back_to_vocabulary,
 )
 from word_widget import create_word_widget, get_difficulty
+from utils.audio_cache import get_audio_cache
 
 # Function to create media directory
 def initialize_media_directory():
@@ -106,8 +110,11 @@ if current_level in ["mailed","learned"]:
 else:
     st.info(f"🎯 **Current Level: {current_level}** - {LEVEL_DESCRIPTIONS[current_level]}")
 
-# Configuration
-word_file = DEFAULT_VOCABULARY_FILE
+# Search results rendered as word cards at most (the best matches come first)
+SEARCH_RESULT_LIMIT = 50
+
+# Configuration: the store behind the current level (edit/delete act on it)
+word_file = f"level{current_level}.json" if current_level in [1, 2, 3] else f"{current_level}.json"
 category_list = DEFAULT_CATEGORIES
 
 # Load sample vocabulary button
@@ -121,10 +128,6 @@ with col1:
             words = load_mailed_words()
             # print(f"Words are loaded for level: {current_level}")
         if words:
-            # Convert learned words to the standard vocabulary format and save to the working file
-            with open(word_file, "w", encoding='utf-8') as f:
-                for word_entry in words:
-                    f.write(f"{word_entry['word']} | {word_entry['meaning']} | {word_entry['phrase']} | {word_entry.get('category', 'General')}\n")
             st.success(f"✅ Successfully loaded {len(words)} {current_level} words!")
             # st.info("Navigate to other sections to review your learned vocabulary.")
         else:
@@ -132,22 +135,14 @@ with col1:
     else:
         #   if st.button(f"📚 Load Level {current_level} Vocabulary (160 words)"):
         word_pools = load_word_pools(current_level)
-        # print(f"Loaded word pools: {current_level}\n {word_pools}")
-        if word_pools:
-            success = save_word_pools_to_file(word_pools, word_file)
-            if success:
-                # st.success(f"✅ Successfully loaded Level {current_level} vocabulary")
-                pass
-            else:
-                st.error(f"❌ Error loading {current_level} vocabulary.")
-        else:
+        if not word_pools:
             st.error(f"❌ Could not load Level {current_level} word pools from JSON file.")
 
 with col2:
-    # Statistics display
-    all_words = load_vocabulary_from_file(word_file)
-    if all_words:
-        st.metric("📊 Total Words", len(all_words))
+    # Statistics display (live counters, no file reads)
+    total_words = get_word_count(current_level)
+    if total_words:
+        st.metric("📊 Total Words", total_words)
 
 # Main navigation
 select = st.sidebar.radio("Select Learning Mode", [
@@ -189,9 +184,19 @@ if select == "📖 Study Mode":
             search_word = st.text_input("🔍 Search Word", key="search_word_input")
             if search_word:
                 # display word with container
-                filtered_words = [entry for entry in filtered_words if search_word.lower() in entry['word'].lower()]
+                filtered_words = search_vocabulary(current_level, search_word, limit=SEARCH_RESULT_LIMIT)
+                suggestions = suggest_words(search_word)
+                if suggestions:
+                    st.caption("💡 " + ", ".join(
+                        f"{text} ({format_word_location(locations[0])})" for text, locations in suggestions))
                 if not filtered_words:
                     st.warning(f"No words found matching '{search_word}' in {selected_category}")
+                    candidates = fuzzy_lookup(search_word)
+                    if candidates:
+                        st.info("🤔 Did you mean: " + ", ".join(
+                            f"**{text}** ({format_word_location(locations[0])})" for text, _, locations in candidates))
+                elif len(filtered_words) >= SEARCH_RESULT_LIMIT:
+                    st.info(f"📚 Showing the first {len(filtered_words)} words matching '{search_word}' in {selected_category} - type more to narrow the search")
                 else:
                     st.info(f"📚 Showing {len(filtered_words)} words matching '{search_word}' in {selected_category}")            
                 
@@ -212,36 +217,17 @@ if select == "📖 Study Mode":
                     # Play buttons
                     random_num = random.randint(0, 300)
                     if st.button(f"🔊 Word", key=f"word_{entry['word']}_{random_num}"):
-                        audio_file = asyncio.run(create_audio_file(entry['word'], f"word_{entry['word']}", is_phrase=False, speed=selected_speed))
-                        print(f"Generated audio file for word: {audio_file}")
-                        if audio_file and os.path.exists(audio_file):
-                            with open(audio_file, 'rb') as audio:
-                                # Detect audio format based on file extension
-                                audio_format = 'audio/mp3' if audio_file.endswith('.mp3') else 'audio/wav'
-                                # save audio file in the audio folder with word_name.mp3 or .wav and link to it in json
-                                audio_file_name = f"{entry['word'].lower()}.{audio_file.split('.')[-1]}"
-                                audio_save_path = os.path.join("audio", audio_file_name)
-                                print(f"Saving audio file to: {audio_save_path}")
-                                audio_data = audio.read()
-                                with open(audio_save_path, 'wb') as f:
-                                    f.write(audio_data)
-                                # Update word audio field in JSON
-                                if current_level in [1, 2, 3]:
-                                    json_file = f"level{current_level}.json"
-                                    update_word_audio(entry['word'], audio_save_path, json_file)
-                                st.audio(audio_data, format=audio_format)
-                            cleanup_audio_file(audio_file)
+                        # Played straight from memory; the audio cache persists it in the background
+                        audio_data, audio_format = asyncio.run(create_audio_clip(entry['word'], is_phrase=False, speed=selected_speed))
+                        if audio_data:
+                            st.audio(audio_data, format=audio_format)
                         else:
                             st.error("Audio generation failed")
                     random_num = random.randint(0, 300)
                     if entry['phrase'] and st.button(f"🔊 Phrase", key=f"phrase_{entry['word']}_{random_num}"):
-                        audio_file = asyncio.run(create_audio_file(entry['phrase'], f"phrase_{entry['word']}", is_phrase=True, speed=selected_speed))
-                        if audio_file and os.path.exists(audio_file):
-                            with open(audio_file, 'rb') as audio:
-                                # Detect audio format based on file extension
-                                audio_format = 'audio/mp3' if audio_file.endswith('.mp3') else 'audio/wav'
-                                st.audio(audio.read(), format=audio_format)
-                            cleanup_audio_file(audio_file)
+                        audio_data, audio_format = asyncio.run(create_audio_clip(entry['phrase'], is_phrase=True, speed=selected_speed))
+                        if audio_data:
+                            st.audio(audio_data, format=audio_format)
                         else:
                             st.error("Audio generation failed")
                     
@@ -252,18 +238,9 @@ if select == "📖 Study Mode":
                     if current_level in ["mailed","learned"]:
                         # Move back to vocabulary button for learned words
                         if st.button(f"↩️ Move Back", key=f"moveback_{entry['word']}", help="Move back to main vocabulary"):
-                            # Add word back to main vocabulary file
-                            with open(word_file, "a", encoding='utf-8') as f:
-                                f.write(f"{entry['word']} | {entry['meaning']} | {entry['phrase']} | General\n")
-                            if current_level == "mailed":
-                                # Remove from mailed.json
-                                mailed_words = load_mailed_words()
-                                updated_mailed = [w for w in mailed_words if w['word'].lower() != entry['word'].lower()]
-                                save_mailed_words_to_file(updated_mailed)
-                            # Remove from learned.json
-                            learned_words = load_learned_words()
-                            updated_learned = [w for w in learned_words if w['word'].lower() != entry['word'].lower()]
-                            save_learned_words_to_file(updated_learned)
+                            # Back into the level files (mailed words also leave learned.json)
+                            history_files = ["mailed.json", "learned.json"] if current_level == "mailed" else ["learned.json"]
+                            move_back_to_vocabulary(entry['word'], history_files)
                             
                             st.success(f"'{entry['word']}' moved back to main vocabulary!")
                             st.rerun()  # Refresh the page to update the list
@@ -273,9 +250,9 @@ if select == "📖 Study Mode":
                             word_file = "level" + str(current_level) + ".json"
                             random_num = random.randint(0, 300)
                             if st.button(f"✅ Learned", key=f"learned_{entry['word']}_{random_num}", help="Move to learned words"):
-                                success = save_to_learned(entry)
+                                # One read/write per store instead of save + delete
+                                success = move_words(word_file, "learned.json", [entry['word']])
                                 if success:
-                                    delete_word_from_file(entry['word'], word_file)
                                     st.success(f"'{entry['word']}' moved to learned words!")
                                     st.rerun()  # Refresh the page to update the list
                                     
@@ -319,3 +296,20 @@ if select == "📖 Study Mode":
                         delete_word_from_json(entry['word'], word_file)
                         st.success(f"'{entry['word']}' has been deleted from the vocabulary.")
                         st.rerun()  # Refresh the page to update the list
+
+elif select == "📊 Progress":
+    st.subheader("📊 Progress")
+    statistics = get_level_statistics()
+    columns = st.columns(len(statistics))
+    for column, (level, level_stats) in zip(columns, statistics.items()):
+        with column:
+            label = f"Level {level}" if isinstance(level, int) else level.capitalize()
+            st.metric(label, level_stats["total"])
+            for category, count in sorted(level_stats["categories"].items()):
+                st.caption(f"{category}: {count}")
+
+    audio_stats = get_audio_cache().stats()
+    st.caption(
+        f"🔊 Audio cache: {audio_stats['files']} clips, {audio_stats['bytes'] / 1_000_000:.1f} MB, "
+        f"{audio_stats['hits']} hits / {audio_stats['misses']} misses this session"
+    )
@@ -0,0 +1,104 @@
+"""
+Benchmark: "did you mean" lookup, BK-tree vs brute-force edit distance
+
+Generates 1k, 10k and 100k distinct pseudo-words, misspells a sample of them
+(1-2 random edits) and times, per query:
+  - BKTree.search(query, 2)
+  - a full scan computing the (cut-off) Levenshtein distance to every word
+Both must return the same candidates.  Also reports how many distance
+computations the BK-tree needed compared with the scan.
+
+Usage (from the repository root; run it as a module - `python benchmarks/...py`
+cannot import utils/):
+  python -m benchmarks.bench_fuzzy [--queries 200] [--max-distance 2]
+"""
+
+import time
+import random
+import string
+import argparse
+
+from utils import bk_tree
+from utils.bk_tree import BKTree, levenshtein
+
+SIZES = [1_000, 10_000, 100_000]
+
+SYLLABLES = ["ba", "co", "de", "fi", "ga", "hu", "ji", "ka", "lo", "me", "ni", "po", "qua", "re",
+             "si", "tu", "ve", "wa", "xi", "yo", "ze", "str", "ght", "ion", "ment", "ous", "er", "an"]
+
+
+def make_words(n_words, rng):
+    words = set()
+    while len(words) < n_words:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))))
+    return sorted(words)
+
+
+def misspell(word, rng):
+    chars = list(word)
+    for _ in range(rng.randint(1, 2)):
+        op = rng.choice("sid")
+        position = rng.randrange(len(chars))
+        if op == "s":
+            chars[position] = rng.choice(string.ascii_lowercase)
+        elif op == "i":
+            chars.insert(position, rng.choice(string.ascii_lowercase))
+        elif len(chars) > 1:
+            del chars[position]
+    return "".join(chars)
+
+
+def brute_force(words, query, max_distance):
+    results = []
+    for word in words:
+        distance = levenshtein(query, word, max_distance)
+        if distance <= max_distance:
+            results.append((distance, word))
+    results.sort()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_fuzzy", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--max-distance", type=int, default=2)
+    args = parser.parse_args()
+
+    # Count distance computations made by the tree
+    calls = [0]
+    original = bk_tree.levenshtein
+
+    def counting(a, b, max_distance=None):
+        calls[0] += 1
+        return original(a, b, max_distance)
+
+    print(f"{'words':>8} {'build':>9} {'bk-tree':>11} {'brute':>11} {'speedup':>8} {'visited':>8}")
+    for n_words in SIZES:
+        rng = random.Random(n_words)
+        words = make_words(n_words, rng)
+        queries = [misspell(rng.choice(words), rng) for _ in range(args.queries)]
+
+        start = time.perf_counter()
+        tree = BKTree(words)
+        t_build = time.perf_counter() - start
+
+        bk_tree.levenshtein = counting
+        calls[0] = 0
+        start = time.perf_counter()
+        tree_results = [tree.search(query, args.max_distance) for query in queries]
+        t_tree = (time.perf_counter() - start) / len(queries)
+        visited = calls[0] / len(queries) / n_words
+        bk_tree.levenshtein = original
+
+        start = time.perf_counter()
+        scan_results = [brute_force(words, query, args.max_distance) for query in queries]
+        t_scan = (time.perf_counter() - start) / len(queries)
+
+        assert tree_results == scan_results, "BK-tree and brute force disagree"
+        print(f"{n_words:>8} {t_build:>8.2f}s {t_tree * 1000:>9.2f}ms {t_scan * 1000:>9.2f}ms "
+              f"{t_scan / t_tree:>7.1f}x {visited:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
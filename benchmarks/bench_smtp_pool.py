@@ -0,0 +1,207 @@
+"""
+Benchmark: pooled SMTP sessions vs a new connection per message
+
+Starts a local stand-in SMTP server (EHLO, STARTTLS with a throwaway
+self-signed certificate, AUTH PLAIN, MAIL/RCPT/DATA) that adds a simulated
+network round trip to every reply, then sends the same messages:
+  - per-message: connect, STARTTLS, login, send, quit for every message
+    (what mailer.send_email used to do)
+  - pooled: utils.smtp_pool.SMTPPool
+Also checks that the pool recovers when the server drops all its sessions.
+
+STARTTLS needs the openssl command to create the certificate; without it
+the benchmark runs in plain text (--no-tls does the same).
+
+Usage (from the repository root; run it as a module - `python benchmarks/...py`
+cannot import utils/):
+  python -m benchmarks.bench_smtp_pool [--messages 200] [--rtt-ms 20] [--pool-size 4]
+"""
+
+import os
+import ssl
+import time
+import shutil
+import smtplib
+import argparse
+import tempfile
+import threading
+import subprocess
+import socketserver
+from email.message import EmailMessage
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.smtp_pool import SMTPPool
+
+
+class StandInSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        time.sleep(self.server.rtt)
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+        self.wfile.flush()
+
+    def handle(self):
+        self.server.track(self.connection, True)
+        try:
+            self.reply("220 stand-in ESMTP")
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                command = line.decode("ascii", "replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+                if verb in ("EHLO", "HELO"):
+                    features = ["250-stand-in", "250-AUTH PLAIN LOGIN"]
+                    if self.server.tls_context and not isinstance(self.connection, ssl.SSLSocket):
+                        features.append("250-STARTTLS")
+                    for feature in features:
+                        self.wfile.write(feature.encode("ascii") + b"\r\n")
+                    self.reply("250 SIZE 10485760")
+                elif verb == "STARTTLS":
+                    self.reply("220 ready for TLS")
+                    self.connection = self.server.tls_context.wrap_socket(self.connection, server_side=True)
+                    self.rfile = self.connection.makefile("rb")
+                    self.wfile = self.connection.makefile("wb")
+                    self.server.track(self.connection, True)
+                    self.server.count("handshakes")
+                elif verb == "AUTH":
+                    self.server.count("logins")
+                    self.reply("235 authenticated")
+                elif verb == "DATA":
+                    self.reply("354 end with <CRLF>.<CRLF>")
+                    while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                        pass
+                    self.server.count("messages")
+                    self.reply("250 queued")
+                elif verb == "QUIT":
+                    self.reply("221 bye")
+                    return
+                else:   # MAIL, RCPT, RSET, NOOP
+                    self.reply("250 ok")
+        except (OSError, ssl.SSLError):
+            return
+        finally:
+            self.server.track(self.connection, False)
+
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, rtt, tls_context):
+        super().__init__(("127.0.0.1", 0), StandInSMTPHandler)
+        self.rtt = rtt
+        self.tls_context = tls_context
+        self.counters = {"connections": 0, "handshakes": 0, "logins": 0, "messages": 0}
+        self._sockets = set()
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def reset_counters(self):
+        with self._lock:
+            self.counters = dict.fromkeys(self.counters, 0)
+
+    def track(self, sock, alive):
+        with self._lock:
+            if alive:
+                self._sockets.add(sock)
+            else:
+                self._sockets.discard(sock)
+
+    def process_request(self, request, client_address):
+        self.count("connections")
+        super().process_request(request, client_address)
+
+    def drop_sessions(self):
+        """Close every open client connection, as a server-side idle timeout would"""
+        with self._lock:
+            sockets = list(self._sockets)
+        for sock in sockets:
+            try:
+                sock.shutdown(2)
+            except OSError:
+                pass
+
+
+def make_tls_context(directory):
+    if shutil.which("openssl") is None:
+        return None
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+                   check=True, capture_output=True)
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def make_message(i):
+    msg = EmailMessage()
+    msg["Subject"] = f"Mailed words #{i}"
+    msg["From"] = "sender@example.com"
+    msg["To"] = f"subscriber{i}@example.com"
+    msg.set_content("- word | meaning | phrase")
+    msg.add_alternative("<ul><li><strong>word</strong></li></ul>", subtype="html")
+    return msg
+
+
+def send_per_message(port, msg, starttls):
+    with smtplib.SMTP("127.0.0.1", port) as smtp:
+        if starttls:
+            smtp.starttls()
+        smtp.login("user", "secret")
+        smtp.send_message(msg)
+
+
+def run(label, server, messages, workers, send):
+    server.reset_counters()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(send, messages))
+    elapsed = time.perf_counter() - start
+    c = server.counters
+    print(f"{label:>12} {len(messages) / elapsed:>9.1f} {c['connections']:>12} {c['handshakes']:>11} "
+          f"{c['logins']:>7} {c['messages']:>9}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_smtp_pool", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=20.0, help="simulated round trip per server reply")
+    parser.add_argument("--pool-size", type=int, default=4, help="pool size and number of sending threads")
+    parser.add_argument("--no-tls", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        tls_context = None if args.no_tls else make_tls_context(directory)
+        server = StandInSMTPServer(args.rtt_ms / 1000.0, tls_context)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+        starttls = tls_context is not None
+        messages = [make_message(i) for i in range(args.messages)]
+        print(f"{args.messages} messages, {args.rtt_ms:.0f} ms round trip, "
+              f"{'STARTTLS' if starttls else 'plain text'}, {args.pool_size} sending threads")
+
+        print(f"{'mode':>12} {'msgs/s':>9} {'connections':>12} {'handshakes':>11} {'logins':>7} {'delivered':>9}")
+        t_single = run("per-message", server, messages, args.pool_size,
+                       lambda msg: send_per_message(port, msg, starttls))
+        pool = SMTPPool("127.0.0.1", port, "user", "secret", size=args.pool_size,
+                        max_messages=100, starttls=starttls)
+        t_pool = run("pooled", server, messages, args.pool_size, pool.send_message)
+        print(f"speedup: {t_single / t_pool:.1f}x")
+
+        # Server drops every session; the next sends must reconnect transparently
+        server.drop_sessions()
+        time.sleep(0.1)
+        run("after drop", server, messages[:args.pool_size * 2], args.pool_size, pool.send_message)
+        print(f"pool stats: {pool.stats()}")
+        pool.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
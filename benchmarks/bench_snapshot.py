@@ -0,0 +1,83 @@
+"""
+Benchmark: level file load time, plain JSON vs compiled snapshot
+
+Generates synthetic level files with 1k, 10k and 100k words (same shape as
+level1.json, indent=2) in a temporary directory and times:
+  - json.load of the level file
+  - load_level_file with a current snapshot (the normal cold-start path)
+  - load_level_file when the snapshot has to be (re)built
+
+Usage (from the repository root; run it as a module - `python benchmarks/...py`
+cannot import utils/):
+  python -m benchmarks.bench_snapshot [--repeat 5]
+"""
+
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+
+from utils.snapshot_cache import load_level_file, snapshot_path_for
+
+CATEGORIES = ["general", "science", "business", "literature", "travel", "history", "geography", "health"]
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+def make_corpus(n_words, seed=42):
+    rng = random.Random(seed)
+    categories = CATEGORIES
+    data = {category: [] for category in categories}
+    for i in range(n_words):
+        word = f"word{i}"
+        data[rng.choice(categories)].append({
+            "word": word.capitalize(),
+            "meaning": f"Meaning of {word} used for benchmarking",
+            "phrase": f"This is an example phrase that uses {word} in a sentence.",
+            "expressions": [f"This is {word}.", f"I like {word}."],
+        })
+    return data
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_snapshot", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'words':>8} {'json.load':>12} {'snapshot':>12} {'rebuild':>12} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_words in SIZES:
+            path = os.path.join(tmp, f"level_{n_words}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(make_corpus(n_words), f, ensure_ascii=False, indent=2)
+
+            def plain():
+                with open(path, "r", encoding="utf-8") as f:
+                    json.load(f)
+
+            def rebuild():
+                if os.path.exists(snapshot_path_for(path)):
+                    os.remove(snapshot_path_for(path))
+                load_level_file(path)
+
+            t_json = best_of(plain, args.repeat)
+            t_rebuild = best_of(rebuild, args.repeat)
+            t_snapshot = best_of(lambda: load_level_file(path), args.repeat)
+            print(f"{n_words:>8} {t_json * 1000:>10.2f}ms {t_snapshot * 1000:>10.2f}ms "
+                  f"{t_rebuild * 1000:>10.2f}ms {t_json / t_snapshot:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Check: the bulk importer writes in bounded batches
+
+Imports a generated CSV (unique headwords, a word repeated within one batch,
+and repeats of earlier rows that land after a flush) into copies of the level
+files in a temporary directory and records every write the importer makes
+through the repository.  Checks that no write carries more than
+utils.bulk_import.FLUSH_SIZE rows, that every unique row was written exactly
+once (including the first of the in-batch pair), and that only the repeats
+were reported as duplicates.  Exits non-zero if any check fails.
+
+Run from the repository root, as a module so utils/ is importable:
+  python -m benchmarks.check_bulk_import_batches [--rows 5500]
+"""
+
+import os
+import sys
+import csv
+import shutil
+import argparse
+import tempfile
+
+from utils import bulk_import
+from utils.vocab_repository import get_repository, LEVEL_FILES
+
+
+def write_csv(path, rows, repeats):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["word", "meaning", "level", "category"])
+        # Repeated within one batch: the first row is imported, the second is a duplicate
+        writer.writerow(["Zzrepeated", "first", 1, "bulk"])
+        writer.writerow(["Zzrepeated", "second", 1, "bulk"])
+        for i in range(rows):
+            writer.writerow([f"zzimport{i:06d}", f"meaning {i}", i % 3 + 1, "bulk"])
+        for i in range(repeats):
+            # Already written by an earlier flush
+            writer.writerow([f"zzimport{i:06d}", "again", i % 3 + 1, "bulk"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5500)
+    parser.add_argument("--repeats", type=int, default=25)
+    args = parser.parse_args()
+
+    source_dir = os.getcwd()
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        for path in LEVEL_FILES.values():
+            if os.path.exists(os.path.join(source_dir, path)):
+                shutil.copy(os.path.join(source_dir, path), directory)
+        os.chdir(directory)
+        try:
+            csv_path = os.path.join(directory, "words.csv")
+            write_csv(csv_path, args.rows, args.repeats)
+
+            repository = get_repository()
+            writes = []
+            apply_many = repository.apply_many
+
+            def recording_apply_many(path, records, empty=dict):
+                writes.append((path, len(records)))
+                return apply_many(path, records, empty)
+
+            repository.apply_many = recording_apply_many
+            report = bulk_import.import_words(csv_path)
+            repository.apply_many = apply_many
+
+            largest = max((size for _, size in writes), default=0)
+            written = sum(size for _, size in writes)
+            imported = sum(report["imported"].values())
+            stored = sum(1 for level in LEVEL_FILES.values()
+                         for word in repository.load_level(level).get("bulk", []))
+            print(f"{report['rows']} rows: {imported} imported, {report['duplicates']} duplicates, "
+                  f"{len(writes)} writes, largest {largest} rows (FLUSH_SIZE {bulk_import.FLUSH_SIZE})")
+
+            if largest > bulk_import.FLUSH_SIZE:
+                failures.append(f"a write carried {largest} rows")
+            if not (written == imported == stored == args.rows + 1):
+                failures.append(f"written {written}, imported {imported}, stored {stored}, expected {args.rows + 1}")
+            if report["duplicates"] != args.repeats + 1:
+                failures.append(f"{report['duplicates']} duplicates reported, expected {args.repeats + 1}")
+        finally:
+            os.chdir(source_dir)
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    print("OK" if not failures else "FAILED")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Check: short search prefixes return every headword starting with them
+
+For each level file, every one- and two-letter prefix of a headword (and any
+--prefix given) is searched through utils.json_manager.search_vocabulary,
+and the results must include every entry whose headword starts with that
+prefix - what the old substring filter of the Study Mode search box found.
+Exits non-zero if any entry is missing.
+
+Run from the repository root (the level files are read from the working
+directory), as a module so utils/ is importable:
+  python -m benchmarks.check_search_prefixes [--prefix co --prefix pr]
+"""
+
+import sys
+import argparse
+
+from utils.json_manager import search_vocabulary, load_vocabulary_with_expressions
+from utils.vocab_repository import LEVEL_FILES, normalize_word
+
+
+def check_level(level, extra_prefixes):
+    entries = load_vocabulary_with_expressions(level)
+    headwords = [normalize_word(entry.get('word', '')) for entry in entries]
+    prefixes = {h[:n] for h in headwords for n in (1, 2) if len(h) >= n and h[:n].strip()}
+    prefixes.update(normalize_word(p) for p in extra_prefixes)
+
+    failures = 0
+    for prefix in sorted(prefixes):
+        expected = sorted(h for h in headwords if h.startswith(prefix))
+        found = sorted(normalize_word(entry.get('word', '')) for entry in search_vocabulary(level, prefix))
+        missing = sorted(set(expected) - set(found))
+        if missing:
+            failures += 1
+            print(f"level {level} '{prefix}': {len(missing)} of {len(expected)} headwords missing, "
+                  f"e.g. {missing[:5]}")
+    print(f"level {level}: {len(entries)} entries, {len(prefixes)} prefixes checked, {failures} failing")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prefix", action="append", default=[], help="extra prefix to check (repeatable)")
+    args = parser.parse_args()
+
+    failures = sum(check_level(level, args.prefix) for level in LEVEL_FILES)
+    print("OK" if not failures else f"FAILED: {failures} prefixes miss headwords")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Stress test: 100 concurrent identical TTS requests
+
+Fires the same create_audio_file request from many places at once, the way a
+rerun storm or several Streamlit sessions do, against an empty audio cache in
+a temporary directory:
+  - threads: one thread and event loop per request (asyncio.run, as in the pages)
+  - tasks: all requests gathered on one event loop
+For each mode it checks that exactly one synthesis ran, that every caller got
+the same cached file, and that no temporary files were left behind.  Exits
+non-zero if any check fails.
+
+Usage:
+  python -m benchmarks.stress_tts_coalescing [--requests 100] [--text hello] [--speed normal]
+"""
+
+import os
+import sys
+import glob
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+
+from utils import audio_cache, word_functions
+from utils.audio_cache import AudioCache
+
+
+def _leftover_temp_files(prefix):
+    return glob.glob(os.path.join(tempfile.gettempdir(), f"{prefix}-*"))
+
+
+def run_threads(text, speed, n_requests, prefix):
+    barrier = threading.Barrier(n_requests)
+    results = [None] * n_requests
+
+    def _request(i):
+        barrier.wait()
+        results[i] = asyncio.run(word_functions.create_audio_file(text, prefix, speed=speed))
+
+    threads = [threading.Thread(target=_request, args=(i,)) for i in range(n_requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def run_tasks(text, speed, n_requests, prefix):
+    async def _all():
+        return await asyncio.gather(*(word_functions.create_audio_file(text, prefix, speed=speed)
+                                      for _ in range(n_requests)))
+    return asyncio.run(_all())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--text", default="coalescing")
+    parser.add_argument("--speed", default="normal", choices=word_functions.SPEED_OPTIONS)
+    args = parser.parse_args()
+
+    # Count syntheses of the requested clip that get past the single-flight
+    # layer (a slower speed also renders its normal-speed base once)
+    calls = [0]
+    original = word_functions._create_audio_file
+
+    async def counting(text, filename, is_phrase, speed):
+        if speed == args.speed:
+            calls[0] += 1
+        return await original(text, filename, is_phrase, speed)
+
+    word_functions._create_audio_file = counting
+    failures = 0
+    print(f"{'mode':>8} {'requests':>9} {'syntheses':>10} {'paths':>6} {'leftovers':>10} {'seconds':>8}")
+    for mode, runner in (("threads", run_threads), ("tasks", run_tasks)):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # Start from an empty cache so the first request really synthesizes
+            audio_cache._audio_cache = AudioCache(cache_dir)
+            calls[0] = 0
+            prefix = f"stress_{mode}_{os.getpid()}"
+            start = time.perf_counter()
+            results = runner(f"{args.text} {mode}", args.speed, args.requests, prefix)
+            elapsed = time.perf_counter() - start
+
+            paths = set(results)
+            leftovers = _leftover_temp_files(prefix) + glob.glob(os.path.join(cache_dir, ".tmp-*"))
+            ok = calls[0] == 1 and len(paths) == 1 and None not in paths and not leftovers
+            failures += not ok
+            print(f"{mode:>8} {len(results):>9} {calls[0]:>10} {len(paths):>6} {len(leftovers):>10} "
+                  f"{elapsed:>8.2f}  {'ok' if ok else 'FAIL'}")
+    word_functions._create_audio_file = original
+    audio_cache._audio_cache = None
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# Outbox db_handler.py
+#
+# Durable queue of outgoing emails: one row per (subscriber, date, word set).
+# The idempotency key makes enqueueing the same mail twice a no-op, so rerunning
+# the mail job never sends a duplicate.  Rows are claimed with a lease before
+# sending (a crashed sender's rows become due again when the lease runs out),
+# and failed sends are retried with exponential backoff.
+import os
+import json
+import random
+import sqlite3
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+DB_PATH = "outbox.db"
+
+MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 8))
+RETRY_BASE_SECONDS = float(os.getenv('OUTBOX_RETRY_BASE_SECONDS', 30))
+RETRY_MAX_SECONDS = float(os.getenv('OUTBOX_RETRY_MAX_SECONDS', 3600))
+# Lease on top of the time a batch needs at the send rate (see claim_due_messages)
+LEASE_SECONDS = 300
+
+# pending: waiting (possibly for a retry); sending: claimed by a sender;
+# sent: delivered; dead: refused by the server or out of attempts
+STATUSES = ("pending", "sending", "sent", "dead")
+
+# -------------------------
+# Data Models
+# -------------------------
+@dataclass
+class OutboxMessage:
+    id: int
+    idempotency_key: str
+    email: str
+    send_date: str
+    words: list
+    from_addr: str
+    subject: str
+    plain_body: str
+    html_body: str
+    template_key: str | None
+    status: str
+    attempts: int
+    next_attempt_at: datetime
+    last_error: str | None
+    created_at: datetime
+    sent_at: datetime | None
+
+COLUMNS = ("id, idempotency_key, email, send_date, words, from_addr, subject, plain_body, html_body, "
+           "template_key, status, attempts, next_attempt_at, last_error, created_at, sent_at")
+
+def to_outbox_message(row) -> OutboxMessage:
+    (mid, key, email, send_date, words_json, from_addr, subject, plain_body, html_body, template_key,
+     status, attempts, next_iso, last_error, created_iso, sent_iso) = row
+    return OutboxMessage(
+        id=mid,
+        idempotency_key=key,
+        email=email,
+        send_date=send_date,
+        words=json.loads(words_json),
+        from_addr=from_addr,
+        subject=subject,
+        plain_body=plain_body,
+        html_body=html_body,
+        template_key=template_key,
+        status=status,
+        attempts=attempts,
+        next_attempt_at=datetime.fromisoformat(next_iso),
+        last_error=last_error,
+        created_at=datetime.fromisoformat(created_iso),
+        sent_at=datetime.fromisoformat(sent_iso) if sent_iso else None,
+    )
+
+def _timestamp(moment: datetime) -> str:
+    # Fixed width, so timestamps compare correctly as text
+    return moment.isoformat(timespec="microseconds")
+
+def idempotency_key(email: str, send_date: str, words: list) -> str:
+    """Key of one day's mail to one subscriber: address, date and the (unordered) word set"""
+    word_set = sorted({w.strip().lower() for w in words})
+    payload = json.dumps([email.strip().lower(), send_date, word_set], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with +-10% jitter: base, 2x base, 4x base, ... capped"""
+    delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.9, 1.1)
+
+# -------------------------
+# DB
+# -------------------------
+def db_conn():
+    return sqlite3.connect(DB_PATH, check_same_thread=False, timeout=30)
+
+def db_init():
+    with db_conn() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                email TEXT NOT NULL,
+                send_date TEXT NOT NULL,
+                words TEXT NOT NULL,
+                from_addr TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                plain_body TEXT NOT NULL,
+                html_body TEXT NOT NULL,
+                template_key TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at TEXT NOT NULL,
+                last_error TEXT,
+                created_at TEXT NOT NULL,
+                sent_at TEXT
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+        # Tables created before rows carried the digest of their rendered body
+        columns = [column[1] for column in conn.execute("PRAGMA table_info(outbox)").fetchall()]
+        if 'template_key' not in columns:
+            conn.execute("ALTER TABLE outbox ADD COLUMN template_key TEXT")
+        conn.commit()
+db_init()
+
+def enqueue_messages(messages: list[dict]) -> int:
+    """
+    Add outgoing emails, skipping any whose idempotency key already exists
+    (whatever its status), so enqueueing is safe to repeat.
+
+    Args:
+        messages: Dicts with email, send_date, words (list of headwords),
+            from_addr, subject, plain_body and html_body, and optionally
+            template_key (a short digest naming the rendered body, so senders
+            can cache the serialized payload under it)
+
+    Returns:
+        int: Number of new rows
+    """
+    now = _timestamp(datetime.now())
+    rows = [
+        (idempotency_key(m["email"], m["send_date"], m["words"]), m["email"], m["send_date"],
+         json.dumps(m["words"], ensure_ascii=False), m["from_addr"], m["subject"],
+         m["plain_body"], m["html_body"], m.get("template_key"), now, now)
+        for m in messages
+    ]
+    conn = db_conn()
+    try:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO outbox (idempotency_key, email, send_date, words, from_addr, subject, "
+            "plain_body, html_body, template_key, next_attempt_at, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+        return conn.total_changes - before
+    finally:
+        conn.close()
+
+def claim_due_messages(limit: int = 500, now: datetime | None = None,
+                       lease_seconds: float = LEASE_SECONDS) -> list[OutboxMessage]:
+    """
+    Claim up to ``limit`` due messages for sending.
+
+    Claimed rows get status 'sending' and a lease; if the sender dies before
+    reporting back, they become due again when the lease expires.  The lease
+    must outlast sending the whole batch, or a second sender could claim rows
+    that are still queued and mail them twice.
+    """
+    now = now or datetime.now()
+    conn = db_conn()
+    try:
+        # Take the write lock before reading, so two senders never claim the same rows
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            f"SELECT {COLUMNS} FROM outbox WHERE status IN ('pending', 'sending') AND next_attempt_at <= ? "
+            "ORDER BY next_attempt_at, id LIMIT ?",
+            (_timestamp(now), limit),
+        ).fetchall()
+        lease = _timestamp(now + timedelta(seconds=lease_seconds))
+        conn.executemany(
+            "UPDATE outbox SET status = 'sending', attempts = attempts + 1, next_attempt_at = ? WHERE id = ?",
+            [(lease, row[0]) for row in rows],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    messages = [to_outbox_message(row) for row in rows]
+    for message in messages:
+        message.status = "sending"
+        message.attempts += 1
+    return messages
+
+def record_results(results: list[tuple]):
+    """
+    Store send outcomes in one transaction.
+
+    Args:
+        results: (OutboxMessage, status, error) tuples, where status is "sent",
+            "refused" (permanent, not retried) or "failed" (retried with backoff
+            until MAX_ATTEMPTS)
+    """
+    now = datetime.now()
+    updates = []
+    for message, status, error in results:
+        if status == "sent":
+            updates.append(("sent", None, _timestamp(message.next_attempt_at), _timestamp(now), message.id))
+        elif status == "refused" or message.attempts >= MAX_ATTEMPTS:
+            updates.append(("dead", error, _timestamp(message.next_attempt_at), None, message.id))
+        else:
+            retry_at = now + timedelta(seconds=retry_delay(message.attempts))
+            updates.append(("pending", error, _timestamp(retry_at), None, message.id))
+    conn = db_conn()
+    try:
+        conn.executemany(
+            "UPDATE outbox SET status = ?, last_error = ?, next_attempt_at = ?, sent_at = ? WHERE id = ?",
+            updates,
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def next_due_time() -> datetime | None:
+    """When the next pending or leased message becomes due (None if nothing is left)"""
+    conn = db_conn()
+    try:
+        row = conn.execute(
+            "SELECT MIN(next_attempt_at) FROM outbox WHERE status IN ('pending', 'sending')"
+        ).fetchone()
+    finally:
+        conn.close()
+    return datetime.fromisoformat(row[0]) if row and row[0] else None
+
+def count_by_status(send_date: str | None = None) -> dict:
+    """Number of messages per status, optionally for one date"""
+    conn = db_conn()
+    try:
+        if send_date:
+            rows = conn.execute("SELECT status, COUNT(*) FROM outbox WHERE send_date = ? GROUP BY status",
+                                (send_date,)).fetchall()
+        else:
+            rows = conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+    finally:
+        conn.close()
+    counts = dict.fromkeys(STATUSES, 0)
+    counts.update(dict(rows))
+    return counts
+
+def list_outbox(send_date: str | None = None, status: str | None = None) -> list[OutboxMessage]:
+    """List outbox messages, optionally filtered by date and status"""
+    query = f"SELECT {COLUMNS} FROM outbox"
+    clauses, params = [], []
+    if send_date:
+        clauses.append("send_date = ?")
+        params.append(send_date)
+    if status:
+        clauses.append("status = ?")
+        params.append(status)
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    conn = db_conn()
+    try:
+        rows = conn.execute(query + " ORDER BY id", params).fetchall()
+    finally:
+        conn.close()
+    return [to_outbox_message(row) for row in rows]
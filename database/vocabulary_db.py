@@ -0,0 +1,422 @@
+# Vocabulary db_handler.py
+#
+# SQLite copy of the vocabulary levels, learned and mailed lists, filled by a
+# one-shot migration from the JSON stores:
+#   python -m database.vocabulary_db --migrate
+#
+# Migration target only: the app itself still reads and writes the JSON
+# stores through utils.vocab_repository, and nothing selects this backend.
+import os
+import sqlite3
+import argparse
+from dataclasses import dataclass, field
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from utils.vocab_repository import get_repository
+
+APP_TZ = ZoneInfo("Asia/Seoul")
+DB_PATH = os.getenv("VOCAB_DB_PATH", "vocabulary.db")
+
+LEVEL_FILES = {
+    1: "level1.json",
+    2: "level2.json",
+    3: "level3.json"
+}
+
+# -------------------------
+# Data Models
+# -------------------------
+@dataclass
+class Word:
+    id: int
+    word: str
+    level: int
+    category: str
+    meaning: str
+    phrase: str
+    media: str
+    audio: str
+    expressions: list = field(default_factory=list)
+
+    def to_entry(self) -> dict:
+        """Return the word in the same dict format as the JSON level files"""
+        entry = {
+            "word": self.word,
+            "meaning": self.meaning,
+            "phrase": self.phrase,
+            "expressions": list(self.expressions),
+            "category": self.category,
+        }
+        if self.media:
+            entry["media"] = self.media
+        if self.audio:
+            entry["audio"] = self.audio
+        return entry
+
+def to_word(row, expressions=None) -> Word:
+    (wid, word, level, category, meaning, phrase, media, audio) = row
+    return Word(
+        id=wid,
+        word=word,
+        level=level,
+        category=category,
+        meaning=meaning or "",
+        phrase=phrase or "",
+        media=media or "",
+        audio=audio or "",
+        expressions=expressions or [],
+    )
+
+WORD_COLUMNS = "id, word, level, category, meaning, phrase, media, audio"
+
+# -------------------------
+# DB
+# -------------------------
+def db_conn():
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+def db_init():
+    with db_conn() as conn:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS words (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                word TEXT NOT NULL,
+                level INTEGER NOT NULL,
+                category TEXT NOT NULL,
+                meaning TEXT,
+                phrase TEXT,
+                media TEXT,
+                audio TEXT,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS expressions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                word_id INTEGER NOT NULL REFERENCES words(id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                text TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS learned (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                word TEXT NOT NULL,
+                meaning TEXT,
+                phrase TEXT,
+                category TEXT,
+                learned_date TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS mailed (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                word TEXT NOT NULL,
+                meaning TEXT,
+                phrase TEXT,
+                media TEXT,
+                category TEXT,
+                mailed_date TEXT NOT NULL,
+                sent_date TEXT
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_words_word ON words(lower(word))")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_words_level_category ON words(level, category)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_expressions_word ON expressions(word_id, position)")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_learned_word ON learned(lower(word))")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_mailed_word ON mailed(lower(word))")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_mailed_date ON mailed(mailed_date)")
+        conn.commit()
+db_init()
+
+def _load_expressions(conn, word_ids):
+    """Return {word_id: [expression, ...]} for the given word ids"""
+    expressions = {}
+    if not word_ids:
+        return expressions
+    placeholders = ", ".join("?" for _ in word_ids)
+    cursor = conn.execute(
+        f"SELECT word_id, text FROM expressions WHERE word_id IN ({placeholders}) ORDER BY word_id, position",
+        list(word_ids),
+    )
+    for word_id, text in cursor.fetchall():
+        expressions.setdefault(word_id, []).append(text)
+    return expressions
+
+def _replace_expressions(conn, word_id, expressions):
+    conn.execute("DELETE FROM expressions WHERE word_id = ?", (word_id,))
+    conn.executemany(
+        "INSERT INTO expressions (word_id, position, text) VALUES (?, ?, ?)",
+        [(word_id, i, text) for i, text in enumerate(expressions or [])],
+    )
+
+def _insert_word(conn, level: int, category: str, entry: dict, created_at: str):
+    cursor = conn.execute(
+        "INSERT INTO words (word, level, category, meaning, phrase, media, audio, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            entry.get("word", ""),
+            level,
+            category,
+            entry.get("meaning", ""),
+            entry.get("phrase", ""),
+            entry.get("media", ""),
+            entry.get("audio", ""),
+            created_at,
+        ),
+    )
+    _replace_expressions(conn, cursor.lastrowid, entry.get("expressions", []))
+    return cursor.lastrowid
+
+# -------------------------
+# Words
+# -------------------------
+def add_word(level: int, category: str, entry: dict) -> int:
+    """Add a word entry (same dict format as the JSON files) and return its id"""
+    with db_conn() as conn:
+        word_id = _insert_word(conn, level, category, entry, datetime.now(APP_TZ).isoformat())
+        conn.commit()
+    return word_id
+
+def get_word(word: str, level: int = None):
+    """Find a word by headword (case-insensitive), optionally within one level"""
+    query = f"SELECT {WORD_COLUMNS} FROM words WHERE lower(word) = lower(?)"
+    params = [word]
+    if level is not None:
+        query += " AND level = ?"
+        params.append(level)
+    with db_conn() as conn:
+        row = conn.execute(query + " LIMIT 1", params).fetchone()
+        if row is None:
+            return None
+        expressions = _load_expressions(conn, [row[0]])
+    return to_word(row, expressions.get(row[0]))
+
+def list_words(level: int, category: str = None):
+    """List the words of a level (optionally one category) in insertion order"""
+    where = "w.level = ?"
+    params = [level]
+    if category is not None:
+        where += " AND w.category = ?"
+        params.append(category)
+    with db_conn() as conn:
+        rows = conn.execute(
+            f"SELECT {WORD_COLUMNS} FROM words w WHERE {where} ORDER BY w.id", params
+        ).fetchall()
+        # One joined query for all expressions instead of an IN list per word
+        expressions = {}
+        cursor = conn.execute(
+            f"SELECT e.word_id, e.text FROM expressions e JOIN words w ON w.id = e.word_id WHERE {where} ORDER BY e.word_id, e.position",
+            params,
+        )
+        for word_id, text in cursor.fetchall():
+            expressions.setdefault(word_id, []).append(text)
+    return [to_word(row, expressions.get(row[0])) for row in rows]
+
+def update_word(level: int, word: str, new_meaning: str = None, new_phrase: str = None,
+                new_media: str = None, new_audio: str = None, new_category: str = None,
+                new_expressions: list = None) -> bool:
+    """Update a word's fields in place with a single indexed UPDATE"""
+    updates = []
+    params = []
+
+    if new_meaning is not None:
+        updates.append("meaning = ?")
+        params.append(new_meaning)
+    if new_phrase is not None:
+        updates.append("phrase = ?")
+        params.append(new_phrase)
+    if new_media is not None:
+        updates.append("media = ?")
+        params.append(new_media)
+    if new_audio is not None:
+        updates.append("audio = ?")
+        params.append(new_audio)
+    if new_category is not None:
+        updates.append("category = ?")
+        params.append(new_category)
+
+    with db_conn() as conn:
+        row = conn.execute(
+            "SELECT id FROM words WHERE lower(word) = lower(?) AND level = ? LIMIT 1", (word, level)
+        ).fetchone()
+        if row is None:
+            return False
+        if updates:
+            conn.execute(f"UPDATE words SET {', '.join(updates)} WHERE id = ?", params + [row[0]])
+        if new_expressions is not None:
+            _replace_expressions(conn, row[0], new_expressions)
+        conn.commit()
+    return True
+
+def delete_word(level: int, word: str) -> int:
+    """Delete every entry of a word from a level and return how many were removed"""
+    with db_conn() as conn:
+        cursor = conn.execute("DELETE FROM words WHERE lower(word) = lower(?) AND level = ?", (word, level))
+        conn.commit()
+    return cursor.rowcount
+
+def count_words(level: int = None) -> dict:
+    """Return {category: count} for one level, or for all levels if level is None"""
+    query = "SELECT category, COUNT(*) FROM words"
+    params = []
+    if level is not None:
+        query += " WHERE level = ?"
+        params.append(level)
+    with db_conn() as conn:
+        rows = conn.execute(query + " GROUP BY category", params).fetchall()
+    return dict(rows)
+
+# -------------------------
+# Learned / Mailed
+# -------------------------
+def add_learned(entry: dict, learned_date: str = None) -> bool:
+    """Record a learned word; returns False if it is already in the learned list"""
+    with db_conn() as conn:
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO learned (word, meaning, phrase, category, learned_date) VALUES (?, ?, ?, ?, ?)",
+            (
+                entry.get("word", ""),
+                entry.get("meaning", ""),
+                entry.get("phrase", ""),
+                entry.get("category", "general"),
+                learned_date or entry.get("learned_date") or datetime.now().isoformat(),
+            ),
+        )
+        conn.commit()
+    return cursor.rowcount == 1
+
+def list_learned():
+    with db_conn() as conn:
+        rows = conn.execute(
+            "SELECT word, meaning, phrase, category, learned_date FROM learned ORDER BY id"
+        ).fetchall()
+    return [
+        {"word": w, "meaning": m, "phrase": p, "category": c, "learned_date": d}
+        for (w, m, p, c, d) in rows
+    ]
+
+def add_mailed(entry: dict, mailed_date: str = None) -> int:
+    """Record a mailed event and return its id"""
+    with db_conn() as conn:
+        cursor = conn.execute(
+            "INSERT INTO mailed (word, meaning, phrase, media, category, mailed_date, sent_date) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                entry.get("word", ""),
+                entry.get("meaning", ""),
+                entry.get("phrase", ""),
+                entry.get("media", ""),
+                entry.get("category", ""),
+                mailed_date or entry.get("mailed_date") or datetime.now().isoformat(),
+                entry.get("sent_date"),
+            ),
+        )
+        conn.commit()
+    return cursor.lastrowid
+
+def list_mailed(mailed_on: str = None):
+    """List mailed events, optionally only those whose mailed_date starts with mailed_on (YYYY-MM-DD)"""
+    query = "SELECT word, meaning, phrase, media, category, mailed_date, sent_date FROM mailed"
+    params = []
+    if mailed_on:
+        # Range scan on idx_mailed_date instead of parsing every date;
+        # '~' sorts after the 'T' that separates date and time in ISO strings
+        query += " WHERE mailed_date >= ? AND mailed_date < ?"
+        params += [mailed_on, mailed_on + "~"]
+    with db_conn() as conn:
+        rows = conn.execute(query + " ORDER BY id", params).fetchall()
+    return [
+        {"word": w, "meaning": m, "phrase": p, "media": md, "category": c, "mailed_date": d, "sent_date": s}
+        for (w, m, p, md, c, d, s) in rows
+    ]
+
+def mark_mailed_sent(word: str, mailed_date: str, sent_date: str) -> int:
+    with db_conn() as conn:
+        cursor = conn.execute(
+            "UPDATE mailed SET sent_date = ? WHERE lower(word) = lower(?) AND mailed_date = ?",
+            (sent_date, word, mailed_date),
+        )
+        conn.commit()
+    return cursor.rowcount
+
+# -------------------------
+# Migration
+# -------------------------
+def migrate_from_json(level_files=None, learned_file="learned.json", mailed_file="mailed.json", force=False) -> dict:
+    """
+    One-shot import of the JSON stores into SQLite.
+
+    Skips the import if the words table already has rows, unless force=True
+    (which clears all vocabulary tables first). Runs in a single transaction.
+
+    Returns:
+        dict: Number of rows imported per table
+    """
+    level_files = level_files or LEVEL_FILES
+    counts = {"words": 0, "learned": 0, "mailed": 0}
+    with db_conn() as conn:
+        existing = conn.execute("SELECT COUNT(*) FROM words").fetchone()[0]
+        if existing and not force:
+            print(f"Vocabulary database already has {existing} words; use force=True to re-import")
+            return counts
+        if force:
+            for table in ("expressions", "words", "learned", "mailed"):
+                conn.execute(f"DELETE FROM {table}")
+
+        # Read through the repository: history entries may still sit in the
+        # journals (utils/history_journal.py), not yet in the JSON snapshots
+        repository = get_repository()
+        created_at = datetime.now(APP_TZ).isoformat()
+        for level, path in level_files.items():
+            if not os.path.exists(path):
+                continue
+            data = repository.load_level(path)
+            for category, words in data.items():
+                for entry in words:
+                    _insert_word(conn, level, category, entry, created_at)
+                    counts["words"] += 1
+
+        # A missing history store loads as an empty list
+        for entry in repository.load_history(learned_file):
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO learned (word, meaning, phrase, category, learned_date) VALUES (?, ?, ?, ?, ?)",
+                (entry.get("word", ""), entry.get("meaning", ""), entry.get("phrase", ""),
+                 entry.get("category", "general"), entry.get("learned_date", created_at)),
+            )
+            # rowcount is 0 when a duplicate was ignored
+            counts["learned"] += cursor.rowcount
+
+        for entry in repository.load_history(mailed_file):
+            conn.execute(
+                "INSERT INTO mailed (word, meaning, phrase, media, category, mailed_date, sent_date) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (entry.get("word", ""), entry.get("meaning", ""), entry.get("phrase", ""),
+                 entry.get("media", ""), entry.get("category", ""),
+                 entry.get("mailed_date", created_at), entry.get("sent_date")),
+            )
+            counts["mailed"] += 1
+        conn.commit()
+    print(f"Migrated {counts['words']} words, {counts['learned']} learned and {counts['mailed']} mailed entries to {DB_PATH}")
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite vocabulary storage")
+    parser.add_argument("--migrate", action="store_true", help="Import level/learned/mailed JSON files")
+    parser.add_argument("--force", action="store_true", help="Clear the vocabulary tables before importing")
+    args = parser.parse_args()
+    if args.migrate:
+        migrate_from_json(force=args.force)
+    else:
+        for level in LEVEL_FILES:
+            print(f"level {level}: {count_words(level)}")
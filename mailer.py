@@ -28,11 +28,14 @@ Notes:
 import os
 import json
 import argparse
-import smtplib
-from email.message import EmailMessage
 from datetime import datetime, timezone
 from utils.json_manager import load_mailed_words
+from utils.vocab_repository import get_repository, normalize_word
 from database.subscriber_db import list_subscribers
+from utils.smtp_pool import get_smtp_pool
+from utils.mail_delivery import drain_outbox
+from utils.email_templates import render_daily_email
+from database.outbox_db import enqueue_messages, idempotency_key, list_outbox, count_by_status
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -60,47 +63,7 @@ def get_today_iso_date():
     return datetime.now().date().isoformat()
 
 
-def build_email_content(words):
-    # Build plain text and simple HTML
-    lines = []
-    html_lines = ["<html><body>", "<h2>Today's Mailed Words</h2>", "<ul>"]
-
-    for w in words:
-        print("Processing word for email content:", w)
-        word = w.get('word', '')
-        meaning = w.get('meaning', '')
-        phrase = w.get('phrase', '')
-        media = w.get('media', '')
-        
-        
-        lines.append(f"- {word} | {meaning} | {phrase} | {media}")
-        html_lines.append(f"<li><strong>{word}</strong> &mdash; {meaning}<br/><em>{phrase}</em><br/><em>{media}</em></li>")
-
-    html_lines.append("</ul>")
-    html_lines.append("</body></html>")
-
-    plain = "\n".join(lines)
-    html = "\n".join(html_lines)
-    return plain, html
-
-
-def send_email(smtp_server, smtp_port, smtp_user, smtp_pass, from_addr, to_addr, subject, plain, html):
-    msg = EmailMessage()
-    msg["Subject"] = subject
-    msg["From"] = from_addr
-    msg["To"] = to_addr
-    msg.set_content(plain)
-    msg.add_alternative(html, subtype="html")
-
-    # Connect and send
-    with smtplib.SMTP(smtp_server, smtp_port) as smtp:
-        smtp.starttls()
-        if smtp_user and smtp_pass:
-            smtp.login(smtp_user, smtp_pass)
-        smtp.send_message(msg)
-
-
-async def mail_trigger(words=None, to_addr = None):
+async def mail_trigger(words=None, to_addr = None, level=None):
     if to_addr is None:
         to_addr = MAIL_TO
     # 
@@ -140,8 +103,9 @@ async def mail_trigger(words=None, to_addr = None):
         print(f"No mailed words with mailed_date == {today}.")
         return {'status': 'no_matching_mailed_words'}
 
-    subject = f"Mailed words for {today}"
-    plain, html = build_email_content(matches)
+    # Rendered once per (level, date, words); recipients only get their own headers
+    email = render_daily_email(level, today, matches)
+    subject, plain, html = email.subject, email.plain, email.html
 
         # Validate SMTP config
     
@@ -150,44 +114,52 @@ async def mail_trigger(words=None, to_addr = None):
         return
 
     try:
-        send_email(smtp_server, smtp_port, smtp_user, smtp_pass, from_addr, to_addr, subject, plain, html)
-        print("Email sent successfully to", to_addr)
+        # One outbox row per subscriber: rerunning the same day's mail enqueues
+        # nothing new, and failed sends stay queued for a retry with backoff
+        if isinstance(to_addr, str):
+            to_addr = [to_addr]
+        headwords = [m.get('word', '') for m in matches]
+        enqueued = enqueue_messages([
+            {"email": recipient, "send_date": today, "words": headwords, "from_addr": from_addr,
+             "subject": subject, "plain_body": plain, "html_body": html, "template_key": email.key}
+            for recipient in dict.fromkeys(to_addr)
+        ])
+        print(f"Queued {enqueued} new of {len(set(to_addr))} messages in the outbox")
+        report = drain_outbox(pool=get_smtp_pool(smtp_server, smtp_port, smtp_user, smtp_pass))
+        for result in report["results"]:
+            if result["status"] != "sent":
+                print(f"Could not email {result['recipient']}: {result['status']} ({result['error']})")
+        print(f"Email sent to {report['sent']} of {len(report['results'])} recipients "
+              f"({report['per_second']:.1f} messages/s)")
+
+        # Count this mail's rows sent by this or an earlier run
+        keys = {idempotency_key(recipient, today, headwords) for recipient in to_addr}
+        sent = [m for m in list_outbox(today, "sent") if m.idempotency_key in keys]
+        outbox = count_by_status(today)
+        if not sent:
+            return {'status': 'failed_to_send_email', 'error': 'no recipient accepted the message',
+                    'deliveries': report["results"], 'outbox': outbox}
 
         # Mark entries as sent unless user disabled marking
         # if not args.no_mark:
         mailed_file = os.path.join(os.getcwd(), "mailed.json")
         try:
-            if os.path.exists(mailed_file):
-                with open(mailed_file, 'r', encoding='utf-8') as f:
-                    existing = json.load(f)
-            else:
-                existing = []
-
             now_iso = datetime.now().isoformat()
-            # Update matching entries by matching word and mailed_date (date portion)
-            updated = []
-            for item in existing:
-                item_md = item.get('mailed_date') or item.get('date') or ''
-                item_date = ''
-                try:
-                    item_date = datetime.fromisoformat(item_md).date().isoformat()
-                    print("Parsed mailed_date:", item_date)
-                except Exception:
-                    item_date = (item_md or '')[:-1]
-
-                # if this item's word and date are in the matches, set sent_date
-                matched = any((m.get('word','').lower() == item.get('word','').lower() and
-                                ((m.get('mailed_date') or m.get('date') or '')[:-1] == (item_md or '')[:-1])) for m in matches)
-                if matched:
-                    item['sent_date'] = now_iso
-                updated.append(item)
-
-            # Save back
-            with open(mailed_file, 'w', encoding='utf-8') as f:
-                json.dump(updated, f, ensure_ascii=False, indent=2)
-            print("Marked mailed entries as sent in mailed.json")
-            return {'status': 'emailed_and_marked_sent', 'mailed_words': matches}
-            
+            # One targeted update per (word, mailed_date): the store finds the
+            # entries through its word index and journals the batch in one
+            # append, under its write lock, instead of rewriting the history
+            records = {}
+            for m in matches:
+                field = 'mailed_date' if m.get('mailed_date') else 'date'
+                records[(normalize_word(m.get('word', '')), field, m.get(field))] = {
+                    'op': 'update', 'word': m.get('word', ''),
+                    'match': {field: m.get(field)}, 'fields': {'sent_date': now_iso},
+                }
+            applied = get_repository().apply_many(mailed_file, list(records.values()), empty=list)
+            print(f"Marked {len(applied)} mailed entries as sent in mailed.json")
+            return {'status': 'emailed_and_marked_sent', 'mailed_words': matches,
+                    'deliveries': report["results"], 'outbox': outbox}
+
         except Exception as e:
             print("Warning: could not mark mailed entries as sent:", e)
 
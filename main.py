@@ -1,5 +1,6 @@
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Request, Response, Query, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 import uvicorn
 import json
 import pydantic
@@ -11,11 +12,13 @@ import os
 os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "gemini-chat-414606-505058a474c0.json"
 import random
 import asyncio
+import datetime
 random.seed(42)
 from utils.word_functions import (
     load_word_pools, 
     create_audio_file,  
     cleanup_audio_file,
+    create_audio_clip,
     DEFAULT_CATEGORIES,
     DEFAULT_VOCABULARY_FILE
 )
@@ -23,14 +26,15 @@ from utils.word_functions import (
 from utils.json_manager import (
     delete_word_from_json,
     load_vocabulary_with_expressions,
-    load_vocabulary_from_file,
     load_learned_words,
-    save_word_pools_to_file,
     save_learned_words_to_file,
     save_to_learned,
     filter_words_by_category,
     delete_word_from_file,
+    fuzzy_lookup,
+    get_level_statistics,
 )
+from utils.bulk_export import iter_export_chunks, CONTENT_TYPES
 from word_widget import create_word_widget, get_difficulty
 
 # Function to create media directory
@@ -74,5 +78,62 @@ async def root():
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/fuzzy")
+async def fuzzy_word_lookup(
+    q: str = Query(..., min_length=1, description="Possibly misspelled word"),
+    max_distance: int = Query(2, ge=0, le=3),
+    limit: int = Query(5, ge=1, le=50),
+):
+    """Did-you-mean candidates within max_distance edits, from every level, learned and mailed"""
+    candidates = fuzzy_lookup(q, max_distance=max_distance, limit=limit)
+    return {
+        "query": q,
+        "candidates": [
+            {
+                "word": word,
+                "distance": distance,
+                "locations": [{"level": level, "category": category} for level, category in locations],
+            }
+            for word, distance, locations in candidates
+        ],
+    }
+
+@app.get("/stats")
+async def word_statistics():
+    """Word counts per level and category (learned and mailed included)"""
+    return {str(level): level_stats for level, level_stats in get_level_statistics().items()}
+
+@app.get("/audio")
+async def speak(
+    text: str = Query(..., min_length=1, max_length=500),
+    speed: str = Query("normal", pattern="^(normal|0\\.9|0\\.8)$"),
+    phrase: bool = False,
+):
+    """Synthesized speech for a word or phrase, served from memory (and the audio cache)"""
+    audio_data, audio_format = await create_audio_clip(text, is_phrase=phrase, speed=speed)
+    if audio_data is None:
+        raise HTTPException(status_code=503, detail="Audio generation failed")
+    return Response(content=audio_data, media_type=audio_format)
+
+@app.get("/export")
+def export_words(
+    format: str = Query("csv", pattern="^(csv|xlsx|jsonl)$"),
+    level: list[str] | None = Query(None, description="1, 2, 3, learned or mailed (repeatable)"),
+    category: list[str] | None = Query(None),
+    date_from: datetime.date | None = None,
+    date_to: datetime.date | None = None,
+):
+    """Stream words as CSV, XLSX or JSONL, filtered by level, category and learned/mailed date"""
+    try:
+        chunks = iter_export_chunks(format, levels=level, categories=category,
+                                    date_from=date_from, date_to=date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    filename = f"vocabulary_export.{format}"
+    return StreamingResponse(chunks, media_type=CONTENT_TYPES[format],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
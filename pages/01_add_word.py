@@ -1,15 +1,26 @@
 import streamlit as st 
 from utils.word_functions import DEFAULT_CATEGORIES
 from utils.word_functions import DIFFICULTY_LEVELS
+from utils.json_manager import (
+    add_words_to_json,
+    update_word_fields,
+    suggest_words,
+    find_word_locations,
+    format_word_location,
+)
 import json
 import os
 
-def add_word_to_json(word_entry):
+def add_word_to_json(word_entry, allow_duplicate=False):
     """
     Add a new word entry to the vocabulary storage.
     
     Args:
         word_entry (dict): Dictionary with word details
+        allow_duplicate (bool): Add even if the word already exists somewhere
+        
+    Returns:
+        bool: True if the word was added
     """
     category = word_entry.get("category", "general")
     difficulty_level = word_entry.get("difficulty", 1)
@@ -33,20 +44,11 @@ def add_word_to_json(word_entry):
         json_file = "level3.json"
     else:
         st.error("Invalid difficulty level.")
-        return
+        return False
 
-    with open(json_file, 'r+', encoding='utf-8') as f:
-        data = json.load(f)
-        category = word_entry.get("category", "general")
-        if category not in data:
-            data[category] = []
-
-        data[category].append(new_word_entry)
-        
-        # Write the updated data back to the JSON file
-        f.seek(0)
-        json.dump(data, f, ensure_ascii=False, indent=2)
-        f.truncate()
+    # Locked append to the latest version of the level file (skipped for duplicates)
+    return add_words_to_json(new_word_entry, json_file=json_file, category=category,
+                             allow_duplicate=allow_duplicate)
 
 def update_word_in_json(word_entry, original_file):
     """
@@ -64,32 +66,16 @@ def update_word_in_json(word_entry, original_file):
     media = word_entry.get("media", "")
     
     try:
-        with open(original_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Find and update the word in the appropriate category
-        word_found = False
-        for cat in data:
-            if isinstance(data[cat], list):
-                for i, entry in enumerate(data[cat]):
-                    if entry.get('word', '').lower() == word.lower():
-                        # Update the entry
-                        data[cat][i] = {
-                            "word": word,
-                            "meaning": meaning,
-                            "expressions": expressions,
-                            "phrase": phrase,
-                            "media": media,
-                        }
-                        word_found = True
-                        break
-            if word_found:
-                break
+        # Locked point update of the word; other words edited concurrently are kept
+        word_found = update_word_fields(word, {
+            "word": word,
+            "meaning": meaning,
+            "expressions": expressions,
+            "phrase": phrase,
+            "media": media,
+        }, original_file)
         
         if word_found:
-            # Write the updated data back to the JSON file
-            with open(original_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
             return True
         else:
             st.error(f"Word '{word}' not found in {original_file}")
@@ -149,6 +135,15 @@ print(media)
 
 # Pre-fill fields if in edit mode
 word = st.text_input("Word", value=edit_data.get('word', ''), disabled=edit_mode)
+if word and not edit_mode:
+    existing = find_word_locations(word)
+    if existing:
+        st.warning(f"⚠️ '{word}' already exists in: " + ", ".join(format_word_location(loc) for loc in existing))
+        st.checkbox("Add anyway", key="allow_duplicate_word")
+    suggestions = [(text, locations) for text, locations in suggest_words(word) if text.lower() != word.strip().lower()]
+    if suggestions:
+        st.caption("Similar words: " + ", ".join(
+            f"{text} ({format_word_location(locations[0])})" for text, locations in suggestions))
 meaning = st.text_input("Meaning", value=edit_data.get('meaning', ''))
 expressions_default = '\n'.join(edit_data.get('expressions', [])) if edit_mode else ''
 expressions = st.text_area("Expressions (one per line)", value=expressions_default, height=100).split("\n")
@@ -183,8 +178,10 @@ if st.button(button_label, key=button_key):
             st.switch_page("app.py")
     else:
         # Add new word
-        add_word_to_json(word_entry)
-        st.success(f"✅ Word '{word}' added to category '{category}' at level{difficulty_level}.json")
+        if add_word_to_json(word_entry, allow_duplicate=st.session_state.get("allow_duplicate_word", False)):
+            st.success(f"✅ Word '{word}' added to category '{category}' at level{difficulty_level}.json")
+        else:
+            st.error(f"❌ '{word}' was not added: it already exists (tick 'Add anyway' to add it again)")
 
 # Cancel button for edit mode
 if edit_mode:
@@ -0,0 +1,55 @@
+import streamlit as st
+from utils.word_functions import DEFAULT_CATEGORIES
+from utils.word_functions import DIFFICULTY_LEVELS
+from utils.bulk_import import import_words, MAX_REPORTED_ERRORS
+
+st.title("📥 Bulk Import Words")
+st.markdown(
+    "Upload a **CSV** or **XLSX** file with a header row. "
+    "Required columns: `word`, `meaning`. Optional: `phrase`, `category`, `level`, "
+    "`expressions` (separated by `;`), `media`."
+)
+
+st.sidebar.subheader("Defaults for rows without a value:")
+default_level = st.sidebar.radio("Difficulty Level:", DIFFICULTY_LEVELS, key="bulk_level_radio", horizontal=True)
+default_category = st.sidebar.radio(
+    "Word Category:", DEFAULT_CATEGORIES, key="bulk_category_radio", horizontal=True
+).lower()
+
+uploaded_file = st.file_uploader("Vocabulary file", type=["csv", "xlsx"])
+dry_run = st.checkbox("Dry run (validate and check duplicates only)", value=True)
+
+if uploaded_file and st.button("📥 Import", key="bulk_import_button"):
+    progress_text = st.empty()
+    with st.spinner("Importing..."):
+        try:
+            report = import_words(
+                uploaded_file,
+                name=uploaded_file.name,
+                default_level=default_level,
+                default_category=default_category,
+                dry_run=dry_run,
+                progress=lambda rows: progress_text.text(f"{rows} rows read..."),
+            )
+        except (ValueError, ImportError) as e:
+            st.error(f"❌ Import failed: {e}")
+            report = None
+
+    if report:
+        progress_text.empty()
+        imported = sum(report["imported"].values())
+        verb = "Would import" if report["dry_run"] else "Imported"
+        st.success(f"✅ {verb} {imported} of {report['rows']} rows")
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Level 1", report["imported"][1])
+        col2.metric("Level 2", report["imported"][2])
+        col3.metric("Level 3", report["imported"][3])
+        col4.metric("Rows/s", f"{report['rows_per_second']:.0f}")
+
+        if report["duplicates"] or report["invalid"]:
+            st.warning(f"Skipped {report['duplicates']} duplicates and {report['invalid']} invalid rows")
+            shown = f" (first {MAX_REPORTED_ERRORS})" if len(report["errors"]) >= MAX_REPORTED_ERRORS else ""
+            with st.expander(f"Skipped rows{shown}"):
+                for row_number, message in report["errors"]:
+                    st.text(f"Row {row_number}: {message}")
@@ -8,7 +8,7 @@ import json
 from pathlib import Path
 from gtts import gTTS
 import pyttsx3
-from utils.word_functions import create_audio_file
+from utils.word_functions import create_audio_clip
 # Try to use user's videoplay helper if present
 external_play_video = None
 
@@ -35,17 +35,17 @@ import json
 
 
 async def generate_audio():
-        audio_file = await create_audio_file(input_text, "temp_audio.mp3")
-        if audio_file:
-            st.success("Audio file created successfully!")
-            return audio_file
+        audio_data, audio_format = await create_audio_clip(input_text)
+        if audio_data:
+            st.success("Audio created successfully!")
+            return audio_data, audio_format
         else:
             st.error("Failed to create audio file.")
-            return None
+            return None, None
 st.title("Audio Handler Module")
 st.write("This module handles text-to-speech audio generation for multiple languages.")
 input_text = st.text_area("Enter text for TTS:", "Hello, world!")
 if st.button("Generate Audio"):
-    audio_file = asyncio.run(generate_audio())
-    if audio_file:
-        st.audio(audio_file, format="audio/mp3")
+    audio_data, audio_format = asyncio.run(generate_audio())
+    if audio_data:
+        st.audio(audio_data, format=audio_format)
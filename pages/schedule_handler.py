@@ -23,8 +23,7 @@ load_dotenv()
 
 from utils.word_functions import (
     load_word_pools, 
-    create_audio_file, 
-    cleanup_audio_file,
+    create_audio_clip,
     DEFAULT_CATEGORIES,
     DEFAULT_VOCABULARY_FILE,
     DIFFICULTY_LEVELS,
@@ -36,9 +35,7 @@ from utils.word_functions import (
 from utils.json_manager import (
     delete_word_from_json,
     load_vocabulary_with_expressions,
-    load_vocabulary_from_file,
     load_learned_words,
-    save_word_pools_to_file,
     save_learned_words_to_file,
     save_to_learned,
     save_to_mailed,
@@ -47,6 +44,8 @@ from utils.json_manager import (
     get_category_statistics,
     filter_words_by_category,
     delete_word_from_file,
+    move_words,
+    move_back_to_vocabulary,
 )
 from word_widget import create_word_widget, get_difficulty
 
@@ -88,7 +87,7 @@ elif selected == "Select Vocabulary":
     st.sidebar.markdown("### Audio Settings")
     selected_speed = st.sidebar.radio("Select Audio Speed", SPEED_OPTIONS, format_func=lambda x: SPEED_LABELS.get(x, x))
     st.info(f"🎯 **Current Level: {current_level}** ")
-    word_file = DEFAULT_VOCABULARY_FILE
+    word_file = file_path
     category_list = DEFAULT_CATEGORIES
     if current_level in ["mailed", "learned"]:
         if current_level == "mailed":
@@ -100,10 +99,6 @@ elif selected == "Select Vocabulary":
             print(words)
             # word_file = "learned.json"
         if words:
-            # Convert learned words to the standard vocabulary format and save to the working file
-            with open(word_file, "w", encoding='utf-8') as f:
-                for word_entry in words:
-                    f.write(f"{word_entry['word']} | {word_entry['meaning']} | {word_entry['phrase']} | {word_entry.get('category', 'General')}\n")
             st.success(f"✅ Successfully loaded {len(words)} {current_level} words!")
             # st.info("Navigate to other sections to review your learned vocabulary.")
         else:
@@ -120,14 +115,6 @@ elif selected == "Select Vocabulary":
     word_pools = load_word_pools(current_level)
     #   print(f"level: {level}\n  length of word_pools: {len(word_pools)}")
     if word_pools:
-        success = save_word_pools_to_file(word_pools, word_file)    
-        if success:
-            # Convert learned words to the standard vocabulary format and save to the working file
-            with open(word_file, "w", encoding='utf-8') as f:
-                for category, words in word_pools.items():
-                    for word_entry in words:
-                        # print(word_entry)
-                        f.write(f"{word_entry['word']} | {word_entry['meaning']} | {word_entry['phrase']} | {category}\n")   
         st.success(f"✅ Successfully loaded {len(word_pools)}words from level_{current_level}!")
         
         # Display the loaded words in the Streamlit app
@@ -151,25 +138,17 @@ elif selected == "Select Vocabulary":
                     random_num = random.randint(0, 300)
                     random_num = random.randint(0, random_num)
                     if st.button(f"🔊 Word", key=f"word_{entry['word']}_{random_num}"):
-                        audio_file = asyncio.run(create_audio_file(entry['word'], f"word_{entry['word']}", is_phrase=False, speed=selected_speed))
-                        print(f"Generated audio file for word: {audio_file}")
-                        if audio_file and os.path.exists(audio_file):
-                            with open(audio_file, 'rb') as audio:
-                                # Detect audio format based on file extension
-                                audio_format = 'audio/mp3' if audio_file.endswith('.mp3') else 'audio/wav'
-                                st.audio(audio.read(), format=audio_format)
-                            cleanup_audio_file(audio_file)
+                        # Played straight from memory; the audio cache persists it in the background
+                        audio_data, audio_format = asyncio.run(create_audio_clip(entry['word'], is_phrase=False, speed=selected_speed))
+                        if audio_data:
+                            st.audio(audio_data, format=audio_format)
                         else:
                             st.error("Audio generation failed")
                     random_num = random.randint(0, 300)
                     if entry['phrase'] and st.button(f"🔊 Phrase", key=f"phrase_{entry['word']}_{random_num}"):
-                        audio_file = asyncio.run(create_audio_file(entry['phrase'], f"phrase_{entry['word']}", is_phrase=True, speed=selected_speed))
-                        if audio_file and os.path.exists(audio_file):
-                            with open(audio_file, 'rb') as audio:
-                                # Detect audio format based on file extension
-                                audio_format = 'audio/mp3' if audio_file.endswith('.mp3') else 'audio/wav'
-                                st.audio(audio.read(), format=audio_format)
-                            cleanup_audio_file(audio_file)
+                        audio_data, audio_format = asyncio.run(create_audio_clip(entry['phrase'], is_phrase=True, speed=selected_speed))
+                        if audio_data:
+                            st.audio(audio_data, format=audio_format)
                         else:
                             st.error("Audio generation failed")
                     
@@ -180,18 +159,9 @@ elif selected == "Select Vocabulary":
                     if current_level in ["mailed","learned"]:
                         # Move back to vocabulary button for learned words
                         if st.button(f"↩️ Move Back", key=f"moveback_{entry['word']}", help="Move back to main vocabulary"):
-                            # Add word back to main vocabulary file
-                            with open(word_file, "a", encoding='utf-8') as f:
-                                f.write(f"{entry['word']} | {entry['meaning']} | {entry['phrase']} | {entry['category']}\n")
-                            if current_level == "mailed":
-                                # Remove from mailed.json
-                                mailed_words = load_mailed_words()
-                                updated_mailed = [w for w in mailed_words if w['word'].lower() != entry['word'].lower()]
-                                save_mailed_words_to_file(updated_mailed)
-                            # Remove from learned.json
-                            learned_words = load_learned_words()
-                            updated_learned = [w for w in learned_words if w['word'].lower() != entry['word'].lower()]
-                            save_learned_words_to_file(updated_learned)
+                            # Back into the level files (mailed words also leave learned.json)
+                            history_files = ["mailed.json", "learned.json"] if current_level == "mailed" else ["learned.json"]
+                            move_back_to_vocabulary(entry['word'], history_files)
                             
                             st.success(f"'{entry['word']}' moved back to main vocabulary!")
                             st.rerun()  # Refresh the page to update the list
@@ -202,9 +172,9 @@ elif selected == "Select Vocabulary":
                             word_file = "level" + str(current_level) + ".json"
                             random_num = random.randint(0, 300)
                             if st.button(f"✅ Learned", key=f"learned_{entry['word']}_{random_num}", help="Move to learned words"):
-                                success = save_to_learned(entry)
+                                # One read/write per store instead of save + delete
+                                success = move_words(word_file, "learned.json", [entry['word']])
                                 if success:
-                                    delete_word_from_file(entry['word'], word_file)
                                     st.success(f"'{entry['word']}' moved to learned words!")
                                     st.rerun()  # Refresh the page to update the list
                                     
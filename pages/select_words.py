@@ -23,12 +23,11 @@ from utils.word_functions import (
 from utils.json_manager import (
     delete_word_from_json,
     load_vocabulary_with_expressions,
-    load_vocabulary_from_file,
     load_learned_words,
-    save_word_pools_to_file,
     save_learned_words_to_file,
     save_to_learned,
     save_to_mailed,
+    save_many_to_mailed,
     save_mailed_words_to_file,
     load_mailed_words,
     get_category_statistics,
@@ -97,11 +96,10 @@ def display_selected_words(selected_words):
     return
                 
 def save_selected_words(selected_words):
-    for entry in selected_words:
-        # Save selected words to mailed.json and learned.json
-        save_to_mailed(entry)   
+    # Save all selected words to mailed.json in a single write
+    added = save_many_to_mailed(selected_words)
     
-    print(f"Saved {len(selected_words)} words to mailed.json")
+    print(f"Saved {added} of {len(selected_words)} words to mailed.json")
     return {'status': 'saved'}
 
 if 'starting_seq_no' not in st.session_state:
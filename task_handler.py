@@ -13,6 +13,7 @@ import random
 import os
 import json
 import asyncio
+from datetime import date, datetime, timedelta
 
 from utils.word_functions import (
     load_word_pools, 
@@ -35,6 +36,13 @@ from word_widget import create_word_widget, get_difficulty
 from utils.json_manager import load_mailed_words
 
 from mailer import mail_trigger
+from utils.smtp_pool import close_smtp_pools
+from utils.mail_delivery import drain_outbox
+from database.outbox_db import count_by_status
+
+# How long the run keeps waiting for retries of failed sends before leaving
+# them queued for the next run (the scheduler is blocked meanwhile)
+OUTBOX_DRAIN_SECONDS = int(os.getenv('OUTBOX_DRAIN_SECONDS', 120))
 # Remove Streamlit-dependent import to avoid context errors
 # from pages.select_words import select_words_from_vocabulary
 
@@ -62,6 +70,16 @@ from database.subscriber_db import (
     list_subscribers,
     Subscriber,
 )
+def load_todays_selection(file_name):
+    """Words selected earlier today for a level (empty if none or from another day)"""
+    if not os.path.exists(file_name):
+        return []
+    words = load_mailed_words(file_name)
+    today = date.today().isoformat()
+    if words and all((w.get('mailed_date') or '')[:10] == today for w in words):
+        return words
+    return []
+
 def display_vocabulary(vocab_file):
     with open(vocab_file, 'r', encoding='utf-8') as f:
         vocab = json.load(f) 
@@ -201,13 +219,20 @@ def mailer_task_handler():
         if to_addr and len(to_addr) > 0:
             print(f"Preparing to send emails to Level {level} subscribers: {to_addr}")
             # st.subheader(f"words for Level {level} - {LEVEL_DESCRIPTIONS.get(level, '')}")
-            selected_words_for_level = select_words_from_vocabulary_standalone(number_of_words=2, selection_method="random", current_level=level)
-            # words = load_mailed_words(selected_words_for_level)    
-            file_name = f"selected_level{level}.json"        
-            result = save_mailed_words_to_file(selected_words_for_level, mailed_file=file_name)
+            file_name = f"selected_level{level}.json"
+            # A rerun on the same day mails the same words, so the outbox
+            # recognizes the messages that were already sent
+            selected_words_for_level = load_todays_selection(file_name)
+            if selected_words_for_level:
+                print(f"Reusing today's selection from {file_name}")
+                result = True
+            else:
+                selected_words_for_level = select_words_from_vocabulary_standalone(number_of_words=2, selection_method="random", current_level=level)
+                # words = load_mailed_words(selected_words_for_level)    
+                result = save_mailed_words_to_file(selected_words_for_level, mailed_file=file_name)
             if result:
                 words = load_mailed_words(file_name)
-                result = asyncio.run(mail_trigger(words=words, to_addr=to_addr))
+                result = asyncio.run(mail_trigger(words=words, to_addr=to_addr, level=level))
                 print(f"✅ Successfully processed {len(selected_words_for_level)} words for Level {level}")
                 # Display selected words in console format
                 for i, word_entry in enumerate(selected_words_for_level, 1):
@@ -216,6 +241,16 @@ def mailer_task_handler():
                 
         else:
             print(f"No subscribers found for Level {level}. Skipping email sending.")
+
+    # Retry failed sends (with backoff) for a while before giving up on this
+    # run; whatever is still pending goes out on the next run
+    deadline = datetime.now() + timedelta(seconds=OUTBOX_DRAIN_SECONDS)
+    report = drain_outbox(deadline=deadline)
+    print(f"Outbox retries: {report['sent']} sent, {report['failed']} failed, {report['refused']} refused")
+    print(f"Outbox today: {count_by_status(date.today().isoformat())}")
+
+    # The SMTP sessions were shared by all levels; log out once at the end
+    close_smtp_pools()
             
 mailer_task_handler()
                         
@@ -0,0 +1,290 @@
+"""
+Content-addressed cache for synthesized audio
+
+Every synthesized clip is stored under ``audio/cache/<sha256>.<ext>``, where
+the hash covers everything that changes the sound: text, language, speed,
+word-or-phrase rate, engine and voice.  A repeat play is then a file read
+instead of a multi-second synthesis, and different speeds or engines never
+overwrite each other.
+
+The cache is bounded by ``AUDIO_CACHE_MAX_BYTES`` (default 200 MB) and evicts
+least recently used files first.  Recency is kept in memory and persisted as
+the file mtime (touched on every hit), so it survives restarts and is shared
+well enough between the Streamlit, API and cron processes.  Hit, miss and
+eviction counters are available from ``stats()``.
+
+Clips synthesized in memory can be handed to the player right away and
+persisted by a background writer thread (``store_async``); until that write
+lands, ``read`` serves them from memory.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", os.path.join("audio", "cache"))
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+
+
+def audio_cache_key(text, language, speed, engine, voice="default", is_phrase=False):
+    """
+    Return the cache key for one synthesis request.
+
+    Args:
+        text (str): Text to speak
+        language (str): Language code, e.g. "en"
+        speed (str): Speed setting ("normal", "0.9", "0.8")
+        engine (str): TTS engine, e.g. "pyttsx3" or "gtts"
+        voice (str): Voice identifier or preference for the engine
+        is_phrase (bool): Phrases are spoken at a slower base rate than words
+
+    Returns:
+        str: Hex SHA-256 of the parameters
+    """
+    payload = json.dumps([text, language, str(speed), engine, voice, bool(is_phrase)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """Size-bounded LRU cache of audio files addressed by audio_cache_key"""
+
+    def __init__(self, directory=AUDIO_CACHE_DIR, max_bytes=AUDIO_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # file name -> size, least recently used first
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pending = {}      # file name -> (data, Future) for background writes
+        self._writer = None
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """Load the files already on disk, oldest mtime first"""
+        files = []
+        for name in os.listdir(self.directory):
+            if name.startswith(".tmp-"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, name, st.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total_bytes += size
+
+    def path_for(self, key, extension):
+        return os.path.join(self.directory, f"{key}.{extension.lstrip('.')}")
+
+    def owns(self, path):
+        """True if ``path`` is a file inside the cache directory"""
+        if not path:
+            return False
+        directory = os.path.abspath(self.directory)
+        return os.path.dirname(os.path.abspath(path)) == directory
+
+    def get(self, key, extension):
+        """
+        Return the cached file for ``key``, or None on a miss.
+
+        A hit marks the file as most recently used.
+        """
+        path = self.path_for(key, extension)
+        name = os.path.basename(path)
+        try:
+            # Touch for cross-process recency; fails if another process evicted it
+            os.utime(path)
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+                size = self._entries.pop(name, None)
+                if size is not None:
+                    self._total_bytes -= size
+            return None
+        with self._lock:
+            self.hits += 1
+            previous = self._entries.pop(name, None)
+            self._total_bytes += size - (previous or 0)
+            self._entries[name] = size
+        return path
+
+    def lookup(self, candidates):
+        """
+        Return the first cached file among (key, extension) candidates.
+
+        Counts one hit or one miss for the whole lookup.
+        """
+        for key, extension in candidates:
+            path = self.path_for(key, extension)
+            if os.path.exists(path):
+                return self.get(key, extension)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def peek(self, candidates):
+        """Like lookup, but without counting or touching anything"""
+        for key, extension in candidates:
+            path = self.path_for(key, extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def put(self, key, extension, source_path, move=True):
+        """
+        Store ``source_path`` under ``key`` and return the cached path.
+
+        The file is moved (or copied) into a temporary name and renamed into
+        place, so readers never see a partial file.  Least recently used
+        files are evicted until the cache fits ``max_bytes``.
+        """
+        path = self.path_for(key, extension)
+        tmp_path = self._temp_path(key, extension)
+        if move:
+            try:
+                os.replace(source_path, tmp_path)
+            except OSError:
+                # Different filesystem (e.g. a tmpfs /tmp): copy instead
+                shutil.copyfile(source_path, tmp_path)
+                os.remove(source_path)
+        else:
+            shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, path)
+        return self._admit(path)
+
+    def put_bytes(self, key, extension, data):
+        """Store in-memory audio under ``key`` and return the cached path"""
+        path = self.path_for(key, extension)
+        tmp_path = self._temp_path(key, extension)
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self._admit(path)
+
+    def store_async(self, key, extension, data):
+        """
+        Persist in-memory audio on the background writer thread.
+
+        Until the write finishes, read() serves the clip from memory and
+        pending_write() returns the Future of its cached path.
+        """
+        name = os.path.basename(self.path_for(key, extension))
+        with self._lock:
+            pending = self._pending.get(name)
+            if pending is not None:
+                return pending[1]
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-cache-writer")
+            future = self._writer.submit(self.put_bytes, key, extension, data)
+            self._pending[name] = (data, future)
+        future.add_done_callback(lambda _: self._pending_done(name))
+        return future
+
+    def _pending_done(self, name):
+        with self._lock:
+            self._pending.pop(name, None)
+
+    def pending_write(self, key, extension):
+        """Future of a background write for ``key``, or None"""
+        with self._lock:
+            pending = self._pending.get(os.path.basename(self.path_for(key, extension)))
+        return pending[1] if pending else None
+
+    def read(self, candidates):
+        """
+        Return (data, extension, key) for the first cached candidate, or None.
+
+        Clips still being written in the background are served from memory.
+        Counts one hit or one miss, like lookup().
+        """
+        for key, extension in candidates:
+            with self._lock:
+                pending = self._pending.get(os.path.basename(self.path_for(key, extension)))
+                if pending is not None:
+                    self.hits += 1
+                    return pending[0], extension, key
+            path = self.path_for(key, extension)
+            if not os.path.exists(path):
+                continue
+            path = self.get(key, extension)
+            if path is None:
+                # Evicted meanwhile; get() already counted the miss
+                return None
+            try:
+                with open(path, "rb") as f:
+                    return f.read(), extension, key
+            except FileNotFoundError:
+                return None
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _temp_path(self, key, extension):
+        # Unique across threads and processes writing the same key
+        fd, tmp_path = tempfile.mkstemp(prefix=f".tmp-{key}-", suffix=f".{extension}", dir=self.directory)
+        os.close(fd)
+        return tmp_path
+
+    def _admit(self, path):
+        """Account for a file that just landed in the cache and evict to fit"""
+        size = os.path.getsize(path)
+        name = os.path.basename(path)
+        with self._lock:
+            previous = self._entries.pop(name, None)
+            self._total_bytes += size - (previous or 0)
+            self._entries[name] = size
+            victims = []
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                victim, victim_size = self._entries.popitem(last=False)
+                self._total_bytes -= victim_size
+                self.evictions += 1
+                victims.append(victim)
+        for victim in victims:
+            try:
+                os.remove(os.path.join(self.directory, victim))
+            except FileNotFoundError:
+                pass
+        return path
+
+    def stats(self):
+        """Return hit/miss/eviction counters and the current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "files": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache():
+    """Return the process-wide AudioCache"""
+    global _audio_cache
+    if _audio_cache is None:
+        with _audio_cache_lock:
+            if _audio_cache is None:
+                _audio_cache = AudioCache()
+    return _audio_cache
@@ -0,0 +1,130 @@
+"""
+Pitch-preserving time-stretch for cached WAV clips
+
+Slower speed variants are derived from the normal-speed rendering instead of
+being synthesized again.  The stretch uses WSOLA (waveform-similarity
+overlap-add): Hann-windowed frames are taken from the input at ``speed``
+times the output hop and overlap-added, and each frame's exact position is
+nudged within a small tolerance to the offset that best continues the
+previous frame (a cross-correlation search, vectorized with numpy).  The
+result is longer but keeps its pitch, unlike resampling.
+
+numpy is optional: without it ``available()`` is False and callers keep
+synthesizing each speed directly.  Only PCM WAV (pyttsx3 output) is handled;
+decoding MP3 would need an extra codec dependency.
+"""
+
+import wave
+
+try:
+    import numpy as np
+except ImportError:  # speed variants are then synthesized directly
+    np = None
+
+# Frame length in samples at 22.05 kHz (about 46 ms); scaled with the sample rate
+BASE_FRAME_LENGTH = 1024
+BASE_SAMPLE_RATE = 22050
+
+_SAMPLE_TYPES = {1: "u1", 2: "<i2", 4: "<i4"}
+
+
+def available():
+    """True if numpy is installed and stretching can be used"""
+    return np is not None
+
+
+def time_stretch(samples, speed, frame_length=BASE_FRAME_LENGTH):
+    """
+    Change the duration of a signal by 1/speed without changing its pitch.
+
+    Args:
+        samples (ndarray): Float samples, shape (n,) or (n, channels)
+        speed (float): Playback speed, e.g. 0.8 for 25% longer output
+        frame_length (int): Analysis frame length in samples
+
+    Returns:
+        ndarray: Stretched float samples with the same number of channels
+    """
+    if np is None:
+        raise ImportError("numpy is required for time stretching (pip install numpy)")
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+    signal = samples if samples.ndim == 2 else samples[:, None]
+    length = len(signal)
+    if speed == 1.0 or length == 0:
+        return samples.copy()
+
+    n = frame_length
+    synthesis_hop = n // 2
+    analysis_hop = synthesis_hop * speed
+    tolerance = synthesis_hop // 2
+    # Periodic Hann windows at 50% overlap sum to one
+    window = np.hanning(n + 1)[:n]
+
+    target_length = int(round(length / speed))
+    frames = (target_length + n) // synthesis_hop + 2
+    lead = n + tolerance
+    tail = int(frames * analysis_hop) + 2 * n + tolerance - length
+    padded = np.pad(signal, ((lead, max(tail, lead)), (0, 0)))
+    # Similarity is measured on the mono mix
+    mono = padded.mean(axis=1)
+
+    output = np.zeros((frames * synthesis_hop + n, signal.shape[1]))
+    weight = np.zeros(len(output))
+    position = lead - synthesis_hop
+    for k in range(frames):
+        nominal = lead - synthesis_hop + int(round(k * analysis_hop))
+        if k:
+            # Best continuation of the previous frame within +-tolerance
+            natural = mono[position + synthesis_hop:position + synthesis_hop + n]
+            region = mono[nominal - tolerance:nominal + tolerance + n]
+            position = nominal - tolerance + int(np.argmax(np.correlate(region, natural, mode="valid")))
+        else:
+            position = nominal
+        start = k * synthesis_hop
+        output[start:start + n] += padded[position:position + n] * window[:, None]
+        weight[start:start + n] += window
+
+    output /= np.maximum(weight, 1e-3)[:, None]
+    output = output[synthesis_hop:synthesis_hop + target_length]
+    return output if samples.ndim == 2 else output[:, 0]
+
+
+def stretch_wav(source_path, target_path, speed):
+    """
+    Write a time-stretched copy of a PCM WAV file (or in-memory WAV data).
+
+    Args:
+        source_path: Input .wav path or binary file object
+        target_path: Output .wav path or binary file object (same format as the input)
+        speed (float): Playback speed, e.g. 0.9
+
+    Returns:
+        ``target_path``
+    """
+    with wave.open(source_path, "rb") as reader:
+        params = reader.getparams()
+        frames = reader.readframes(params.nframes)
+    if params.sampwidth not in _SAMPLE_TYPES:
+        raise ValueError(f"Unsupported WAV sample width: {params.sampwidth}")
+
+    raw = np.frombuffer(frames, dtype=_SAMPLE_TYPES[params.sampwidth]).astype(np.float64)
+    if params.sampwidth == 1:
+        raw -= 128.0
+    samples = raw.reshape(-1, params.nchannels)
+
+    frame_length = max(256, int(BASE_FRAME_LENGTH * params.framerate / BASE_SAMPLE_RATE) // 2 * 2)
+    stretched = time_stretch(samples, speed, frame_length)
+
+    limit = 2 ** (8 * params.sampwidth - 1)
+    stretched = np.clip(np.round(stretched), -limit, limit - 1)
+    if params.sampwidth == 1:
+        stretched += 128.0
+    data = stretched.astype(_SAMPLE_TYPES[params.sampwidth]).tobytes()
+
+    with wave.open(target_path, "wb") as writer:
+        writer.setnchannels(params.nchannels)
+        writer.setsampwidth(params.sampwidth)
+        writer.setframerate(params.framerate)
+        writer.writeframes(data)
+    return target_path
@@ -0,0 +1,151 @@
+"""
+BK-tree over headwords for misspelling-tolerant lookups
+
+A BK-tree stores each word under its parent at edge label d(parent, word),
+where d is the Levenshtein distance.  By the triangle inequality a query for
+words within distance k of q only has to descend into children whose edge
+label lies in [d(node, q) - k, d(node, q) + k], so a "did you mean" lookup
+with k <= 2 computes a small fraction of the distances a full scan would.
+
+Deleting from a BK-tree would mean re-inserting a whole subtree, so removed
+words are left in place as tombstones and skipped by lookups; the tree is
+rebuilt from the live words once tombstones outnumber them.
+"""
+
+
+def levenshtein(a, b, max_distance=None):
+    """
+    Edit distance (insertions, deletions, substitutions) between two strings.
+
+    Uses Myers' bit-parallel algorithm: one pass over ``b`` with a handful of
+    integer operations per character, whatever the length of ``a``.
+
+    Args:
+        a, b (str): Strings to compare
+        max_distance (int): If given, stop early and return max_distance + 1
+            as soon as the distance is known to exceed it
+
+    Returns:
+        int: The distance (or max_distance + 1 when cut off)
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    if not b:
+        return len(a)
+
+    # Bit i of masks[c] is set where a[i] == c
+    masks = {}
+    bit = 1
+    for char in a:
+        masks[char] = masks.get(char, 0) | bit
+        bit <<= 1
+    last = 1 << (len(a) - 1)
+    all_ones = (1 << len(a)) - 1
+
+    vp, vn, score = all_ones, 0, len(a)
+    remaining = len(b)
+    for char in b:
+        eq = masks.get(char, 0)
+        xv = eq | vn
+        xh = (((eq & vp) + vp) ^ vp) | eq
+        hp = vn | ~(xh | vp)
+        hn = vp & xh
+        if hp & last:
+            score += 1
+        elif hn & last:
+            score -= 1
+        remaining -= 1
+        if max_distance is not None and score - remaining > max_distance:
+            return max_distance + 1
+        hp = (hp << 1) | 1
+        hn <<= 1
+        vp = (hn | ~(xv | hp)) & all_ones
+        vn = hp & xv
+    return score
+
+
+class BKTree:
+    """BK-tree of strings under Levenshtein distance"""
+
+    def __init__(self, words=()):
+        self._root = None       # node: [word, alive, {distance: child}]
+        self._nodes = {}        # word -> node
+        self._alive = 0
+        for word in words:
+            self.add(word)
+
+    def __len__(self):
+        return self._alive
+
+    def __contains__(self, word):
+        node = self._nodes.get(word)
+        return node is not None and node[1]
+
+    def add(self, word):
+        node = self._nodes.get(word)
+        if node is not None:
+            if not node[1]:
+                node[1] = True
+                self._alive += 1
+            return
+        new_node = [word, True, {}]
+        self._nodes[word] = new_node
+        self._alive += 1
+        if self._root is None:
+            self._root = new_node
+            return
+        node = self._root
+        while True:
+            distance = levenshtein(word, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = new_node
+                return
+            node = child
+
+    def discard(self, word):
+        node = self._nodes.get(word)
+        if node is None or not node[1]:
+            return
+        node[1] = False
+        self._alive -= 1
+        if len(self._nodes) - self._alive > max(self._alive, 64):
+            self._rebuild()
+
+    def _rebuild(self):
+        words = [word for word, node in self._nodes.items() if node[1]]
+        self._root = None
+        self._nodes = {}
+        self._alive = 0
+        for word in words:
+            self.add(word)
+
+    def search(self, word, max_distance=2):
+        """
+        Find stored words within ``max_distance`` edits of ``word``.
+
+        Returns:
+            list: (distance, word) pairs sorted by distance, then word
+        """
+        if self._root is None:
+            return []
+        results = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            children = node[2]
+            # Beyond the largest edge + max_distance no child can qualify, so
+            # the exact distance is only needed up to there
+            distance = levenshtein(word, node[0], max(children, default=0) + max_distance)
+            if distance <= max_distance and node[1]:
+                results.append((distance, node[0]))
+            low, high = distance - max_distance, distance + max_distance
+            for edge, child in children.items():
+                if low <= edge <= high:
+                    stack.append(child)
+        results.sort()
+        return results
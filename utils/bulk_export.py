@@ -0,0 +1,272 @@
+"""
+Streaming vocabulary export to CSV, XLSX and JSONL
+
+Words are streamed from the level, learned and mailed stores one row at a
+time and written incrementally: CSV and JSONL are produced in small chunks,
+and XLSX goes through openpyxl's write-only mode, which spools rows to disk
+instead of building the sheet in memory.  One store at a time, the matching
+entries are copied into rows under its lock; the lock is released before the
+rows are written out, so a slow download never blocks writers and never sees
+an entry change half-way through.
+
+Filters: levels (1, 2, 3, "learned", "mailed"), categories, and a date range
+on learned_date / mailed_date (entries without a date are left out when a
+date range is given).  The CSV/XLSX columns match what utils.bulk_import
+reads, so an export can be imported elsewhere.
+
+Usage:
+    python -m utils.bulk_export words.xlsx [--level 2 --level learned]
+        [--category science] [--from 2026-01-01] [--to 2026-01-31]
+"""
+
+import io
+import os
+import csv
+import json
+import argparse
+import tempfile
+import datetime
+
+try:
+    import openpyxl
+except ImportError:  # only needed for .xlsx exports
+    openpyxl = None
+
+from utils.vocab_repository import get_repository, LEVEL_FILES, STORE_FILES
+
+EXPORT_COLUMNS = ["level", "category", "word", "meaning", "phrase", "expressions", "media",
+                  "learned_date", "mailed_date", "sent_date"]
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Rows buffered before a CSV/JSONL chunk is handed out
+CHUNK_ROWS = 500
+
+# Bytes per chunk when streaming a finished XLSX file
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+def parse_level(value):
+    """Turn "1" / 1 / "learned" into a store label, or raise ValueError"""
+    level = int(value) if str(value).isdigit() else str(value).lower()
+    if level not in STORE_FILES:
+        raise ValueError(f"Unknown level '{value}' (use 1, 2, 3, learned or mailed)")
+    return level
+
+
+def _entry_date(entry):
+    value = entry.get('mailed_date') or entry.get('learned_date')
+    return str(value)[:10] if value else None
+
+
+def _export_row(level, category, entry):
+    # Copies every value, so the row stays valid after the lock is released
+    return {
+        "level": level,
+        "category": category,
+        "word": entry.get('word', ''),
+        "meaning": entry.get('meaning', ''),
+        "phrase": entry.get('phrase', ''),
+        "expressions": list(entry.get('expressions') or []),
+        "media": entry.get('media', ''),
+        "learned_date": entry.get('learned_date', ''),
+        "mailed_date": entry.get('mailed_date', ''),
+        "sent_date": entry.get('sent_date', ''),
+    }
+
+
+def _store_rows(level, wanted, low, high):
+    """Export rows of one store's matching entries, copied under its lock"""
+    path = STORE_FILES[level]
+    empty = dict if level in LEVEL_FILES else list
+    rows = []
+    with get_repository().view(path, empty) as (_, data):
+        if isinstance(data, dict):
+            entries = ((category, entry) for category, words in data.items() if isinstance(words, list)
+                       for entry in words)
+        else:
+            entries = ((entry.get('category'), entry) for entry in data)
+        for category, entry in entries:
+            category = (category or "").lower()
+            if wanted is not None and category not in wanted:
+                continue
+            if low or high:
+                day = _entry_date(entry)
+                if day is None or (low and day < low) or (high and day > high):
+                    continue
+            rows.append(_export_row(level, category, entry))
+    return rows
+
+
+def iter_export_rows(levels=None, categories=None, date_from=None, date_to=None):
+    """
+    Stream export rows from the stores.
+
+    Args:
+        levels (list): Store labels to export (None for all)
+        categories (list): Categories to keep (None for all, case-insensitive)
+        date_from, date_to (datetime.date): Inclusive range on learned/mailed date
+
+    Returns:
+        iterator: One dict per word with the EXPORT_COLUMNS keys
+
+    Raises:
+        ValueError: For an unknown level (before anything is streamed)
+    """
+    levels = list(STORE_FILES) if not levels else [parse_level(level) for level in levels]
+    wanted = {category.lower() for category in categories} if categories else None
+    low = date_from.isoformat() if date_from else None
+    high = date_to.isoformat() if date_to else None
+    return _rows(levels, wanted, low, high)
+
+
+def _rows(levels, wanted, low, high):
+    # One store's rows in memory at a time
+    for level in levels:
+        yield from _store_rows(level, wanted, low, high)
+
+
+def _flat(row):
+    return [("; ".join(row[column]) if column == "expressions" else row[column]) for column in EXPORT_COLUMNS]
+
+
+def _csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    pending = 0
+    for row in rows:
+        writer.writerow(_flat(row))
+        pending += 1
+        if pending >= CHUNK_ROWS:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _jsonl_chunks(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False))
+        if len(lines) >= CHUNK_ROWS:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _write_xlsx(rows, target):
+    if openpyxl is None:
+        raise ImportError("openpyxl is required to export .xlsx files (pip install openpyxl)")
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("vocabulary")
+    sheet.append(EXPORT_COLUMNS)
+    for row in rows:
+        sheet.append([str(value) for value in _flat(row)])
+    workbook.save(target)
+
+
+def _xlsx_chunks(rows):
+    # An XLSX file is a zip archive, finished only when saved; spool it to a
+    # temporary file and stream that
+    with tempfile.TemporaryFile() as spool:
+        _write_xlsx(rows, spool)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(FILE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def iter_export_chunks(file_format, **filters):
+    """
+    Stream an export as bytes chunks (for HTTP streaming responses).
+
+    Args:
+        file_format (str): "csv", "xlsx" or "jsonl"
+        **filters: Passed to iter_export_rows
+
+    Returns:
+        iterator: Consecutive bytes chunks of the export file
+
+    Raises:
+        ValueError, ImportError: Before anything is streamed
+    """
+    if file_format not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported export format: {file_format}")
+    if file_format == "xlsx" and openpyxl is None:
+        raise ImportError("openpyxl is required to export .xlsx files (pip install openpyxl)")
+    rows = iter_export_rows(**filters)
+    if file_format == "csv":
+        return _csv_chunks(rows)
+    if file_format == "jsonl":
+        return _jsonl_chunks(rows)
+    return _xlsx_chunks(rows)
+
+
+def export_to_file(path, file_format=None, **filters):
+    """
+    Write an export file.
+
+    Args:
+        path (str): Output file; the format defaults to its extension
+        file_format (str): "csv", "xlsx" or "jsonl"
+        **filters: Passed to iter_export_rows
+
+    Returns:
+        int: Number of words written
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip(".").lower()
+    count = 0
+
+    def _counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    rows = _counted(iter_export_rows(**filters))
+    if file_format == "xlsx":
+        _write_xlsx(rows, path)
+        return count
+    if file_format == "csv":
+        chunks = _csv_chunks(rows)
+    elif file_format == "jsonl":
+        chunks = _jsonl_chunks(rows)
+    else:
+        raise ValueError(f"Unsupported export format: {file_format}")
+    with open(path, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export vocabulary to CSV, XLSX or JSONL")
+    parser.add_argument("output", help="output file (.csv, .xlsx or .jsonl)")
+    parser.add_argument("--format", choices=sorted(CONTENT_TYPES), help="defaults to the output extension")
+    parser.add_argument("--level", action="append", help="1, 2, 3, learned or mailed (repeatable)")
+    parser.add_argument("--category", action="append", help="category to keep (repeatable)")
+    parser.add_argument("--from", dest="date_from", type=datetime.date.fromisoformat,
+                        help="first learned/mailed date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", type=datetime.date.fromisoformat,
+                        help="last learned/mailed date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    try:
+        count = export_to_file(args.output, args.format, levels=args.level, categories=args.category,
+                               date_from=args.date_from, date_to=args.date_to)
+    except (ValueError, ImportError) as e:
+        parser.error(str(e))
+    print(f"Exported {count} words to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Bulk vocabulary import from CSV or XLSX
+
+Rows are streamed (csv.DictReader, or openpyxl in read-only mode), so a 50k
+row sheet is never held in memory as a whole.  Every ``BATCH_SIZE`` rows are
+validated with utils.validation.validate_word_entry and checked against the
+existing headwords (and the rows imported so far) through the global headword
+index.  Accepted words are written through the repository in batches of at
+most ``FLUSH_SIZE`` rows (one locked write per level file each), so memory
+stays bounded however long the file is.
+
+Columns (header names are case-insensitive; only word and meaning are required):
+    word, meaning, phrase, category, level, expressions, media
+Multiple expressions go in one cell separated by ";".
+
+Usage:
+    python -m utils.bulk_import words.csv [--level 1] [--category general] [--dry-run]
+"""
+
+import io
+import os
+import csv
+import time
+import argparse
+
+try:
+    import openpyxl
+except ImportError:  # only needed for .xlsx files
+    openpyxl = None
+
+from utils.validation import validate_word_entry
+from utils.vocab_repository import get_repository, normalize_word, LEVEL_FILES
+from utils.json_manager import check_new_words
+
+BATCH_SIZE = 1000
+
+# Accepted rows held in memory before they are written to the level files
+FLUSH_SIZE = 1000
+
+# Row-level problems kept for the report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+COLUMNS = ("word", "meaning", "phrase", "category", "level", "expressions", "media")
+
+
+def _file_format(name):
+    extension = os.path.splitext(name or "")[1].lower()
+    if extension in (".xlsx", ".xlsm"):
+        return "xlsx"
+    if extension in (".csv", ".txt"):
+        return "csv"
+    raise ValueError(f"Unsupported file type: {name} (use .csv or .xlsx)")
+
+
+def _iter_csv(source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding="utf-8-sig", newline="") as f:
+            yield from csv.DictReader(f)
+    else:
+        # Uploaded files are binary streams
+        yield from csv.DictReader(io.TextIOWrapper(source, encoding="utf-8-sig", newline=""))
+
+
+def _iter_xlsx(source):
+    if openpyxl is None:
+        raise ImportError("openpyxl is required to import .xlsx files (pip install openpyxl)")
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        names = [str(name).strip() if name is not None else "" for name in header]
+        for values in rows:
+            yield {name: value for name, value in zip(names, values) if name}
+    finally:
+        workbook.close()
+
+
+def iter_rows(source, name=None):
+    """
+    Stream rows of a CSV or XLSX file as dictionaries.
+
+    Args:
+        source: File path, or a binary file object (e.g. a Streamlit upload)
+        name (str): File name used to pick the format (defaults to ``source``)
+
+    Yields:
+        dict: Column name -> cell value for each data row
+    """
+    file_format = _file_format(name or str(source))
+    rows = _iter_xlsx(source) if file_format == "xlsx" else _iter_csv(source)
+    for row in rows:
+        yield {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+
+
+def _cell(row, column):
+    value = row.get(column)
+    return "" if value is None else str(value).strip()
+
+
+def _parse_row(row, default_level, default_category):
+    """Return (level, category, entry) or raise ValueError with the reason"""
+    word, meaning, phrase = _cell(row, "word"), _cell(row, "meaning"), _cell(row, "phrase")
+    category = (_cell(row, "category") or default_category).lower()
+    is_valid, error = validate_word_entry(word, meaning, phrase, category)
+    if not is_valid:
+        raise ValueError(error)
+    level_text = _cell(row, "level")
+    try:
+        level = int(float(level_text)) if level_text else default_level
+    except ValueError:
+        raise ValueError(f"Invalid level '{level_text}'")
+    if level not in LEVEL_FILES:
+        raise ValueError(f"Level must be one of {sorted(LEVEL_FILES)}")
+    expressions = [expression.strip() for expression in _cell(row, "expressions").split(";") if expression.strip()]
+    entry = {
+        "word": word,
+        "meaning": meaning,
+        "expressions": expressions,
+        "phrase": phrase,
+        "media": _cell(row, "media"),
+    }
+    return level, category, entry
+
+
+def import_words(source, name=None, default_level=1, default_category="general",
+                 dry_run=False, progress=None):
+    """
+    Import words from a CSV or XLSX file into the level files.
+
+    Args:
+        source: File path or binary file object
+        name (str): File name (needed for file objects to pick the format)
+        default_level (int): Level for rows without a level column
+        default_category (str): Category for rows without a category column
+        dry_run (bool): Validate and dedupe only, write nothing
+        progress (callable): Called with the number of rows read after each batch
+
+    Returns:
+        dict: Import report with counts per outcome, per-level imports,
+        the first row errors, elapsed seconds and rows per second
+    """
+    start = time.perf_counter()
+    report = {
+        "rows": 0,
+        "imported": {level: 0 for level in LEVEL_FILES},
+        "invalid": 0,
+        "duplicates": 0,
+        "errors": [],
+        "dry_run": dry_run,
+    }
+    pending = {level: [] for level in LEVEL_FILES}
+    # Headwords accepted but not yet written (a dry run writes nothing, so it keeps them all)
+    seen = set()
+    repository = get_repository()
+
+    def _flush():
+        for level, records in pending.items():
+            if records:
+                # One locked write per level file
+                repository.apply_many(LEVEL_FILES[level], records)
+                records.clear()
+        # Written words are in the headword index now, which check_new_words consults
+        seen.clear()
+
+    def _error(row_number, message):
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append((row_number, message))
+
+    def _process(batch):
+        parsed = []
+        for row_number, row in batch:
+            try:
+                parsed.append((row_number,) + _parse_row(row, default_level, default_category))
+            except ValueError as e:
+                report["invalid"] += 1
+                _error(row_number, str(e))
+        # Only words found in a store count as existing; repeats within the
+        # file (reported as ("batch", None)) are left to ``seen``, so their
+        # first row is still imported
+        stored = {
+            normalize_word(word)
+            for word, locations in check_new_words([entry for _, _, _, entry in parsed]).items()
+            if any(level != "batch" for level, _ in locations)
+        }
+        for row_number, level, category, entry in parsed:
+            key = normalize_word(entry["word"])
+            if key in seen or key in stored:
+                report["duplicates"] += 1
+                _error(row_number, f"Duplicate word '{entry['word']}'")
+                continue
+            seen.add(key)
+            report["imported"][level] += 1
+            if dry_run:
+                continue
+            pending[level].append({"op": "add", "entry": entry, "category": category})
+            if sum(len(records) for records in pending.values()) >= FLUSH_SIZE:
+                _flush()
+
+    batch = []
+    # Row 1 is the header
+    for row_number, row in enumerate(iter_rows(source, name), start=2):
+        if not any(value not in (None, "") for value in row.values()):
+            continue
+        report["rows"] += 1
+        batch.append((row_number, row))
+        if len(batch) >= BATCH_SIZE:
+            _process(batch)
+            batch = []
+            if progress:
+                progress(report["rows"])
+    if batch:
+        _process(batch)
+        if progress:
+            progress(report["rows"])
+
+    _flush()
+
+    report["seconds"] = time.perf_counter() - start
+    report["rows_per_second"] = report["rows"] / report["seconds"] if report["seconds"] else 0.0
+    return report
+
+
+def format_report(report):
+    """Human-readable summary of an import report"""
+    imported = sum(report["imported"].values())
+    per_level = ", ".join(f"level{level}: {count}" for level, count in report["imported"].items())
+    lines = [
+        f"{'Would import' if report['dry_run'] else 'Imported'} {imported} of {report['rows']} rows ({per_level})",
+        f"Skipped {report['duplicates']} duplicates and {report['invalid']} invalid rows",
+        f"{report['seconds']:.2f}s, {report['rows_per_second']:.0f} rows/s",
+    ]
+    for row_number, message in report["errors"]:
+        lines.append(f"  row {row_number}: {message}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import vocabulary from a CSV or XLSX file")
+    parser.add_argument("file", help="CSV or XLSX file with word and meaning columns")
+    parser.add_argument("--level", type=int, default=1, choices=sorted(LEVEL_FILES),
+                        help="level for rows without a level column")
+    parser.add_argument("--category", default="general", help="category for rows without a category column")
+    parser.add_argument("--dry-run", action="store_true", help="validate and dedupe only")
+    args = parser.parse_args()
+
+    report = import_words(args.file, default_level=args.level, default_category=args.category,
+                          dry_run=args.dry_run, progress=lambda rows: print(f"  {rows} rows read", end="\r"))
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
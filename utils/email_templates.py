@@ -0,0 +1,175 @@
+"""
+Pre-rendered daily word emails
+
+Every subscriber of a level gets the same words on a given day, so the body
+is rendered once per (level, date, word set): the plain text and (escaped)
+HTML versions, and the serialized multipart/alternative MIME payload.  Each
+recipient's message is then only a few header lines stamped on top of those
+cached bytes, so a mail run renders O(levels) bodies, not O(recipients).
+
+Rows of the outbox carry the render's short ``key`` (a digest of its
+content), so a sender finds the cached payload for each row by that key
+instead of hashing and comparing the full bodies per recipient.
+
+Usage:
+    email = render_daily_email(level, today, words)
+    data = stamp_headers(email.payload, from_addr, to_addr, email.subject)
+    pool.sendmail(from_addr, [to_addr], data)
+
+    # Sending a stored row: payload_for(row.template_key, row.plain_body, row.html_body)
+"""
+
+import html
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from email import policy
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from functools import lru_cache
+
+# Bodies kept in memory; a run needs one per level
+TEMPLATE_CACHE_SIZE = 64
+
+WORD_FIELDS = ("word", "meaning", "phrase", "media")
+
+
+@dataclass(frozen=True)
+class RenderedEmail:
+    key: str         # digest of subject and bodies, names the payload in the cache
+    subject: str
+    plain: str
+    html: str
+    payload: bytes   # MIME headers and body of the multipart/alternative part
+
+
+def _word_key(words):
+    # Hashable, order-preserving snapshot of the fields the template shows
+    return tuple(tuple(str(w.get(field, '') or '') for field in WORD_FIELDS) for w in words)
+
+
+def render_bodies(words):
+    """
+    Render the plain text and HTML bodies for a list of word entries.
+
+    Args:
+        words (list): Entries with word, meaning, phrase and media
+
+    Returns:
+        tuple: (plain, html)
+    """
+    lines = []
+    html_lines = ["<html><body>", "<h2>Today's Mailed Words</h2>", "<ul>"]
+    for word, meaning, phrase, media in _word_key(words):
+        lines.append(f"- {word} | {meaning} | {phrase} | {media}")
+        word, meaning, phrase, media = (html.escape(value) for value in (word, meaning, phrase, media))
+        html_lines.append(f"<li><strong>{word}</strong> &mdash; {meaning}<br/><em>{phrase}</em><br/><em>{media}</em></li>")
+    html_lines.append("</ul>")
+    html_lines.append("</body></html>")
+    return "\n".join(lines), "\n".join(html_lines)
+
+
+def mime_payload(plain, html_body):
+    """Serialized multipart/alternative body (with its MIME headers)"""
+    body = EmailMessage(policy=policy.SMTP)
+    body.set_content(plain)
+    body.add_alternative(html_body, subtype="html")
+    return body.as_bytes()
+
+
+def template_key(subject, plain, html_body):
+    """Short digest naming a rendered email's content"""
+    digest = hashlib.sha256()
+    for part in (subject, plain, html_body):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+
+_payloads = OrderedDict()   # template key -> payload bytes, least recently used first
+_payloads_lock = threading.Lock()
+
+
+def payload_for(key, plain, html_body):
+    """
+    Return the serialized payload for a render, cached under its short key.
+
+    The bodies are only read on a cache miss; rows without a key (queued
+    before keys were stored) are serialized every time.
+    """
+    if key is None:
+        return mime_payload(plain, html_body)
+    with _payloads_lock:
+        payload = _payloads.get(key)
+        if payload is not None:
+            _payloads.move_to_end(key)
+            return payload
+    payload = mime_payload(plain, html_body)
+    with _payloads_lock:
+        _payloads[key] = payload
+        while len(_payloads) > TEMPLATE_CACHE_SIZE:
+            _payloads.popitem(last=False)
+    return payload
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _render_daily_email(level, send_date, word_key):
+    words = [dict(zip(WORD_FIELDS, fields)) for fields in word_key]
+    plain, html_body = render_bodies(words)
+    subject = f"Mailed words for {send_date}"
+    key = template_key(subject, plain, html_body)
+    return RenderedEmail(
+        key=key,
+        subject=subject,
+        plain=plain,
+        html=html_body,
+        payload=payload_for(key, plain, html_body),
+    )
+
+
+def render_daily_email(level, send_date, words):
+    """
+    Return the rendered email for a level's words on a date (cached).
+
+    Args:
+        level (int): Subscriber level (None when mailing outside a level run)
+        send_date (str): ISO date the words are mailed for
+        words (list): Entries with word, meaning, phrase and media
+
+    Returns:
+        RenderedEmail: Key, subject, bodies and the serialized MIME payload
+    """
+    return _render_daily_email(level, send_date, _word_key(words))
+
+
+def stamp_headers(payload, from_addr, to_addr, subject):
+    """
+    Build one recipient's message from a cached payload.
+
+    Args:
+        payload (bytes): RenderedEmail.payload / payload_for()
+        from_addr (str): From header
+        to_addr (str): To header (a single recipient)
+        subject (str): Subject header (encoded if not ASCII)
+
+    Returns:
+        bytes: The complete message, ready for smtplib's sendmail()
+    """
+    headers = (
+        ("From", from_addr),
+        ("To", to_addr),
+        ("Subject", subject),
+        ("Date", formatdate(localtime=True)),
+        # The sender's domain: make_msgid() would look up the host's FQDN every call
+        ("Message-ID", make_msgid(domain=from_addr.rpartition("@")[2] or None)),
+    )
+    return b"".join(_fold_header(name, value) for name, value in headers) + payload
+
+
+def _fold_header(name, value):
+    line = f"{name}: {value}\r\n"
+    if line.isascii() and len(line) <= 78 and "\n" not in value and "\r" not in value:
+        return line.encode("ascii")
+    # header_store_parse gives a header object, which folds with RFC 2047 encoding
+    return policy.SMTP.fold_binary(*policy.SMTP.header_store_parse(name, value))
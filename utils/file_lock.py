@@ -0,0 +1,114 @@
+"""
+Advisory file locks for the JSON stores
+
+The Streamlit pages, the FastAPI service and the cron job all touch the same
+level and history files.  Writers take an exclusive lock and readers a shared
+lock on a sidecar ``<file>.lock`` so a read-modify-write cannot interleave with
+another process's write.  Shared locks never block each other.
+
+Uses fcntl.flock on POSIX and msvcrt.locking on Windows (which has no shared
+mode, so shared locks are taken exclusively there).  Locks are re-entrant per
+thread: nesting a lock on a path the thread already holds is a no-op.
+"""
+
+import os
+import time
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_TIMEOUT = float(os.getenv("STORE_LOCK_TIMEOUT", 10))
+
+_held = threading.local()
+
+
+class StoreLockTimeout(TimeoutError):
+    """Raised when a store lock cannot be acquired within the timeout"""
+
+
+def _try_lock(fd, shared):
+    if fcntl is not None:
+        fcntl.flock(fd, (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+
+def _unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+    Shared/exclusive advisory lock for a store file.
+
+    Usage:
+        with FileLock("level1.json"):               # exclusive (writers)
+            ...
+        with FileLock("level1.json", shared=True):  # shared (readers)
+            ...
+    """
+
+    def __init__(self, path, shared=False, timeout=LOCK_TIMEOUT):
+        self.lock_path = os.path.abspath(path) + ".lock"
+        self.shared = shared
+        self.timeout = timeout
+
+    @staticmethod
+    def _held_locks():
+        if not hasattr(_held, "locks"):
+            _held.locks = {}
+        return _held.locks
+
+    def acquire(self):
+        held = self._held_locks()
+        if self.lock_path in held:
+            state = held[self.lock_path]
+            if state["shared"] and not self.shared:
+                raise RuntimeError(f"Cannot upgrade a shared lock to exclusive: {self.lock_path}")
+            state["count"] += 1
+            return self
+
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        delay = 0.005
+        while True:
+            try:
+                _try_lock(fd, self.shared)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise StoreLockTimeout(f"Timed out waiting for {self.lock_path}")
+                time.sleep(delay)
+                delay = min(delay * 2, 0.1)
+        held[self.lock_path] = {"fd": fd, "shared": self.shared, "count": 1}
+        return self
+
+    def release(self):
+        held = self._held_locks()
+        state = held.get(self.lock_path)
+        if state is None:
+            return
+        state["count"] -= 1
+        if state["count"] > 0:
+            return
+        del held[self.lock_path]
+        try:
+            _unlock(state["fd"])
+        finally:
+            os.close(state["fd"])
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
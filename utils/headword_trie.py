@@ -0,0 +1,356 @@
+"""
+Headword trie for search-as-you-type suggestions and fuzzy lookups
+
+One trie holds the normalized headwords of every store (level 1-3, learned
+and mailed).  Each node keeps the best ``TOP_K`` completions of its subtree
+(shortest first, then alphabetical), so a lookup only walks the prefix and
+slices that list: time proportional to the prefix length, whatever the corpus
+size.  Terminal nodes record where the word lives as (level, category) counts,
+which is also what the duplicate warnings on the add-word page use.  The same
+headwords are kept in a BK-tree (utils.bk_tree) for "did you mean" lookups.
+
+The trie follows the repository's change notifications, so adds, edits and
+deletes show up immediately.  A store that is reloaded from disk (changed by
+another process) is rebuilt on the next lookup.
+"""
+
+import os
+import argparse
+import threading
+from bisect import insort
+
+from utils.bk_tree import BKTree
+from utils.vocab_repository import get_repository, normalize_word, LEVEL_FILES, STORE_FILES
+
+# Completions cached per node; lookups can ask for at most this many
+TOP_K = 10
+
+
+def _rank(headword):
+    return (len(headword), headword)
+
+
+class _Node:
+    __slots__ = ('children', 'locations', 'display', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.locations = None   # {(level, category): count} on terminal nodes
+        self.display = None     # headword as first written, e.g. "Apple"
+        self.top = []           # best completions in this subtree, by _rank
+
+
+class HeadwordTrie:
+    """Trie of normalized headwords with per-node top-k completions"""
+
+    def __init__(self):
+        self._root = _Node()
+        self._terminals = {}    # headword -> terminal node
+
+    def __len__(self):
+        return len(self._terminals)
+
+    def _path(self, headword):
+        node = self._root
+        path = [node]
+        for char in headword:
+            node = node.children.get(char)
+            if node is None:
+                return None
+            path.append(node)
+        return path
+
+    def insert(self, word, level, category=None):
+        """Record one occurrence of ``word``; returns True if the headword is new"""
+        headword = normalize_word(word)
+        if not headword:
+            return False
+        node = self._terminals.get(headword)
+        is_new = node is None
+        if is_new:
+            node = self._root
+            path = [node]
+            for char in headword:
+                node = node.children.setdefault(char, _Node())
+                path.append(node)
+            node.locations = {}
+            node.display = word.strip()
+            self._terminals[headword] = node
+            rank = _rank(headword)
+            for step in path:
+                if len(step.top) < TOP_K or rank < _rank(step.top[-1]):
+                    insort(step.top, headword, key=_rank)
+                    del step.top[TOP_K:]
+        location = (level, category)
+        node.locations[location] = node.locations.get(location, 0) + 1
+        return is_new
+
+    def remove(self, word, level, category=None):
+        """Forget one occurrence of ``word``; returns True if that was the last one"""
+        headword = normalize_word(word)
+        node = self._terminals.get(headword)
+        if node is None:
+            return False
+        location = (level, category)
+        count = node.locations.get(location, 0) - 1
+        if count > 0:
+            node.locations[location] = count
+            return False
+        node.locations.pop(location, None)
+        if node.locations:
+            return False
+
+        # Last occurrence gone: drop the word and repair the caches bottom-up
+        del self._terminals[headword]
+        node.locations = None
+        node.display = None
+        path = self._path(headword)
+        for depth in range(len(path) - 1, -1, -1):
+            step = path[depth]
+            if depth > 0 and not step.children and step.locations is None:
+                del path[depth - 1].children[headword[depth - 1]]
+                continue
+            if headword not in step.top:
+                break
+            step.top = self._collect_top(step, headword[:depth])
+        return True
+
+    @staticmethod
+    def _collect_top(node, prefix):
+        candidates = [prefix] if node.locations else []
+        for child in node.children.values():
+            candidates.extend(child.top)
+        candidates.sort(key=_rank)
+        return candidates[:TOP_K]
+
+    def display(self, word):
+        """Return ``word`` as it was first written (e.g. Apple for apple)"""
+        node = self._terminals.get(normalize_word(word))
+        return node.display if node is not None else None
+
+    def locations(self, word):
+        """Return the sorted (level, category) places where ``word`` is stored"""
+        node = self._terminals.get(normalize_word(word))
+        if node is None:
+            return []
+        return sorted(node.locations, key=lambda loc: (str(loc[0]), loc[1] or ""))
+
+    def duplicates(self, levels=None):
+        """
+        Headwords stored more than once, in one pass over the terminals.
+
+        Args:
+            levels: Only count occurrences in these levels (None for all)
+
+        Returns:
+            dict: {word: [(level, category, count), ...]} for every word that
+            occurs more than once among ``levels``
+        """
+        report = {}
+        for node in self._terminals.values():
+            places = [(level, category, count) for (level, category), count in node.locations.items()
+                      if levels is None or level in levels]
+            if sum(count for _, _, count in places) > 1:
+                report[node.display] = sorted(places, key=lambda place: (str(place[0]), place[1] or ""))
+        return report
+
+    def complete(self, prefix, limit=TOP_K):
+        """
+        Return up to ``limit`` (<= TOP_K) completions of ``prefix``.
+
+        Returns:
+            list: (word, [(level, category), ...]) pairs, shortest word first
+        """
+        path = self._path(normalize_word(prefix))
+        if path is None:
+            return []
+        return [(self._terminals[headword].display, self.locations(headword))
+                for headword in path[-1].top[:limit]]
+
+
+class HeadwordIndex:
+    """HeadwordTrie over all stores, kept in step with the repository"""
+
+    def __init__(self, repository):
+        self._repository = repository
+        self._trie = HeadwordTrie()
+        self._fuzzy = BKTree()
+        self._fuzzy_pending = set()   # new headwords not yet in the BK-tree
+        self._lock = threading.RLock()
+        self._labels = {os.path.abspath(path): label for label, path in STORE_FILES.items()}
+        self._contents = {}     # label -> {(word, category): count} currently in the trie
+        repository.subscribe(self._on_change)
+
+    def _insert(self, label, word, category):
+        if not word:
+            return
+        contents = self._contents[label]
+        contents[(word, category)] = contents.get((word, category), 0) + 1
+        if self._trie.insert(word, label, category):
+            # BK-tree inserts cost several distance computations each; they
+            # are batched until the next fuzzy lookup so bulk adds stay cheap
+            self._fuzzy_pending.add(normalize_word(word))
+
+    def _remove(self, label, word, category):
+        contents = self._contents[label]
+        count = contents.get((word, category), 0)
+        if count == 0:
+            return
+        if count == 1:
+            del contents[(word, category)]
+        else:
+            contents[(word, category)] = count - 1
+        if self._trie.remove(word, label, category):
+            self._forget_fuzzy(normalize_word(word))
+
+    def _forget_fuzzy(self, headword):
+        if headword in self._fuzzy_pending:
+            self._fuzzy_pending.discard(headword)
+        else:
+            self._fuzzy.discard(headword)
+
+    def _drop_store(self, label):
+        for (word, category), count in self._contents.pop(label, {}).items():
+            for _ in range(count):
+                if self._trie.remove(word, label, category):
+                    self._forget_fuzzy(normalize_word(word))
+
+    def _on_change(self, event, key, details):
+        label = self._labels.get(key)
+        if label is None:
+            return
+        with self._lock:
+            if event == 'reload':
+                self._drop_store(label)
+                return
+            if label not in self._contents:
+                return
+            if event == 'add':
+                entry = details['entry']
+                self._insert(label, entry.get('word', ''), details['category'] or entry.get('category'))
+            elif event == 'update':
+                old, new = details['old_entry'], details['entry']
+                old_category = details['category'] or old.get('category')
+                new_category = details['category'] or new.get('category')
+                if (old.get('word'), old_category) != (new.get('word'), new_category):
+                    self._remove(label, old.get('word', ''), old_category)
+                    self._insert(label, new.get('word', ''), new_category)
+            elif event == 'remove':
+                for category, entry in details['entries']:
+                    self._remove(label, entry.get('word', ''), category or entry.get('category'))
+
+    def _sync(self):
+        """Bring every store up to date; only stores reloaded since last time are rebuilt"""
+        for label, path in STORE_FILES.items():
+            empty = dict if label in LEVEL_FILES else list
+            try:
+                with self._repository.view(path, empty) as (_, data), self._lock:
+                    if label in self._contents:
+                        continue
+                    self._contents[label] = {}
+                    if isinstance(data, dict):
+                        for category, words in data.items():
+                            if isinstance(words, list):
+                                for entry in words:
+                                    self._insert(label, entry.get('word', ''), category)
+                    else:
+                        for entry in data:
+                            self._insert(label, entry.get('word', ''), entry.get('category'))
+            except Exception as e:
+                print(f"Could not index headwords of {path}: {e}")
+
+    def suggest(self, prefix, limit=TOP_K):
+        """
+        Headword completions from every level, learned and mailed.
+
+        Args:
+            prefix (str): What the user has typed so far
+            limit (int): Maximum number of suggestions (at most TOP_K)
+
+        Returns:
+            list: (word, [(level, category), ...]) pairs, shortest word first
+        """
+        if not normalize_word(prefix):
+            return []
+        self._sync()
+        with self._lock:
+            return self._trie.complete(prefix, limit)
+
+    def locations(self, word):
+        """Return the (level, category) places where ``word`` already exists"""
+        self._sync()
+        with self._lock:
+            return self._trie.locations(word)
+
+    def locations_many(self, words):
+        """Return {word: [(level, category), ...]} for the given words that already exist"""
+        self._sync()
+        with self._lock:
+            found = {}
+            for word in words:
+                locations = self._trie.locations(word)
+                if locations:
+                    found[word] = locations
+            return found
+
+    def duplicates(self, levels=None):
+        """Headwords stored more than once (see HeadwordTrie.duplicates)"""
+        self._sync()
+        with self._lock:
+            return self._trie.duplicates(levels)
+
+    def fuzzy(self, word, max_distance=2, limit=5):
+        """
+        "Did you mean" candidates: headwords within ``max_distance`` edits.
+
+        Args:
+            word (str): Possibly misspelled word
+            max_distance (int): Maximum Levenshtein distance
+            limit (int): Maximum number of candidates
+
+        Returns:
+            list: (word, distance, [(level, category), ...]) triples, closest first
+        """
+        headword = normalize_word(word)
+        if not headword:
+            return []
+        self._sync()
+        with self._lock:
+            for pending in self._fuzzy_pending:
+                self._fuzzy.add(pending)
+            self._fuzzy_pending.clear()
+            matches = self._fuzzy.search(headword, max_distance)[:limit]
+            return [(self._trie.display(match), distance, self._trie.locations(match))
+                    for distance, match in matches]
+
+
+_headword_index = None
+_headword_index_lock = threading.Lock()
+
+
+def get_headword_index():
+    """Return the process-wide HeadwordIndex bound to the shared repository"""
+    global _headword_index
+    if _headword_index is None:
+        with _headword_index_lock:
+            if _headword_index is None:
+                _headword_index = HeadwordIndex(get_repository())
+    return _headword_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report headwords stored more than once")
+    parser.add_argument("--include-mailed", action="store_true",
+                        help="also count mailed.json (it holds copies of level words by design)")
+    args = parser.parse_args()
+    levels = None if args.include_mailed else [label for label in STORE_FILES if label != "mailed"]
+    report = get_headword_index().duplicates(levels)
+    for word, places in sorted(report.items(), key=lambda item: item[0].lower()):
+        where = ", ".join(f"{level}/{category} x{count}" if count > 1 else f"{level}/{category}"
+                          for level, category, count in places)
+        print(f"{word}: {where}")
+    print(f"{len(report)} duplicated headwords")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Append-only journal for the learned/mailed history files
+
+``learned.json`` and ``mailed.json`` stay plain JSON lists (the snapshot), and
+every change since the last compaction is appended as one JSON line to a
+sidecar journal (``learned.journal.jsonl``).  Marking a word learned or mailed
+is then a single small append instead of rewriting the whole history, and the
+journal is folded back into the snapshot once it grows past a size threshold.
+
+Journal records:
+    {"op": "add", "entry": {...}}
+    {"op": "update", "word": "...", "fields": {...}}
+    {"op": "update", "word": "...", "match": {...}, "fields": {...}}
+    {"op": "remove", "word": "..."}
+"""
+
+import os
+import json
+import tempfile
+
+# Fold the journal into the snapshot once it grows past this many bytes
+JOURNAL_COMPACT_BYTES = int(os.getenv("JOURNAL_COMPACT_BYTES", 256 * 1024))
+
+
+def journal_path_for(snapshot_path):
+    """Return the journal path for a snapshot file (learned.json -> learned.journal.jsonl)"""
+    root, _ = os.path.splitext(snapshot_path)
+    return root + ".journal.jsonl"
+
+
+def append_records(journal_path, records):
+    """
+    Append records to the journal in a single write.
+
+    Returns:
+        int: Size of the journal after the append
+    """
+    payload = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    with open(journal_path, 'a', encoding='utf-8') as f:
+        f.write(payload)
+        f.flush()
+        return f.tell()
+
+
+def read_records(journal_path, offset=0):
+    """
+    Read complete journal records starting at a byte offset.
+
+    A trailing line without a newline (a torn append) is left unread.
+
+    Returns:
+        tuple: (records, new_offset)
+    """
+    records = []
+    try:
+        with open(journal_path, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read()
+    except FileNotFoundError:
+        return records, 0
+    end = chunk.rfind(b"\n") + 1
+    for line in chunk[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line.decode('utf-8')))
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            print(f"Skipping unreadable journal record in {journal_path}: {e}")
+    return records, offset + end
+
+
+def atomic_write_json(path, data):
+    """Write JSON through a temp file and rename so readers never see a partial file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        # mkstemp creates 0600 files; keep the permissions of the file being replaced
+        mode = os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def remove_journal(journal_path):
+    try:
+        os.remove(journal_path)
+    except FileNotFoundError:
+        pass
@@ -2,6 +2,10 @@
 
 import os
 import json
+from utils.vocab_repository import get_repository, normalize_word, LEVEL_FILES
+from utils.search_index import get_search_indexes
+from utils.headword_trie import get_headword_index
+from utils.word_stats import get_word_statistics
 
 def load_json(file_path):
     if not os.path.exists(file_path):
@@ -13,7 +17,7 @@ def save_json(file_path, data):
     with open(file_path, "w") as file:
         json.dump(data, file, indent=4)
         
-def add_words_to_json(word_entry, json_file="level1.json", category="general"):
+def add_words_to_json(word_entry, json_file="level1.json", category="general", allow_duplicate=False):
     """
     Add a new word entry to the specified JSON file under the given category.
     
@@ -21,24 +25,22 @@ def add_words_to_json(word_entry, json_file="level1.json", category="general"):
         word_entry (dict): Dictionary with word details
         json_file (str): Path to the JSON file
         category (str): Category under which to add the word
+        allow_duplicate (bool): Add even if the headword already exists in
+            any level, learned or mailed
+        
+    Returns:
+        bool: True if the word was added, False if it is a duplicate
     """
-    # Load existing data
-    if os.path.exists(json_file):
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    else:
-        data = {}
-    
-    # Ensure category exists
-    if category not in data:
-        data[category] = []
-    
-    # Append new word entry
-    data[category].append(word_entry)
-    
-    # Save back to JSON file
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # O(1) check against the global headword index
+    if not allow_duplicate:
+        existing = find_word_locations(word_entry.get('word', ''))
+        if existing:
+            print(f"Word '{word_entry.get('word', '')}' already exists in: "
+                  + ", ".join(format_word_location(location) for location in existing))
+            return False
+    # Append to the cached store (creates the category if needed) and persist
+    get_repository().add_word(json_file, word_entry, category)
+    return True
         
 def delete_word_from_file(word_to_delete, word_file):
     print(f"Deleting word: {word_to_delete} from file: {word_file}")
@@ -69,26 +71,11 @@ def delete_word_from_file(word_to_delete, word_file):
 def update_word_audio(word_name, audio_path, json_file):
     """Update the audio field for a word in a JSON vocabulary file"""
     try:
-        # Load the JSON data
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Indexed lookup of the word, then a point update of its audio field
+        category = get_repository().update_word(json_file, word_name, {'audio': audio_path})
         
-        # Search through all categories and update the word's audio field
-        word_found = False
-        for category, words in data.items():
-            for word in words:
-                if word.get('word', '').lower() == word_name.lower():
-                    word['audio'] = audio_path
-                    word_found = True
-                    print(f"Updated audio for '{word_name}' in category '{category}' to '{audio_path}'")
-                    break
-            if word_found:
-                break
-        
-        if word_found:
-            # Save the updated data back to the file
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+        if category is not None:
+            print(f"Updated audio for '{word_name}' in category '{category}' to '{audio_path}'")
             return True
         else:
             print(f"Word '{word_name}' not found in {json_file}")
@@ -98,27 +85,42 @@ def update_word_audio(word_name, audio_path, json_file):
         print(f"Error processing JSON file {json_file}: {e}")
         return False
 
+def update_word_fields(word_name, fields, json_file, category=None):
+    """
+    Update fields of a word in a JSON vocabulary file
+    
+    The update is applied under the store's exclusive lock on top of the
+    latest version of the file, so concurrent edits of other words are kept.
+    
+    Args:
+        word_name (str): Headword to update (case-insensitive)
+        fields (dict): Fields to set on the entry
+        json_file (str): Path to the JSON file
+        category (str): Only update the word's entry in this category (for
+            headwords stored in several categories of a level)
+        
+    Returns:
+        bool: True if the word was found and updated
+    """
+    try:
+        updated = get_repository().update_word(json_file, word_name, fields, category=category)
+        if updated is None:
+            print(f"Word '{word_name}' not found in {json_file}")
+            return False
+        return True
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"Error processing JSON file {json_file}: {e}")
+        return False
+
 def delete_word_from_json(word_to_delete, json_file):
     """Delete a word from a JSON vocabulary file"""
     try:
-        # Load the JSON data
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Remove every indexed occurrence of the word (case-insensitive)
+        categories = get_repository().delete_word(json_file, word_to_delete)
+        for category in categories:
+            print(f"Word '{word_to_delete}' found and removed from category '{category}'")
         
-        # Search through all categories and remove the word
-        word_found = False
-        for category, words in data.items():
-            # Filter out the word to delete (case-insensitive)
-            original_count = len(words)
-            data[category] = [word for word in words if word.get('word', '').lower() != word_to_delete.lower()]
-            if len(data[category]) < original_count:
-                word_found = True
-                print(f"Word '{word_to_delete}' found and removed from category '{category}'")
-        
-        if word_found:
-            # Save the updated data back to the file
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+        if categories:
             print(f"Successfully deleted '{word_to_delete}' from {json_file}")
             return True
         else:
@@ -131,106 +133,140 @@ def delete_word_from_json(word_to_delete, json_file):
 
 def load_vocabulary_with_expressions(level):
     """Load vocabulary from JSON files with expressions included"""
-    import json
-    
     if level in ["learned", "mailed"]:
         if level == "mailed":
             return load_mailed_words()
         return load_learned_words()
     
-    # Map level to filename
-    level_files = {
-        1: "level1.json",
-        2: "level2.json", 
-        3: "level3.json"
-    }
-    
-    filename = level_files.get(level)
+    filename = LEVEL_FILES.get(level)
     if not filename or not os.path.exists(filename):
         return []
     
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = get_repository().load_level(filename)
         
         # Flatten all categories into a single list
         all_words = []
         for category, words in data.items():
             for word_entry in words:
-                # Add category to each word entry
-                word_entry['category'] = category
-                all_words.append(word_entry)
+                # Copy with the category added so callers never touch the cache
+                all_words.append(dict(word_entry, category=category))
         
         return all_words
     except (json.JSONDecodeError, FileNotFoundError):
         return []
 
-def load_vocabulary_from_file(file_path):
-    #print(file_path)
+def search_vocabulary(level, query, limit=None):
     """
-    Load vocabulary words from a text file
-    
+    Search a level (1-3, "learned" or "mailed") through its inverted index
+
     Args:
-        file_path (str): Path to the vocabulary file
-        
+        level: Level number or "learned"/"mailed"
+        query (str): Search text; all terms must match (word, meaning, phrase
+            or expressions), each as a whole word or a word prefix
+        limit (int): Maximum number of results (None for all)
+
     Returns:
-        list: List of dictionaries containing word data
+        list: Matching word entries, best match first
     """
-    word_list = []
+    if level in ["learned", "mailed"]:
+        return get_search_indexes().search(f"{level}.json", query, limit, empty=list)
+
+    filename = LEVEL_FILES.get(level)
+    if not filename or not os.path.exists(filename):
+        return []
     try:
-        with open(file_path, "r", encoding='utf-8') as f:
-            lines = f.readlines()
-            for line in lines:
-                if line.strip():  # Skip empty lines
-                    parts = line.strip().split(" | ")
-                    if len(parts) >= 5:
-                        word_details = {
-                            "word": parts[0],
-                            "meaning": parts[1],
-                            "phrase": parts[2],
-                            "media": parts[3],
-                            "category": parts[4]
-                        }
-                        word_list.append(word_details)
-            #print(word_list)
-    except FileNotFoundError:
-        print(f"Error: {file_path} not found")
-    except Exception as e:
-        print(f"Error loading vocabulary: {e}")
-
-    return word_list
-
-def save_word_pools_to_file(word_pools, file_path):
+        return get_search_indexes().search(filename, query, limit)
+    except (json.JSONDecodeError, FileNotFoundError):
+        return []
+
+def suggest_words(prefix, limit=8):
     """
-    Save word pools to vocabulary file
-    
+    Headword completions across all levels, learned and mailed
+
     Args:
-        word_pools (dict): Dictionary containing word pools
-        file_path (str): Path to save the vocabulary file
-        
+        prefix (str): What the user has typed so far
+        limit (int): Maximum number of suggestions
+
     Returns:
-        bool: True if successful, False otherwise
+        list: (word, [(level, category), ...]) pairs, shortest word first
     """
-    try:
-        with open(file_path, "w", encoding='utf-8') as f:
-            for category, words in word_pools.items():
-                for word_data in words:
-                    f.write(f"{word_data['word']} | {word_data['meaning']} | {word_data['phrase']} | {category}\n")
-        return True
-    except Exception as e:
-        print(f"Error saving word pools: {e}")
-        return False
+    return get_headword_index().suggest(prefix, limit)
+
+def find_word_locations(word):
+    """Return the (level, category) places where ``word`` already exists"""
+    return get_headword_index().locations(word)
+
+def find_duplicate_words(include_mailed=False):
+    """
+    Report headwords stored more than once across the levels and learned
+
+    Args:
+        include_mailed (bool): Also count mailed.json, which holds copies of
+            level words by design
+
+    Returns:
+        dict: {word: [(level, category, count), ...]}
+    """
+    levels = None if include_mailed else [1, 2, 3, "learned"]
+    return get_headword_index().duplicates(levels)
+
+def check_new_words(word_entries):
+    """
+    Find which words of a batch are already stored or repeated in the batch
+
+    One pass over the batch with O(1) index lookups, so large imports can be
+    checked before anything is written.
+
+    Args:
+        word_entries (list): Word dictionaries (or plain headwords)
+
+    Returns:
+        dict: {word: [(level, category), ...]} where a repeat inside the
+        batch is reported as ("batch", None)
+    """
+    seen = set()
+    first_seen = []
+    duplicates = {}
+    for entry in word_entries:
+        word = entry.get('word', '') if isinstance(entry, dict) else entry
+        key = normalize_word(word)
+        if not key:
+            continue
+        if key in seen:
+            duplicates.setdefault(word, []).append(("batch", None))
+            continue
+        seen.add(key)
+        first_seen.append(word)
+    for word, existing in get_headword_index().locations_many(first_seen).items():
+        duplicates[word] = existing + duplicates.get(word, [])
+    return duplicates
+
+def fuzzy_lookup(word, max_distance=2, limit=5):
+    """
+    "Did you mean" candidates across all levels, learned and mailed
+
+    Args:
+        word (str): Possibly misspelled word
+        max_distance (int): Maximum number of edits (Levenshtein distance)
+        limit (int): Maximum number of candidates
+
+    Returns:
+        list: (word, distance, [(level, category), ...]) triples, closest first
+    """
+    return get_headword_index().fuzzy(word, max_distance, limit)
+
+def format_word_location(location):
+    """Format a (level, category) pair for display, e.g. Level 2 / business"""
+    level, category = location
+    label = f"Level {level}" if isinstance(level, int) else level
+    return f"{label} / {category}" if category else label
 
 def load_learned_words(learned_file="learned.json"):
     """Load learned words from learned.json and convert to vocabulary format"""
-    import json
-    
-    if not os.path.exists(learned_file):
-        return []
-    
     try:
-        with open(learned_file, 'r', encoding='utf-8') as f:
-            learned_words = json.load(f)
+        # Snapshot plus journal replay; a missing store is simply empty
+        learned_words = get_repository().load_history(learned_file)
         
         # Convert to the same format as regular vocabulary
         formatted_words = []
@@ -250,14 +286,9 @@ def load_learned_words(learned_file="learned.json"):
     
 def load_mailed_words(mailed_file="mailed.json"):
     """Load mailed words from mailed.json and convert to vocabulary format"""
-    import json
-    
-    if not os.path.exists(mailed_file):
-        return []
-    
     try:
-        with open(mailed_file, 'r', encoding='utf-8') as f:
-            mailed_words = json.load(f)
+        # Snapshot plus journal replay; a missing store is simply empty
+        mailed_words = get_repository().load_history(mailed_file)
         
         # Convert to the same format as regular vocabulary
         formatted_words = []
@@ -277,83 +308,178 @@ def load_mailed_words(mailed_file="mailed.json"):
 
 def save_learned_words_to_file(learned_words, learned_file="learned.json"):
     """Save learned words back to JSON file"""
-    import json
-    
-    with open(learned_file, 'w', encoding='utf-8') as f:
-        json.dump(learned_words, f, ensure_ascii=False, indent=2)
-    
-    return True
+    return get_repository().replace(learned_file, list(learned_words))
 
 def save_mailed_words_to_file(mailed_words, mailed_file="mailed.json"):
     """Save mailed words back to JSON file"""
-    import json
     # if mailed_word does not include 'mailed_date', add it with current timestamp
     import datetime
     for entry in mailed_words:
         if 'mailed_date' not in entry:
             entry['mailed_date'] = datetime.datetime.now().isoformat()
-    with open(mailed_file, 'w', encoding='utf-8') as f:
-        json.dump(mailed_words, f, ensure_ascii=False, indent=2)
-    
-    return True
+    return get_repository().replace(mailed_file, list(mailed_words))
 
 def save_to_learned(word_entry, learned_file="learned.json"):
     """Save a word entry to learned.json file"""
-    import json
-    
-    # Load existing learned words
-    learned_words = []
-    if os.path.exists(learned_file):
-        try:
-            with open(learned_file, 'r', encoding='utf-8') as f:
-                learned_words = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            learned_words = []
+    repository = get_repository()
     
     # Add timestamp to the entry
     import datetime
     word_entry_with_timestamp = word_entry.copy()
     word_entry_with_timestamp['learned_date'] = datetime.datetime.now().isoformat()
     
-    # Check if word already exists in learned list
-    existing_word = next((w for w in learned_words if w['word'].lower() == word_entry['word'].lower()), None)
-    if not existing_word:
-        learned_words.append(word_entry_with_timestamp)
-        
-        # Save back to file
-        with open(learned_file, 'w', encoding='utf-8') as f:
-            json.dump(learned_words, f, ensure_ascii=False, indent=2)
-        return True
-    return False
+    # Check if word already exists in learned list (indexed lookup)
+    try:
+        if repository.contains(learned_file, word_entry['word'], empty=list):
+            return False
+    except json.JSONDecodeError:
+        repository.replace(learned_file, [])
+    return repository.add_word(learned_file, word_entry_with_timestamp)
 
 def save_to_mailed(word_entry, mailed_file="mailed.json"):
     """Save a word entry to mailed.json file"""
-    import json
-    
-    # Load existing learned words
-    mailed_words = []
-    if os.path.exists(mailed_file):
-        try:
-            with open(mailed_file, 'r', encoding='utf-8') as f:
-                mailed_words = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            mailed_words = []
+    repository = get_repository()
     
     # Add timestamp to the entry
     import datetime
     word_entry_with_timestamp = word_entry.copy()
     word_entry_with_timestamp['mailed_date'] = datetime.datetime.now().isoformat()
     
-    # Check if word already exists in mailed list
-    existing_word = next((w for w in mailed_words if w['word'].lower() == word_entry['word'].lower()), None)
-    if not existing_word:
-        mailed_words.append(word_entry_with_timestamp)
+    # Check if word already exists in mailed list (indexed lookup)
+    try:
+        if repository.contains(mailed_file, word_entry['word'], empty=list):
+            return False
+    except json.JSONDecodeError:
+        repository.replace(mailed_file, [])
+    return repository.add_word(mailed_file, word_entry_with_timestamp)
+
+def _save_many_to_history(word_entries, history_file, date_field):
+    """Append new (not yet recorded) entries to a history store in one write"""
+    import datetime
+    repository = get_repository()
+    timestamp = datetime.datetime.now().isoformat()
+    
+    records = []
+    seen = set()
+    for word_entry in word_entries:
+        word_key = normalize_word(word_entry.get('word', ''))
+        if not word_key or word_key in seen:
+            continue
+        seen.add(word_key)
+        if repository.contains(history_file, word_key, empty=list):
+            continue
+        entry_with_timestamp = word_entry.copy()
+        entry_with_timestamp[date_field] = timestamp
+        records.append({'op': 'add', 'entry': entry_with_timestamp})
+    
+    return len(repository.apply_many(history_file, records, empty=list))
+
+def save_many_to_mailed(word_entries, mailed_file="mailed.json"):
+    """
+    Save several word entries to mailed.json with a single write
+    
+    Args:
+        word_entries (list): Word dictionaries to record as mailed
+        mailed_file (str): Path to the mailed history file
         
-        # Save back to file
-        with open(mailed_file, 'w', encoding='utf-8') as f:
-            json.dump(mailed_words, f, ensure_ascii=False, indent=2)
-        return True
-    return False
+    Returns:
+        int: Number of entries added (already-mailed words are skipped)
+    """
+    return _save_many_to_history(word_entries, mailed_file, 'mailed_date')
+
+def save_many_to_learned(word_entries, learned_file="learned.json"):
+    """
+    Save several word entries to learned.json with a single write
+    
+    Args:
+        word_entries (list): Word dictionaries to record as learned
+        learned_file (str): Path to the learned history file
+        
+    Returns:
+        int: Number of entries added (already-learned words are skipped)
+    """
+    return _save_many_to_history(word_entries, learned_file, 'learned_date')
+
+def move_words(src, dst, words):
+    """
+    Move words between stores, reading and writing each store once
+    
+    Works for any combination of level files and history files
+    (learned.json / mailed.json). Moving into a history file stamps
+    learned_date or mailed_date (and, coming from a level file, the level it
+    left); moving into a level file puts the word back under its category and
+    drops those fields.
+    
+    Args:
+        src (str): Source JSON file
+        dst (str): Destination JSON file
+        words (list): Headwords (or word dictionaries) to move
+        
+    Returns:
+        list: Headwords that were found in src and moved
+    """
+    import datetime
+    timestamp = datetime.datetime.now().isoformat()
+    date_field = 'mailed_date' if 'mailed' in os.path.basename(dst) else 'learned_date'
+    history_fields = ('learned_date', 'mailed_date', 'sent_date', 'category', 'level')
+    src_level = next((level for level, path in LEVEL_FILES.items() if path == os.path.basename(src)), None)
+    
+    def _prepare(entry, category, dst_is_history):
+        if dst_is_history:
+            entry.setdefault('category', category or 'general')
+            entry[date_field] = timestamp
+            if src_level is not None:
+                # Remembered so "Move Back" can restore the word to its level
+                entry['level'] = src_level
+            return entry, None
+        target_category = entry.get('category') or category or 'general'
+        for field in history_fields:
+            entry.pop(field, None)
+        return entry, target_category
+    
+    headwords = [w.get('word', '') if isinstance(w, dict) else w for w in words]
+    level_paths = set(LEVEL_FILES.values())
+    return get_repository().move(
+        src, dst, headwords, _prepare,
+        src_empty=dict if os.path.basename(src) in level_paths else list,
+        dst_empty=dict if os.path.basename(dst) in level_paths else list,
+    )
+
+def move_back_to_vocabulary(word, history_files, level_file="level1.json"):
+    """
+    Take a word out of the history files and back into the vocabulary levels
+
+    A word that is still in a level file (mailed words are copies) is only
+    removed from the history files; otherwise it is moved from the first
+    history file that has it back into the level it was moved out of, under
+    its category.
+
+    Args:
+        word (str): Headword to move back
+        history_files (list): History files to take the word out of
+        level_file (str): Level file for entries with no level recorded
+            (moved before levels were recorded)
+
+    Returns:
+        bool: True if the word was found in any of the history files
+    """
+    repository = get_repository()
+    in_levels = any(isinstance(level, int) for level, _ in find_word_locations(word))
+    found = False
+    for history_file in history_files:
+        if not repository.contains(history_file, word, empty=list):
+            continue
+        found = True
+        if in_levels:
+            delete_word_from_json(word, history_file)
+            continue
+        entry = repository.find(history_file, word, empty=list) or {}
+        target = LEVEL_FILES.get(entry.get('level'), level_file)
+        if move_words(history_file, target, [word]):
+            in_levels = True
+        else:
+            delete_word_from_json(word, history_file)
+    return found
 
 def filter_words_by_category(word_list, category):
     """
@@ -370,6 +496,26 @@ def filter_words_by_category(word_list, category):
         
 
 
+def get_word_count(level):
+    """Number of words in a level (1-3, "learned" or "mailed"), from the live counters"""
+    return get_word_statistics().total(level)
+
+def get_level_statistics(level=None):
+    """
+    Word counts from the live counters, without reading any file
+
+    Args:
+        level: Level number (1-3), "learned" or "mailed"; None for all of them
+
+    Returns:
+        dict: {category: count} for one level, or
+              {level: {"total": n, "categories": {category: count}}} for all
+    """
+    if level is None:
+        return get_word_statistics().summary()
+    return get_word_statistics().category_counts(level)
+
+
 def get_category_statistics(word_list):
     """
     Get statistics about words in each category
@@ -0,0 +1,164 @@
+"""
+Per-recipient mail delivery from the outbox
+
+drain_outbox() sends the due messages of the durable outbox
+(database/outbox_db.py).  Every subscriber gets an individual message (no
+shared To header exposing the other addresses), sent concurrently by a
+bounded pool of worker threads over the pooled SMTP sessions of
+utils.smtp_pool.  A token bucket caps the send rate to stay under the
+provider's quota, and the report lists the outcome for each recipient.
+Failed sends are retried through the outbox with backoff, and idempotency
+keys keep reruns from sending a mail twice.
+
+Configuration (environment):
+    MAIL_RATE_PER_SECOND   sustained messages per second (default 10, 0 = unlimited)
+    MAIL_BURST             messages that may be sent back to back (default: the rate)
+    MAIL_WORKERS           sending threads (default: the SMTP pool size)
+"""
+
+import os
+import time
+import smtplib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from datetime import datetime
+
+from utils.smtp_pool import get_smtp_pool
+from utils.email_templates import payload_for, stamp_headers
+from database.outbox_db import claim_due_messages, record_results, next_due_time, LEASE_SECONDS
+
+MAIL_RATE_PER_SECOND = float(os.getenv('MAIL_RATE_PER_SECOND', 10))
+MAIL_BURST = int(os.getenv('MAIL_BURST', 0)) or None
+MAIL_WORKERS = int(os.getenv('MAIL_WORKERS', 0)) or None
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, at most ``capacity`` saved up"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Block until ``tokens`` are available and take them"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _deliver_one(bucket, recipient, send):
+    if bucket is not None:
+        bucket.acquire()
+    try:
+        refused = send()
+    except smtplib.SMTPRecipientsRefused as e:
+        return {"recipient": recipient, "status": "refused", "error": str(e.recipients.get(recipient, e))}
+    except Exception as e:
+        return {"recipient": recipient, "status": "failed", "error": str(e)}
+    if refused:
+        return {"recipient": recipient, "status": "refused", "error": str(refused.get(recipient, refused))}
+    return {"recipient": recipient, "status": "sent", "error": None}
+
+
+def _run_deliveries(items, send, workers, rate, burst, progress):
+    """Run ``send(item, bucket)`` for every item on a bounded thread pool"""
+    rate = MAIL_RATE_PER_SECOND if rate is None else rate
+    bucket = TokenBucket(rate, burst or MAIL_BURST) if rate else None
+    results = []
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mail-delivery") as executor:
+        for item in items:
+            # Keep the queue short so huge lists don't turn into huge future lists
+            if len(pending) >= workers * 4:
+                results.append(pending.popleft().result())
+                if progress:
+                    progress(len(results), len(items))
+            pending.append(executor.submit(send, item, bucket))
+        while pending:
+            results.append(pending.popleft().result())
+            if progress:
+                progress(len(results), len(items))
+    return results
+
+
+def _report(results, seconds):
+    report = {"results": results, "sent": 0, "refused": 0, "failed": 0, "seconds": seconds}
+    for result in results:
+        report[result["status"]] += 1
+    report["per_second"] = len(results) / seconds if seconds else 0.0
+    return report
+
+
+def _send_outbox_message(pool, message):
+    # Rows of one day's mail share a template key, so the MIME payload is
+    # looked up by that short key and only the headers are built per recipient
+    payload = payload_for(message.template_key, message.plain_body, message.html_body)
+    data = stamp_headers(payload, message.from_addr, message.email, message.subject)
+    return pool.sendmail(message.from_addr, [message.email], data)
+
+
+def drain_outbox(pool=None, workers=None, rate=None, burst=None, deadline=None, batch_size=500, progress=None):
+    """
+    Send the due messages of the outbox (database/outbox_db.py).
+
+    Sends every message that is due now; with a ``deadline``, keeps waiting
+    for scheduled retries until nothing is pending or the deadline passes
+    (no new batch is claimed after it).
+    Outcomes are recorded per batch, so an interruption loses at most one
+    batch's bookkeeping (those rows are retried after their lease).  The
+    lease covers the time the batch takes at the send rate, plus
+    LEASE_SECONDS, so rows still waiting for a token are never re-claimed.
+
+    Args:
+        pool (SMTPPool): Sessions to send on (default: get_smtp_pool())
+        workers (int): Sending threads (default: MAIL_WORKERS or the pool size)
+        rate (float): Messages per second (default: MAIL_RATE_PER_SECOND; 0 = unlimited)
+        burst (int): Token bucket capacity (default: MAIL_BURST or the rate)
+        deadline (datetime): Wait for retries until this time, then stop
+        batch_size (int): Messages claimed per round
+        progress (callable): Called with (done, total) for each batch as results come in
+
+    Returns:
+        dict: ``results`` (one dict per message with recipient, status
+        "sent" / "refused" / "failed" and error), counts per status,
+        elapsed seconds and messages per second, over all rounds
+    """
+    pool = pool or get_smtp_pool()
+    workers = workers or MAIL_WORKERS or pool.size
+    rate = MAIL_RATE_PER_SECOND if rate is None else rate
+    lease_seconds = LEASE_SECONDS + (batch_size / rate if rate else 0.0)
+    start = time.perf_counter()
+    results = []
+    while True:
+        batch = claim_due_messages(batch_size, lease_seconds=lease_seconds)
+        if batch:
+            outcomes = _run_deliveries(
+                batch,
+                lambda message, bucket: _deliver_one(
+                    bucket, message.email, lambda: _send_outbox_message(pool, message)),
+                workers, rate, burst, progress,
+            )
+            record_results([(message, outcome["status"], outcome["error"])
+                            for message, outcome in zip(batch, outcomes)])
+            results.extend(outcomes)
+            if deadline is None or datetime.now() < deadline:
+                continue
+            break
+        next_due = next_due_time()
+        if deadline is None or next_due is None or next_due > deadline:
+            break
+        # Sleep until the next retry is due (bounded, to notice new work)
+        time.sleep(min(60.0, max(0.0, (next_due - datetime.now()).total_seconds())))
+    return _report(results, time.perf_counter() - start)
@@ -0,0 +1,168 @@
+"""
+Offline audio pre-synthesis for whole levels
+
+Walks the level files, finds every word and phrase that has no clip in the
+audio cache for one of the SPEED_OPTIONS, and synthesizes the missing clips in
+parallel on a process pool (each process runs its own pyttsx3 worker).  The
+speeds of one text are rendered together, so the slower variants can be
+time-stretched from the normal-speed clip (utils.audio_stretch).  Clips
+land in the cache atomically as they finish, so the cache itself is the
+checkpoint: an interrupted run simply picks up the remaining clips next time.
+
+At the end every entry's ``audio`` field is pointed at its normal-speed word
+clip, with one write per level file.
+
+Usage:
+    python -m utils.presynthesize [--level 1 --level 2] [--workers 4]
+"""
+
+import os
+import time
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.vocab_repository import get_repository, normalize_word, LEVEL_FILES
+from utils.audio_cache import get_audio_cache
+from utils.word_functions import create_audio_file, audio_cache_candidates, SPEED_OPTIONS
+
+
+def _level_entries(level):
+    with get_repository().view(LEVEL_FILES[level], dict) as (_, data):
+        return [dict(entry) for words in data.values() if isinstance(words, list) for entry in words]
+
+
+def find_missing(levels):
+    """
+    List the clips that are not cached yet.
+
+    Args:
+        levels (list): Level numbers to scan
+
+    Returns:
+        tuple: (missing jobs as (text, is_phrase, speeds), number of entries scanned)
+    """
+    cache = get_audio_cache()
+    missing = []
+    queued = set()
+    entries = 0
+    for level in levels:
+        for entry in _level_entries(level):
+            entries += 1
+            texts = [(entry.get('word', ''), False), (entry.get('phrase', ''), True)]
+            for text, is_phrase in texts:
+                if not text or not text.strip() or (text, is_phrase) in queued:
+                    continue
+                queued.add((text, is_phrase))
+                speeds = tuple(speed for speed in SPEED_OPTIONS
+                               if not cache.peek(audio_cache_candidates(text, is_phrase, speed)))
+                if speeds:
+                    missing.append((text, is_phrase, speeds))
+    return missing, entries
+
+
+def _synthesize(job):
+    """
+    Process pool task: render the missing speeds of one text into the cache.
+
+    All speeds of a text run in the same process, normal first, so slower
+    variants are stretched from the base clip instead of synthesized again.
+    """
+    text, is_phrase, speeds = job
+    # Unique temp name per process and job, so parallel renders never collide
+    filename = f"presynth_{os.getpid()}_{abs(hash(job))}"
+
+    async def _render():
+        return [await create_audio_file(text, filename, is_phrase=is_phrase, speed=speed) for speed in speeds]
+
+    return job, asyncio.run(_render())
+
+
+def record_audio_paths(levels):
+    """
+    Point each entry's audio field at its cached normal-speed word clip.
+
+    Returns:
+        int: Number of entries updated (one store write per level at most)
+    """
+    cache = get_audio_cache()
+    repository = get_repository()
+    updated = 0
+    for level in levels:
+        records = []
+        seen = set()
+        for entry in _level_entries(level):
+            word = entry.get('word', '')
+            # An update record applies to the first entry of a headword only
+            if normalize_word(word) in seen:
+                continue
+            seen.add(normalize_word(word))
+            path = cache.peek(audio_cache_candidates(word, False, "normal")) if word else None
+            if path and entry.get('audio') != path:
+                records.append({"op": "update", "word": word, "fields": {"audio": path}})
+        if records:
+            updated += len(repository.apply_many(LEVEL_FILES[level], records))
+    return updated
+
+
+def presynthesize(levels=None, workers=None, progress=None):
+    """
+    Synthesize all missing clips of the given levels and record audio paths.
+
+    Args:
+        levels (list): Level numbers (default: all)
+        workers (int): Process pool size (default: CPU count)
+        progress (callable): Called with (clips done, total clips) after each text
+
+    Returns:
+        dict: Counts (entries, clips, synthesized, failed, recorded),
+        elapsed seconds, words_per_second and clips_per_second
+    """
+    levels = levels or list(LEVEL_FILES)
+    start = time.perf_counter()
+    missing, entries = find_missing(levels)
+    report = {"entries": entries, "clips": sum(len(speeds) for _, _, speeds in missing),
+              "synthesized": 0, "failed": 0, "interrupted": False}
+
+    if missing:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [executor.submit(_synthesize, job) for job in missing]
+            for future in as_completed(futures):
+                _, paths = future.result()
+                report["synthesized"] += sum(1 for path in paths if path)
+                report["failed"] += sum(1 for path in paths if not path)
+                if progress:
+                    progress(report["synthesized"] + report["failed"], report["clips"])
+        except KeyboardInterrupt:
+            # Finished clips are already in the cache; the next run resumes
+            report["interrupted"] = True
+            executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            executor.shutdown()
+
+    report["recorded"] = record_audio_paths(levels)
+    report["seconds"] = time.perf_counter() - start
+    report["words_per_second"] = entries / report["seconds"] if report["seconds"] else 0.0
+    report["clips_per_second"] = report["synthesized"] / report["seconds"] if report["seconds"] else 0.0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-synthesize audio for the level files")
+    parser.add_argument("--level", type=int, action="append", choices=sorted(LEVEL_FILES),
+                        help="level to process (repeatable, default: all)")
+    parser.add_argument("--workers", type=int, help="number of processes (default: CPU count)")
+    args = parser.parse_args()
+
+    report = presynthesize(args.level, args.workers,
+                           progress=lambda done, total: print(f"  {done}/{total} clips", end="\r"))
+    status = "Interrupted after" if report["interrupted"] else "Done:"
+    print(f"{status} {report['synthesized']} of {report['clips']} missing clips synthesized, "
+          f"{report['failed']} failed, {report['recorded']} audio paths recorded")
+    print(f"{report['entries']} words in {report['seconds']:.1f}s "
+          f"({report['words_per_second']:.1f} words/s, {report['clips_per_second']:.1f} clips/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Inverted full-text index for the vocabulary search box
+
+Each store (level file, learned.json, mailed.json) gets a token-level index
+over word, meaning, phrase and expressions.  An index is built the first time
+a store is searched and is kept current through the repository's change
+notifications (adds, edits and deletes update only the affected postings);
+it is dropped when the store is reloaded or replaced and rebuilt on the next
+search.
+
+Queries are split into terms that are ANDed together.  Every term also
+matches as a prefix of longer tokens ("ele" finds "elephant"), using a sorted
+token list and bisect; every extension counts, so short prefixes never miss
+entries (``limit`` only cuts the ranked list).  Only the most selective term
+is expanded through the postings; the other terms are checked against each
+candidate's own tokens.
+
+Ranking: headwords equal to the query, then headwords starting with it (in
+headword order, what the old substring filter showed), then every other
+match by field-weighted score.  With a ``limit``, a short prefix is answered
+from the sorted headword list alone once it fills the page.
+"""
+
+import re
+import heapq
+import threading
+from bisect import bisect_left, insort
+
+from utils.vocab_repository import get_repository, normalize_word
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+# How much a token found in each field counts towards the score
+FIELD_WEIGHTS = {
+    'word': 5.0,
+    'meaning': 2.0,
+    'phrase': 1.0,
+    'expressions': 1.0,
+}
+
+# Matches through prefix expansion count for less than exact token matches
+PREFIX_FACTOR = 0.5
+
+
+
+def tokenize(text):
+    """Lower-case word tokens of ``text`` (letters and digits, any script)"""
+    if not text:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def _entry_tokens(entry):
+    """Return {token: weight} for one word entry"""
+    weights = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        value = entry.get(field)
+        if isinstance(value, list):
+            value = " ".join(str(item) for item in value)
+        for token in tokenize(value):
+            weights[token] = weights.get(token, 0.0) + weight
+    return weights
+
+
+class InvertedIndex:
+    """
+    Token -> postings index over one store's entries.
+
+    Documents are keyed by the identity of the cached entry dict, so duplicate
+    headwords are kept apart and an edited entry keeps its key.
+    """
+
+    def __init__(self):
+        self._postings = {}      # token -> {doc_id: weight}
+        self._docs = {}          # doc_id -> (category, entry, headword)
+        self._doc_tokens = {}    # doc_id -> tokens the doc is posted under
+        self._tokens = []        # sorted tokens, for prefix lookups
+        self._headwords = []     # sorted (headword, doc_id), for headword bonuses
+
+    def __len__(self):
+        return len(self._docs)
+
+    @classmethod
+    def build(cls, data):
+        """Build an index from level data ({category: [entries]}) or a history list"""
+        index = cls()
+        if isinstance(data, dict):
+            for category, words in data.items():
+                if isinstance(words, list):
+                    for entry in words:
+                        index._post(category, entry)
+        else:
+            for entry in data:
+                index._post(None, entry)
+        index._tokens = sorted(index._postings)
+        index._headwords = sorted((doc[2], doc_id) for doc_id, doc in index._docs.items())
+        return index
+
+    def _post(self, category, entry):
+        doc_id = id(entry)
+        weights = _entry_tokens(entry)
+        self._docs[doc_id] = (category, entry, normalize_word(entry.get('word', '')))
+        self._doc_tokens[doc_id] = list(weights)
+        new_tokens = []
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                new_tokens.append(token)
+            postings[doc_id] = weight
+        return new_tokens
+
+    def add(self, category, entry):
+        for token in self._post(category, entry):
+            insort(self._tokens, token)
+        doc_id = id(entry)
+        insort(self._headwords, (self._docs[doc_id][2], doc_id))
+
+    def remove(self, entry):
+        doc_id = id(entry)
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        position = bisect_left(self._headwords, (doc[2], doc_id))
+        if position < len(self._headwords) and self._headwords[position] == (doc[2], doc_id):
+            del self._headwords[position]
+        for token in self._doc_tokens.pop(doc_id):
+            postings = self._postings[token]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+                position = bisect_left(self._tokens, token)
+                if position < len(self._tokens) and self._tokens[position] == token:
+                    del self._tokens[position]
+
+    def update(self, category, entry):
+        """Re-index an entry that was edited in place"""
+        self.remove(entry)
+        self.add(category, entry)
+
+    def _prefix_range(self, term):
+        """Positions in the sorted token list of the tokens starting with ``term``"""
+        return bisect_left(self._tokens, term), bisect_left(self._tokens, term + "\U0010ffff")
+
+    def _expand(self, term, start, end):
+        """Return {doc_id: score} for docs containing ``term`` or a token starting with it"""
+        scores = {}
+        for position in range(start, end):
+            token = self._tokens[position]
+            factor = 1.0 if token == term else PREFIX_FACTOR
+            for doc_id, weight in self._postings[token].items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * factor
+        return scores
+
+    def _term_score(self, doc_id, term):
+        """Score of one doc for ``term`` from its own tokens (None if it has no match)"""
+        score = None
+        for token in self._doc_tokens[doc_id]:
+            if token.startswith(term):
+                factor = 1.0 if token == term else PREFIX_FACTOR
+                score = (score or 0.0) + self._postings[token][doc_id] * factor
+        return score
+
+    def search(self, query, limit=None):
+        """
+        Find entries matching every term of ``query``.
+
+        Args:
+            query (str): Search text; each term matches whole tokens or token prefixes
+            limit (int): Maximum number of results (None for all)
+
+        Returns:
+            list: (category, entry) pairs, best match first.  ``category`` is
+            None for history stores.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        # Headwords equal to or starting with the whole query come first, in
+        # headword order (an exact match sorts before its extensions); walk
+        # the sorted list in place and stop at the first one that differs
+        headword_query = normalize_word(query)
+        ranked = []
+        for position in range(bisect_left(self._headwords, (headword_query,)), len(self._headwords)):
+            headword, doc_id = self._headwords[position]
+            if not headword.startswith(headword_query):
+                break
+            ranked.append(doc_id)
+            if limit is not None and len(ranked) >= limit:
+                return [self._docs[doc_id][:2] for doc_id in ranked]
+
+        # Expand the term with the fewest matching tokens; check the others per candidate
+        ranges = sorted(((self._prefix_range(term), term) for term in terms),
+                        key=lambda item: item[0][1] - item[0][0])
+        (start, end), first = ranges[0]
+        scores = self._expand(first, start, end)
+        for _, term in ranges[1:]:
+            if not scores:
+                break
+            narrowed = {}
+            for doc_id, score in scores.items():
+                term_score = self._term_score(doc_id, term)
+                if term_score is not None:
+                    narrowed[doc_id] = score + term_score
+            scores = narrowed
+
+        for doc_id in ranked:
+            scores.pop(doc_id, None)
+        remaining = None if limit is None else limit - len(ranked)
+        if remaining is not None and remaining < len(scores):
+            best = heapq.nlargest(remaining, scores, key=scores.get)
+        else:
+            best = sorted(scores, key=scores.get, reverse=True)
+        return [self._docs[doc_id][:2] for doc_id in ranked + best]
+
+
+class SearchIndexes:
+    """Per-store inverted indexes kept in step with the repository"""
+
+    def __init__(self, repository):
+        self._repository = repository
+        self._indexes = {}
+        repository.subscribe(self._on_change)
+
+    def _on_change(self, event, key, details):
+        # Runs under the repository lock, like every access to self._indexes
+        if event == 'reload':
+            self._indexes.pop(key, None)
+            return
+        index = self._indexes.get(key)
+        if index is None:
+            return
+        if event == 'add':
+            index.add(details['category'], details['entry'])
+        elif event == 'update':
+            index.update(details['category'], details['entry'])
+        elif event == 'remove':
+            for _, entry in details['entries']:
+                index.remove(entry)
+
+    def search(self, path, query, limit=None, empty=dict):
+        """
+        Search one store.
+
+        Args:
+            path (str): Store file (levelN.json, learned.json, mailed.json)
+            query (str): Search text
+            limit (int): Maximum number of results (None for all)
+            empty: ``dict`` for level files, ``list`` for history files
+
+        Returns:
+            list: Copies of the matching entries, best first.  Level entries
+            carry their ``category``.
+        """
+        with self._repository.view(path, empty) as (key, data):
+            index = self._indexes.get(key)
+            if index is None:
+                index = self._indexes[key] = InvertedIndex.build(data)
+            results = index.search(query, limit)
+            return [dict(entry, category=category) if category is not None else dict(entry)
+                    for category, entry in results]
+
+
+_search_indexes = None
+_search_indexes_lock = threading.Lock()
+
+
+def get_search_indexes():
+    """Return the process-wide SearchIndexes bound to the shared repository"""
+    global _search_indexes
+    if _search_indexes is None:
+        with _search_indexes_lock:
+            if _search_indexes is None:
+                _search_indexes = SearchIndexes(get_repository())
+    return _search_indexes
@@ -0,0 +1,203 @@
+"""
+Pool of authenticated SMTP sessions
+
+Opening an SMTP session costs a TCP connect, EHLO, a STARTTLS handshake and a
+login.  The pool keeps up to ``size`` logged-in sessions open and hands them
+out for one message at a time, so a mail run pays that cost once per
+connection instead of once per message.
+
+A session is closed and replaced after ``max_messages`` messages (servers
+often cap this) or when it fails.  A send that fails because the connection
+broke is retried once on a fresh session; rejections of the message itself
+(SMTPRecipientsRefused, SMTPDataError, ...) are raised to the caller.
+
+Usage:
+    pool = get_smtp_pool()
+    pool.send_message(msg)          # or pool.sendmail(from_addr, to_addrs, data)
+    ...
+    close_smtp_pools()   # at the end of the run
+"""
+
+import os
+import queue
+import smtplib
+import threading
+
+
+def is_connection_error(error):
+    """
+    True if ``error`` means the session is unusable (as opposed to the server
+    rejecting this message, which leaves the session open).
+    """
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPHeloError)):
+        return True
+    # SMTPException subclasses OSError; only plain socket errors count here
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class SMTPPool:
+    """Thread-safe pool of logged-in smtplib.SMTP connections"""
+
+    def __init__(self, host, port=587, user=None, password=None, size=4,
+                 max_messages=100, starttls=True, timeout=30):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.size = size
+        self.max_messages = max_messages
+        self.starttls = starttls
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()    # (smtp, messages sent on it); most recently used first
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.connections_opened = 0
+        self.messages_sent = 0
+        self.reconnects = 0
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.starttls:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.user and self.password:
+                smtp.login(self.user, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        with self._lock:
+            self.connections_opened += 1
+        return smtp
+
+    @staticmethod
+    def _discard(smtp):
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            smtp, sent = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                return self._connect(), 0
+            except Exception:
+                self._slots.release()
+                raise
+        return smtp, sent
+
+    def _release(self, smtp, sent):
+        if smtp is not None:
+            if self._closed or sent >= self.max_messages:
+                self._discard(smtp)
+            else:
+                self._idle.put((smtp, sent))
+        self._slots.release()
+
+    def send_message(self, msg, from_addr=None, to_addrs=None):
+        """
+        Send an email.message.Message on a pooled session.
+
+        Args:
+            msg: The message (From/To headers are used unless overridden)
+            from_addr (str): Envelope sender
+            to_addrs (list): Envelope recipients
+
+        Returns:
+            dict: Refused recipients, as returned by smtplib
+        """
+        return self._send(lambda smtp: smtp.send_message(msg, from_addr, to_addrs))
+
+    def sendmail(self, from_addr, to_addrs, data):
+        """
+        Send an already serialized message (bytes) on a pooled session.
+
+        Returns:
+            dict: Refused recipients, as returned by smtplib
+        """
+        return self._send(lambda smtp: smtp.sendmail(from_addr, to_addrs, data))
+
+    def _send(self, send):
+        if self._closed:
+            raise RuntimeError("SMTP pool is closed")
+        smtp, sent = self._acquire()
+        try:
+            for attempt in range(2):
+                try:
+                    refused = send(smtp)
+                    sent += 1
+                    with self._lock:
+                        self.messages_sent += 1
+                    return refused
+                except Exception as e:
+                    if not is_connection_error(e):
+                        raise
+                    # Stale or dropped session: replace it and retry once
+                    self._discard(smtp)
+                    smtp = None
+                    if attempt:
+                        raise
+                    with self._lock:
+                        self.reconnects += 1
+                    smtp, sent = self._connect(), 0
+        finally:
+            self._release(smtp, sent)
+
+    def close(self):
+        """Log out of every idle session; sessions in use close when released"""
+        self._closed = True
+        while True:
+            try:
+                smtp, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(smtp)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "connections_opened": self.connections_opened,
+                "messages_sent": self.messages_sent,
+                "reconnects": self.reconnects,
+            }
+
+
+_smtp_pools = {}
+_smtp_pools_lock = threading.Lock()
+
+
+def get_smtp_pool(host=None, port=None, user=None, password=None):
+    """
+    Return the process-wide SMTPPool for a server and account.
+
+    Settings default to the environment (SMTP_SERVER, SMTP_PORT, SMTP_USER,
+    SMTP_PASSWORD); SMTP_POOL_SIZE and SMTP_MAX_MESSAGES_PER_CONNECTION size
+    new pools.
+    """
+    host = host or os.getenv('SMTP_SERVER')
+    port = int(port or os.getenv('SMTP_PORT', 587))
+    user = user or os.getenv('SMTP_USER')
+    password = password or os.getenv('SMTP_PASSWORD')
+    with _smtp_pools_lock:
+        pool = _smtp_pools.get((host, port, user))
+        if pool is None:
+            pool = _smtp_pools[(host, port, user)] = SMTPPool(
+                host, port, user, password,
+                size=int(os.getenv('SMTP_POOL_SIZE', 4)),
+                max_messages=int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', 100)),
+            )
+        return pool
+
+
+def close_smtp_pools():
+    """Close every pool (at the end of a mail run); later sends open new ones"""
+    with _smtp_pools_lock:
+        pools = list(_smtp_pools.values())
+        _smtp_pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,139 @@
+"""
+Binary snapshot cache for the level files
+
+Next to each ``levelN.json`` a compiled ``levelN.snapshot.bin`` holds the
+same words as a flattened table (category names, per-category counts and one
+flat list of entries) in marshal format.  Loading that with the cyclic GC
+paused is about 2x faster than parsing the indented JSON, so cold starts of
+Streamlit sessions and the cron job load the level files from the snapshot.
+
+The snapshot records the source file's mtime, size, inode and SHA-1.  It is
+rebuilt automatically when the JSON changes; if only the stamp changed (the
+file was touched or copied) the hash check keeps the snapshot and refreshes
+its stamp.  marshal's format is specific to the Python version, so the
+snapshot also records the marshal version and is rebuilt when it differs.
+"""
+
+import os
+import json
+import gc
+import marshal
+import hashlib
+import tempfile
+from contextlib import contextmanager
+
+SNAPSHOT_FORMAT = 1
+
+
+def snapshot_path_for(json_path):
+    """Return the snapshot path for a level file (level1.json -> level1.snapshot.bin)"""
+    root, _ = os.path.splitext(json_path)
+    return root + ".snapshot.bin"
+
+
+@contextmanager
+def _gc_paused():
+    """Building ~100k small dicts triggers many useless GC passes; pause it meanwhile"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _flatten(data):
+    categories = list(data.keys())
+    counts = [len(data[category]) for category in categories]
+    entries = [entry for category in categories for entry in data[category]]
+    return categories, counts, entries
+
+
+def _unflatten(categories, counts, entries):
+    data = {}
+    start = 0
+    for category, count in zip(categories, counts):
+        data[category] = entries[start:start + count]
+        start += count
+    return data
+
+
+def _read_snapshot(snapshot_path):
+    try:
+        with open(snapshot_path, 'rb') as f, _gc_paused():
+            snapshot = marshal.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Ignoring unreadable snapshot {snapshot_path}: {e}")
+        return None
+    if (not isinstance(snapshot, dict)
+            or snapshot.get('format') != SNAPSHOT_FORMAT
+            or snapshot.get('marshal_version') != marshal.version):
+        return None
+    return snapshot
+
+
+def write_snapshot(json_path, data, source_stat, source_sha1):
+    """Write the compiled snapshot for ``json_path`` (atomic temp file + rename)"""
+    categories, counts, entries = _flatten(data)
+    snapshot = {
+        'format': SNAPSHOT_FORMAT,
+        'marshal_version': marshal.version,
+        'source_mtime_ns': source_stat.st_mtime_ns,
+        'source_size': source_stat.st_size,
+        'source_ino': source_stat.st_ino,
+        'source_sha1': source_sha1,
+        'categories': categories,
+        'counts': counts,
+        'entries': entries,
+    }
+    snapshot_path = snapshot_path_for(json_path)
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".bin", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            marshal.dump(snapshot, f)
+        os.replace(tmp_path, snapshot_path)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        print(f"Could not write snapshot {snapshot_path}: {e}")
+
+
+def load_level_file(json_path):
+    """
+    Load a level JSON file, preferring its compiled snapshot.
+
+    Args:
+        json_path (str): Path to the level JSON file
+
+    Returns:
+        The parsed JSON data ({category: [entries]} for level files).  Files
+        that are not category dicts are returned as parsed, without a snapshot.
+
+    Raises:
+        FileNotFoundError, json.JSONDecodeError: as json.load would
+    """
+    source_stat = os.stat(json_path)
+    snapshot = _read_snapshot(snapshot_path_for(json_path))
+    if (snapshot is not None
+            and snapshot['source_mtime_ns'] == source_stat.st_mtime_ns
+            and snapshot['source_size'] == source_stat.st_size
+            and snapshot['source_ino'] == source_stat.st_ino):
+        return _unflatten(snapshot['categories'], snapshot['counts'], snapshot['entries'])
+
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    source_sha1 = hashlib.sha1(raw).hexdigest()
+    if snapshot is not None and snapshot['source_sha1'] == source_sha1:
+        # Same content with a new mtime: keep the table, refresh the stamp
+        data = _unflatten(snapshot['categories'], snapshot['counts'], snapshot['entries'])
+    else:
+        with _gc_paused():
+            data = json.loads(raw.decode('utf-8'))
+        if not isinstance(data, dict):
+            return data
+    write_snapshot(json_path, data, source_stat, source_sha1)
+    return data
@@ -0,0 +1,129 @@
+"""
+Long-lived pyttsx3 worker
+
+pyttsx3 engines are not thread-safe and are slow to create: init() loads the
+platform driver and the voice list has to be scanned for an American English
+voice.  A single daemon thread owns one engine for the life of the process,
+resolves the voice once at startup, and renders requests from a queue one at
+a time.  Callers get a concurrent.futures.Future (``asyncio.wrap_future`` makes
+it awaitable).
+
+The engine is created when the thread starts.  If that fails, the error is
+kept and every request fails with it straight away (without retrying the slow
+init), so callers fall back to gTTS exactly as before.  An engine that raises
+while rendering is thrown away and recreated, with the same voice, for the
+next request.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+
+import pyttsx3
+
+# Substrings of voice ids that identify American English voices
+AMERICAN_VOICE_IDS = ['david', 'mark', 'zira', 'hazel', 'us', 'american', 'en-us']
+
+# Seconds to wait for one clip before giving up
+SYNTHESIS_TIMEOUT = 30
+
+
+def resolve_voice(engine):
+    """
+    Pick the voice id to use: the first American English voice, else the
+    last English voice, else None (engine default).
+    """
+    english_voice = None
+    for voice in engine.getProperty('voices'):
+        voice_id = (voice.id or "").lower()
+        if any(identifier in voice_id for identifier in AMERICAN_VOICE_IDS):
+            return voice.id
+        if 'en' in voice_id:
+            english_voice = voice.id
+    return english_voice
+
+
+class TTSWorker:
+    """One pyttsx3 engine on a dedicated thread, fed by a request queue"""
+
+    def __init__(self):
+        self._requests = queue.Queue()
+        self._engine = None
+        self._init_error = None   # why the engine could not be created, if it couldn't
+        self.voice = None
+        self._thread = threading.Thread(target=self._run, name="tts-worker", daemon=True)
+        self._thread.start()
+
+    def _start_engine(self):
+        engine = pyttsx3.init()
+        if self.voice is None:
+            self.voice = resolve_voice(engine)
+        if self.voice:
+            engine.setProperty('voice', self.voice)
+        engine.setProperty('volume', 0.9)
+        return engine
+
+    def _ensure_engine(self):
+        """Create the engine if there is none; remember the error if that fails"""
+        if self._engine is None and self._init_error is None:
+            try:
+                self._engine = self._start_engine()
+            except Exception as e:
+                print(f"pyttsx3 unavailable ({e}), requests will use the fallback")
+                self._init_error = e
+
+    def _run(self):
+        # Load the driver and resolve the voice before the first request
+        self._ensure_engine()
+        while True:
+            text, file_path, rate, future = self._requests.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            self._ensure_engine()
+            if self._init_error is not None:
+                future.set_exception(self._init_error)
+                continue
+            try:
+                self._engine.setProperty('rate', rate)
+                self._engine.save_to_file(text, file_path)
+                self._engine.runAndWait()
+            except Exception as e:
+                # Start from a fresh engine next time
+                self._engine = None
+                future.set_exception(e)
+            else:
+                future.set_result(file_path)
+
+    def synthesize(self, text, file_path, rate):
+        """
+        Queue one clip.
+
+        Args:
+            text (str): Text to speak
+            file_path (str): Output .wav path
+            rate (int): Speech rate in words per minute
+
+        Returns:
+            Future: Resolves to ``file_path`` when the file is written
+        """
+        future = Future()
+        if self._init_error is not None:
+            # No engine: fail now instead of queueing behind other requests
+            future.set_exception(self._init_error)
+            return future
+        self._requests.put((text, file_path, rate, future))
+        return future
+
+
+_tts_worker = None
+_tts_worker_lock = threading.Lock()
+
+
+def get_tts_worker():
+    """Return the process-wide TTSWorker, starting its thread on first use"""
+    global _tts_worker
+    if _tts_worker is None:
+        with _tts_worker_lock:
+            if _tts_worker is None:
+                _tts_worker = TTSWorker()
+    return _tts_worker
@@ -0,0 +1,560 @@
+"""
+In-memory vocabulary repository
+
+Loads the level files (level1/2/3.json) and the learned/mailed history files
+once per process and keeps them in memory together with a hash index from the
+normalized headword to its (store, category, position).  A store is re-read
+only when its file's mtime or size changes on disk, so Streamlit reruns and
+lookups no longer pay a full JSON parse plus a linear scan per call.
+
+History stores are a JSON snapshot plus an append-only journal (see
+utils/history_journal.py); their mutations are journal appends.
+
+Writes hold an exclusive advisory lock on the store (utils/file_lock.py) and
+re-check the store's version stamp under it: if another process wrote since
+this process last read the file, the store is reloaded and the mutation is
+re-applied on top of the current version instead of clobbering it.  Loading a
+changed file takes a shared lock; cached reads take no file lock at all.
+"""
+
+import os
+import json
+import threading
+from contextlib import contextmanager, ExitStack
+
+from utils.history_journal import (
+    JOURNAL_COMPACT_BYTES,
+    journal_path_for,
+    append_records,
+    read_records,
+    atomic_write_json,
+    remove_journal,
+)
+from utils.file_lock import FileLock
+from utils.snapshot_cache import load_level_file
+
+LEVEL_FILES = {
+    1: "level1.json",
+    2: "level2.json",
+    3: "level3.json"
+}
+LEARNED_FILE = "learned.json"
+MAILED_FILE = "mailed.json"
+
+# Every store the app shows, by the level label used in session state
+STORE_FILES = dict(LEVEL_FILES, learned=LEARNED_FILE, mailed=MAILED_FILE)
+
+
+def normalize_word(word):
+    """Normalize a headword for index lookups (case and surrounding spaces)"""
+    return (word or "").strip().lower()
+
+
+def _file_stamp(path):
+    """
+    Return the version stamp (mtime_ns, size, inode) of a file, or None if it
+    does not exist.  Atomic renames change the inode, so two writes within one
+    mtime tick still get different stamps.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class VocabularyRepository:
+    """
+    Process-wide cache of the JSON vocabulary stores.
+
+    Level stores are dicts of ``{category: [word_entry, ...]}`` and history
+    stores (learned/mailed) are flat lists of word entries.  Every store has an
+    index ``{normalized word: [(category, position), ...]}``; history stores
+    use ``None`` as the category.
+
+    The objects returned by ``load_level``/``load_history`` are the cached
+    ones - treat them as read-only and go through the mutation methods so the
+    index stays consistent.
+    """
+
+    def __init__(self, compact_bytes=JOURNAL_COMPACT_BYTES):
+        self._lock = threading.RLock()
+        self._data = {}
+        self._stamps = {}
+        self._index = {}
+        self._journal_stamps = {}
+        self._journal_offsets = {}
+        self._compacting = set()
+        self._listeners = []
+        self.compact_bytes = compact_bytes
+
+    # -------------------------
+    # Change notifications
+    # -------------------------
+    def subscribe(self, listener):
+        """
+        Register ``listener(event, store_key, details)`` to be told about changes.
+
+        Events:
+            "add":    details = {"category", "entry"}
+            "update": details = {"category", "entry", "old_entry"}
+            "remove": details = {"entries": [(category, entry), ...]}
+            "reload": details = {} - the whole store was (re)loaded or replaced
+
+        Listeners run under the repository lock and must not call back into it.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _notify(self, event, key, **details):
+        for listener in self._listeners:
+            try:
+                listener(event, key, details)
+            except Exception as e:
+                print(f"Repository listener failed on {event} for {key}: {e}")
+
+    # -------------------------
+    # Loading
+    # -------------------------
+    def _key(self, path):
+        return os.path.abspath(path)
+
+    def _is_stale(self, path):
+        """Cheap check (stat only) whether the cached copy needs a reload"""
+        key = self._key(path)
+        if key not in self._data or _file_stamp(path) != self._stamps.get(key):
+            return True
+        return self._is_history(key) and _file_stamp(journal_path_for(path)) != self._journal_stamps.get(key)
+
+    @contextmanager
+    def _reading(self, path):
+        """Hold a shared file lock only if the store has to be read from disk"""
+        if self._is_stale(path):
+            with FileLock(path, shared=True):
+                with self._lock:
+                    yield
+        else:
+            with self._lock:
+                yield
+
+    @contextmanager
+    def _writing(self, *paths):
+        """Exclusive file locks (in a fixed order) and then the in-process lock"""
+        with ExitStack() as stack:
+            for key in sorted({self._key(p) for p in paths}):
+                stack.enter_context(FileLock(key))
+            with self._lock:
+                yield
+
+    def _is_history(self, key):
+        return isinstance(self._data.get(key), list)
+
+    def _refresh(self, path, empty):
+        """Make sure the cached copy of ``path`` matches the files on disk"""
+        key = self._key(path)
+        stamp = _file_stamp(path)
+        history = empty is list or self._is_history(key)
+        journal_path = journal_path_for(path)
+        journal_stamp = _file_stamp(journal_path) if history else None
+
+        if key in self._data and self._stamps.get(key) == stamp:
+            if journal_stamp == self._journal_stamps.get(key):
+                return key
+            if journal_stamp is not None and journal_stamp[1] >= self._journal_offsets.get(key, 0):
+                # Only the journal grew (another process appended): replay the tail
+                records, offset = read_records(journal_path, self._journal_offsets.get(key, 0))
+                for record in records:
+                    self._apply_record(key, record)
+                self._journal_stamps[key] = journal_stamp
+                self._journal_offsets[key] = offset
+                return key
+
+        if stamp is None:
+            data = empty()
+        elif history:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        else:
+            # Level files load from their compiled snapshot when it is current
+            data = load_level_file(path)
+        self._data[key] = data
+        self._stamps[key] = stamp
+        self._reindex(key)
+
+        if isinstance(data, list):
+            if journal_stamp is None and not history:
+                journal_stamp = _file_stamp(journal_path)
+            records, offset = read_records(journal_path) if journal_stamp else ([], 0)
+            for record in records:
+                self._apply_record(key, record)
+            self._journal_stamps[key] = journal_stamp
+            self._journal_offsets[key] = offset
+        self._notify('reload', key)
+        return key
+
+    def _reindex(self, key):
+        data = self._data[key]
+        index = {}
+        if isinstance(data, dict):
+            for category, words in data.items():
+                if not isinstance(words, list):
+                    continue
+                for position, entry in enumerate(words):
+                    index.setdefault(normalize_word(entry.get('word', '')), []).append((category, position))
+        else:
+            for position, entry in enumerate(data):
+                index.setdefault(normalize_word(entry.get('word', '')), []).append((None, position))
+        self._index[key] = index
+
+    def _entry_at(self, key, location):
+        category, position = location
+        data = self._data[key]
+        return data[category][position] if category is not None else data[position]
+
+    def load_level(self, path):
+        """Return the cached ``{category: [entries]}`` dict for a level file"""
+        with self._reading(path):
+            return self._data[self._refresh(path, dict)]
+
+    def load_history(self, path):
+        """Return the cached list of entries for a learned/mailed file"""
+        with self._reading(path):
+            return self._data[self._refresh(path, list)]
+
+    @contextmanager
+    def view(self, path, empty=dict):
+        """
+        Hold the store current and locked while the caller reads it.
+
+        Yields:
+            (store_key, data): the cache key used in change notifications and
+            the cached data, which must not be modified
+        """
+        with self._reading(path):
+            key = self._refresh(path, empty)
+            yield key, self._data[key]
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+    def locate(self, path, word, empty=dict):
+        """Return every (category, position) of ``word`` in the store"""
+        with self._reading(path):
+            key = self._refresh(path, empty)
+            return list(self._index[key].get(normalize_word(word), []))
+
+    def find(self, path, word, empty=dict):
+        """Return the first entry for ``word`` in the store, or None"""
+        with self._reading(path):
+            key = self._refresh(path, empty)
+            locations = self._index[key].get(normalize_word(word))
+            if not locations:
+                return None
+            return self._entry_at(key, locations[0])
+
+    def contains(self, path, word, empty=dict):
+        with self._reading(path):
+            key = self._refresh(path, empty)
+            return normalize_word(word) in self._index[key]
+
+    # -------------------------
+    # In-memory mutations (shared by live changes and journal replay)
+    # -------------------------
+    def _apply_record(self, key, record):
+        """
+        Apply one mutation record to the cached store.
+
+        Returns:
+            The record's result: position for "add", category for "update",
+            removed categories for "remove".
+        """
+        op = record.get('op')
+        data = self._data[key]
+        index = self._index[key]
+        if op == 'add':
+            entry = record['entry']
+            category = record.get('category')
+            word_key = normalize_word(entry.get('word', ''))
+            if category is None:
+                # Replay is idempotent: an interrupted compaction may leave records
+                # in the journal that are already part of the snapshot
+                if record.get('replay') is not False and any(
+                    self._entry_at(key, loc) == entry for loc in index.get(word_key, [])
+                ):
+                    return None
+                data.append(entry)
+                position = len(data) - 1
+            else:
+                words = data.setdefault(category, [])
+                words.append(entry)
+                position = len(words) - 1
+            index.setdefault(word_key, []).append((category, position))
+            self._notify('add', key, category=category, entry=entry)
+            return position
+        if op == 'update':
+            locations = index.get(normalize_word(record['word']))
+            if locations and 'category' in record:
+                # Only the word's entries in that category (level stores)
+                locations = [loc for loc in locations if loc[0] == record['category']]
+            if not locations:
+                return None
+            match = record.get('match')
+            if match is not None:
+                # Every entry of the word whose fields equal ``match``
+                locations = [loc for loc in locations
+                             if all(self._entry_at(key, loc).get(f) == v for f, v in match.items())]
+                if not locations:
+                    return None
+            else:
+                locations = locations[:1]
+            renamed = False
+            for location in locations:
+                entry = self._entry_at(key, location)
+                old_entry = dict(entry)
+                old_key = normalize_word(entry.get('word', ''))
+                entry.update(record['fields'])
+                renamed = renamed or normalize_word(entry.get('word', '')) != old_key
+                self._notify('update', key, category=location[0], entry=entry, old_entry=old_entry)
+            if renamed:
+                self._reindex(key)
+            return locations[0][0] or ""
+        if op == 'remove':
+            locations = index.get(normalize_word(record['word']))
+            if not locations:
+                return []
+            removed = [(loc[0], self._entry_at(key, loc)) for loc in locations]
+            # Delete from the back so earlier positions stay valid
+            for category, position in sorted(locations, key=lambda loc: loc[1], reverse=True):
+                if category is None:
+                    del data[position]
+                else:
+                    del data[category][position]
+            self._reindex(key)
+            self._notify('remove', key, entries=removed)
+            return sorted({category for category, _ in locations}, key=lambda c: c or "")
+        print(f"Ignoring unknown store record: {record}")
+        return None
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+    def _write(self, key, path):
+        atomic_write_json(path, self._data[key])
+        self._stamps[key] = _file_stamp(path)
+
+    def _commit(self, key, path, records):
+        """Persist records that were already applied in memory"""
+        try:
+            if not self._is_history(key):
+                self._write(key, path)
+                return
+            journal_path = journal_path_for(path)
+            size = append_records(journal_path, records)
+        except Exception:
+            # The cache is ahead of the disk now; drop it so the next access reloads
+            self._invalidate(key)
+            raise
+        self._journal_stamps[key] = _file_stamp(journal_path)
+        self._journal_offsets[key] = size
+        if size >= self.compact_bytes:
+            self._schedule_compaction(path)
+
+    def _invalidate(self, key):
+        for cache in (self._data, self._stamps, self._index, self._journal_stamps, self._journal_offsets):
+            cache.pop(key, None)
+        self._notify('reload', key)
+
+    def _mutate(self, path, record, empty):
+        with self._writing(path):
+            # Under the exclusive lock _refresh picks up any concurrent write,
+            # so the record is applied to the current version of the store
+            key = self._refresh(path, empty)
+            result = self._apply_record(key, dict(record, replay=False))
+            if result is None or result == []:
+                return result
+            self._commit(key, path, [record])
+            return result
+
+    # -------------------------
+    # Mutations
+    # -------------------------
+    def add_word(self, path, word_entry, category=None):
+        """
+        Append a word entry and persist the store.
+
+        Level stores are rewritten; history stores get one journal append.
+
+        Args:
+            path (str): Store file path
+            word_entry (dict): Entry to append
+            category (str): Category for level stores; None for history stores
+        """
+        record = {'op': 'add', 'entry': word_entry}
+        if category is not None:
+            record['category'] = category
+        self._mutate(path, record, list if category is None else dict)
+        return True
+
+    def update_word(self, path, word, fields, empty=dict, match=None, category=None):
+        """
+        Update the first entry matching ``word`` in place and persist the store.
+
+        With ``match`` (a dict of field values, e.g. ``{"mailed_date": ...}``)
+        every entry of ``word`` having those values is updated instead.
+        ``category`` limits the update to the word's entries in that category
+        of a level store.
+
+        Returns:
+            str or None: Category of the updated entry ("" for history stores),
+            or None if the word was not found
+        """
+        record = {'op': 'update', 'word': word, 'fields': fields}
+        if match is not None:
+            record['match'] = match
+        if category is not None:
+            record['category'] = category
+        return self._mutate(path, record, empty)
+
+    def delete_word(self, path, word, empty=dict):
+        """
+        Remove every entry matching ``word`` and persist the store.
+
+        Returns:
+            list: Categories the word was removed from (empty if not found)
+        """
+        return self._mutate(path, {'op': 'remove', 'word': word}, empty) or []
+
+    def apply_many(self, path, records, empty=dict):
+        """
+        Apply several mutation records and persist the store once.
+
+        Returns:
+            list: The records that changed the store (no-ops are dropped)
+        """
+        with self._writing(path):
+            key = self._refresh(path, empty)
+            applied = []
+            for record in records:
+                result = self._apply_record(key, dict(record, replay=False))
+                if result is None or result == []:
+                    continue
+                applied.append(record)
+            if applied:
+                self._commit(key, path, applied)
+            return applied
+
+    def move(self, src, dst, words, prepare, src_empty=dict, dst_empty=dict):
+        """
+        Move words from one store to another, writing each store once.
+
+        The destination is committed before the source, so an interruption
+        can leave a word in both stores but never lose it.  A word already in a
+        history destination is not added twice, but is still removed from src.
+
+        Args:
+            src (str): Source store path
+            dst (str): Destination store path
+            words (list): Headwords to move
+            prepare (callable): ``prepare(entry, category, dst_is_history)``
+                returning ``(new_entry, dst_category)`` for the destination
+            src_empty, dst_empty: Store type to assume if a file is missing
+
+        Returns:
+            list: Headwords that were found in src and moved
+        """
+        with self._writing(src, dst):
+            src_key = self._refresh(src, src_empty)
+            dst_key = self._refresh(dst, dst_empty)
+            if src_key == dst_key:
+                return []
+            dst_history = self._is_history(dst_key)
+
+            add_records, remove_records, moved, seen = [], [], [], set()
+            for word in words:
+                word_key = normalize_word(word)
+                locations = self._index[src_key].get(word_key)
+                if word_key in seen or not locations:
+                    continue
+                seen.add(word_key)
+                if dst_history:
+                    # History stores hold one entry per headword
+                    locations = [] if word_key in self._index[dst_key] else locations[:1]
+                for location in locations:
+                    entry, category = prepare(dict(self._entry_at(src_key, location)), location[0], dst_history)
+                    record = {'op': 'add', 'entry': entry}
+                    if category is not None:
+                        record['category'] = category
+                    add_records.append(record)
+                remove_records.append({'op': 'remove', 'word': word})
+                moved.append(word)
+
+            for record in add_records:
+                self._apply_record(dst_key, dict(record, replay=False))
+            if add_records:
+                self._commit(dst_key, dst, add_records)
+            for record in remove_records:
+                self._apply_record(src_key, dict(record, replay=False))
+            if remove_records:
+                self._commit(src_key, src, remove_records)
+            return moved
+
+    def replace(self, path, data):
+        """Replace the whole store with ``data`` and persist it"""
+        with self._writing(path):
+            key = self._key(path)
+            self._data[key] = data
+            self._reindex(key)
+            self._notify('reload', key)
+            if isinstance(data, list):
+                # A full rewrite of a history store is also a compaction
+                atomic_write_json(path, data)
+                remove_journal(journal_path_for(path))
+                self._stamps[key] = _file_stamp(path)
+                self._journal_stamps[key] = None
+                self._journal_offsets[key] = 0
+            else:
+                self._write(key, path)
+            return True
+
+    # -------------------------
+    # Compaction
+    # -------------------------
+    def compact(self, path):
+        """Fold the journal of a history store into its JSON snapshot"""
+        with self._writing(path):
+            key = self._refresh(path, list)
+            atomic_write_json(path, self._data[key])
+            remove_journal(journal_path_for(path))
+            self._stamps[key] = _file_stamp(path)
+            self._journal_stamps[key] = None
+            self._journal_offsets[key] = 0
+
+    def _schedule_compaction(self, path):
+        key = self._key(path)
+        if key in self._compacting:
+            return
+        self._compacting.add(key)
+
+        def _run():
+            try:
+                self.compact(path)
+            except Exception as e:
+                print(f"Journal compaction failed for {path}: {e}")
+            finally:
+                self._compacting.discard(key)
+
+        threading.Thread(target=_run, name=f"compact-{os.path.basename(path)}", daemon=True).start()
+
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def get_repository():
+    """Return the process-wide VocabularyRepository"""
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                _repository = VocabularyRepository()
+    return _repository
@@ -3,7 +3,6 @@ Main utility functions for vocabulary builder applications
 Contains reusable functions that can be used across different apps
 """
 
-import pyttsx3
 from gtts import gTTS
 import io
 import tempfile
@@ -12,6 +11,12 @@ import json
 import re
 import random
 import asyncio
+import threading
+from concurrent.futures import Future
+from utils.vocab_repository import get_repository
+from utils.audio_cache import get_audio_cache, audio_cache_key
+from utils.tts_worker import get_tts_worker, SYNTHESIS_TIMEOUT
+from utils import audio_stretch
 random.seed(42)
 
 
@@ -27,10 +32,12 @@ def load_word_pools(level=1):
     """
     json_file = f"level{level}.json"
     try:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            word_pools = json.load(f)
-            #print(f"Loaded {len(word_pools)} categories from {json_file}")
-            return word_pools
+        if not os.path.exists(json_file):
+            raise FileNotFoundError(json_file)
+        # Served from the in-memory repository; only re-parsed when the file changes
+        word_pools = get_repository().load_level(json_file)
+        #print(f"Loaded {len(word_pools)} categories from {json_file}")
+        return {category: list(words) for category, words in word_pools.items()}
     except FileNotFoundError:
         # print(f"Error: {json_file} not found")
         # Fallback to word_pools.json if level file doesn't exist
@@ -58,103 +65,234 @@ def detect_language(text):
     else:
         return 'en'
 
+# Voice settings that are part of the audio cache key
+PYTTSX3_VOICE = "american"
+GTTS_VOICE = "com"
+
+
+def _pyttsx3_rate(is_phrase, speed):
+    """Speech rate for pyttsx3: base rate for words or phrases times the speed multiplier"""
+    speed_multipliers = {
+        "normal": 1.0,
+        "0.9": 0.9,
+        "0.8": 0.8
+    }
+    base_rate = 140 if is_phrase else 160
+    return int(base_rate * speed_multipliers.get(speed, 1.0))
+
+
+def audio_cache_candidates(text, is_phrase=False, speed="normal"):
+    """
+    Audio cache (key, extension) pairs that can satisfy a request, in the
+    order create_audio_file tries the engines.
+
+    Keys cover what the engines actually receive: the pyttsx3 speech rate
+    and the gTTS slow flag.
+    """
+    detected_language = detect_language(text)
+    slow = speed in ["1.0", "0.9"] or is_phrase
+    candidates = [(audio_cache_key(text, detected_language, "slow" if slow else "normal", "gtts", GTTS_VOICE), "mp3")]
+    if detected_language == 'en':
+        rate = _pyttsx3_rate(is_phrase, speed)
+        candidates.insert(0, (audio_cache_key(text, detected_language, str(rate), "pyttsx3", PYTTSX3_VOICE), "wav"))
+        if speed != "normal" and audio_stretch.available():
+            # Slower variant derived from the normal-speed rendering
+            base_rate = _pyttsx3_rate(is_phrase, "normal")
+            stretched_key = audio_cache_key(text, detected_language, f"{base_rate}@{speed}", "pyttsx3+wsola", PYTTSX3_VOICE)
+            candidates.insert(0, (stretched_key, "wav"))
+    return candidates
+
+
+# Requests being synthesized right now: (text, is_phrase, speed) -> Future.
+# concurrent.futures rather than asyncio futures, because every Streamlit
+# session runs its own event loop (asyncio.run) on its own thread.
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+AUDIO_FORMATS = {"mp3": "audio/mp3", "wav": "audio/wav"}
+
+
+def _temp_audio_path(filename, extension):
+    """Unique temporary output path, so concurrent renders never share a file"""
+    fd, path = tempfile.mkstemp(prefix=f"{filename}-", suffix=f".{extension}")
+    os.close(fd)
+    return path
+
+
+def _discard_temp(path):
+    # Left behind only if synthesis failed before the file moved into the cache
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        print(f"Could not remove temporary audio file {path}: {e}")
+
+
+async def _coalesced_clip(text, filename, is_phrase, speed):
+    """
+    Single-flight wrapper around _create_audio_file: concurrent requests for
+    the same clip, from any thread or event loop, share one synthesis.
+    """
+    flight_key = (text, bool(is_phrase), speed)
+    with _inflight_lock:
+        flight = _inflight.get(flight_key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[flight_key] = Future()
+    if not leader:
+        return await asyncio.wrap_future(flight)
+
+    try:
+        result = await _create_audio_file(text, filename, is_phrase, speed)
+    except BaseException as e:
+        flight.set_exception(e)
+        raise
+    else:
+        flight.set_result(result)
+    finally:
+        with _inflight_lock:
+            del _inflight[flight_key]
+    return result
+
+
+async def create_audio_clip(text, is_phrase=False, speed="normal", filename="tts"):
+    """
+    Synthesize speech into memory, ready for st.audio or an HTTP response
+    
+    Cached clips are read once from disk; new gTTS and time-stretched clips
+    never touch the disk before playback (they are written to the audio
+    cache in the background).
+    
+    Args:
+        text (str): Text to convert to speech
+        is_phrase (bool): Whether the text is a phrase (affects speech rate)
+        speed (str): Speed setting - "normal", "0.9", or "0.8"
+        filename (str): Name prefix for engine temp files (pyttsx3 can only write files)
+        
+    Returns:
+        tuple: (bytes, MIME type such as "audio/wav"), or (None, None) if failed
+    """
+    clip = await _coalesced_clip(text, filename, is_phrase, speed)
+    if clip is None:
+        return None, None
+    data, extension, _ = clip
+    return data, AUDIO_FORMATS[extension]
+
+
 async def create_audio_file(text, filename, is_phrase=False, speed="normal"):
     """
     Create audio file for text-to-speech with American English voice (cloud-compatible)
+
+    Clips are served from the content-addressed audio cache (utils.audio_cache)
+    when the same text was already synthesized with the same settings.
+    Concurrent requests for the same clip, from any thread or event loop,
+    share a single synthesis.  Use create_audio_clip to play audio without
+    going through a file.
     
     Args:
         text (str): Text to convert to speech
-        filename (str): Name for the temporary audio file
+        filename (str): Name prefix for the temporary audio file
         is_phrase (bool): Whether the text is a phrase (affects speech rate)
         speed (str): Speed setting - "normal", "0.9", or "0.8"
         
     Returns:
-        str or None: Path to the created audio file, or None if failed
+        str or None: Path to the audio file (inside the cache), or None if failed
+    """
+    clip = await _coalesced_clip(text, filename, is_phrase, speed)
+    if clip is None:
+        return None
+    data, extension, key = clip
+    cache = get_audio_cache()
+    pending = cache.pending_write(key, extension)
+    if pending is not None:
+        return await asyncio.wrap_future(pending)
+    path = cache.path_for(key, extension)
+    if os.path.exists(path):
+        return path
+    # Evicted since it was produced
+    return cache.put_bytes(key, extension, data)
+
+
+async def _create_audio_file(text, filename, is_phrase, speed):
+    """
+    Cache lookup and synthesis behind the single-flight layer
+
+    Returns:
+        tuple or None: (audio bytes, file extension, cache key)
     """
     # Detect language first
     detected_language = detect_language(text)
-    
+
+    rate = _pyttsx3_rate(is_phrase, speed)
+    slow = speed in ["1.0", "0.9"] or is_phrase
+    cache = get_audio_cache()
+    candidates = audio_cache_candidates(text, is_phrase, speed)
+    keys = [key for key, _ in candidates]
+    # Candidates are [stretched variant,] [pyttsx3,] gTTS
+    stretched_key = keys[0] if len(keys) == 3 else None
+    pyttsx3_key = keys[-2] if len(keys) >= 2 else None
+    gtts_key = keys[-1]
+    cached = cache.read(candidates)
+    if cached:
+        return cached
+    loop = asyncio.get_event_loop()
+
+    # One synthesis serves every speed: stretch the normal-speed clip in memory
+    if stretched_key:
+        base = await _coalesced_clip(text, filename, is_phrase, "normal")
+        if base and base[1] == "wav":
+            try:
+                def _stretch():
+                    output = io.BytesIO()
+                    audio_stretch.stretch_wav(io.BytesIO(base[0]), output, float(speed))
+                    return output.getvalue()
+
+                data = await loop.run_in_executor(None, _stretch)
+                cache.store_async(stretched_key, "wav", data)
+                return data, "wav", stretched_key
+            except Exception as e:
+                print(f"Time-stretch failed ({e}), synthesizing at the slower rate...")
+
     # Only use pyttsx3 for English text, use gTTS for other languages
     if detected_language == 'en':
         # Try pyttsx3 first (for local development with English)
+        temp_file = _temp_audio_path(filename, "wav")
+        future = None
         try:
-            # Run pyttsx3 in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            
-            def _create_with_pyttsx3():
-                engine = pyttsx3.init()
-                
-                # Get available voices
-                voices = engine.getProperty('voices')
-                
-                # Try to find an American English voice
-                american_voice = None
-                for voice in voices:
-                    # Look for American English voices (common identifiers)
-                    if voice.id and any(identifier in voice.id.lower() for identifier in ['david', 'mark', 'zira', 'hazel', 'us', 'american', 'en-us']):
-                        american_voice = voice.id
-                        break
-                    # Fallback: look for any English voice
-                    elif voice.id and 'en' in voice.id.lower():
-                        american_voice = voice.id
-                
-                # Set the American English voice if found
-                if american_voice:
-                    engine.setProperty('voice', american_voice)
-                
-                # Base speech rates
-                base_word_rate = 160
-                base_phrase_rate = 140
-                
-                # Apply speed multiplier
-                speed_multipliers = {
-                    "normal": 1.0,
-                    "0.9": 0.9,
-                    "0.8": 0.8
-                }
-                
-                multiplier = speed_multipliers.get(speed, 1.0)
-                
-                # Adjust settings for phrases vs single words with speed options
-                if is_phrase:
-                    final_rate = int(base_phrase_rate * multiplier)
-                else:
-                    final_rate = int(base_word_rate * multiplier)
-                
-                engine.setProperty('rate', final_rate)
-                engine.setProperty('volume', 0.9)
-                
-                # Create temporary file path
-                temp_file = os.path.join(tempfile.gettempdir(), f"{filename}.wav")
-                engine.save_to_file(text, temp_file)
-                engine.runAndWait()
-                return temp_file
-            
-            return await loop.run_in_executor(None, _create_with_pyttsx3)
+            # The worker thread owns one engine with the voice already resolved
+            future = get_tts_worker().synthesize(text, temp_file, rate)
+            await asyncio.wait_for(asyncio.wrap_future(future), SYNTHESIS_TIMEOUT)
+            # pyttsx3 can only write files: read it once, then rename it into the cache
+            with open(temp_file, 'rb') as f:
+                data = f.read()
+            cache.put(pyttsx3_key, "wav", temp_file)
+            return data, "wav", pyttsx3_key
             
         except Exception as e:
             print(f"pyttsx3 failed ({e}), trying gTTS for cloud compatibility...")
+        finally:
+            if future is None:
+                _discard_temp(temp_file)
+            else:
+                # After a timeout the worker may still be writing the file:
+                # remove it only when the request has finished (a request
+                # cancelled before it started is skipped by the worker)
+                future.add_done_callback(lambda _: _discard_temp(temp_file))
     
     # Use gTTS for non-English languages or if pyttsx3 failed
     try:
         # Run gTTS in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        
         def _create_with_gtts():
-            # Adjust speed for gTTS (it only has slow/normal)
-            use_slow_speech = speed in ["1.0", "0.9"] or is_phrase
-            
-            # Create TTS object
-            tts = gTTS(text=text, lang=detected_language, slow=use_slow_speech)
+            # Create TTS object (gTTS only has slow/normal speed)
+            tts = gTTS(text=text, lang=detected_language, tld=GTTS_VOICE, slow=slow)
             print(f"Detected language: {detected_language} for text: '{text}'")
-            # Create temporary file path (MP3 format for gTTS)
-            temp_file = os.path.join(tempfile.gettempdir(), f"{filename}.mp3")
-            tts.save(temp_file)
-            
-            print(f"Created audio file using gTTS: {temp_file}")
-            return temp_file
+            buffer = io.BytesIO()
+            tts.write_to_fp(buffer)
+            return buffer.getvalue()
         
-        return await loop.run_in_executor(None, _create_with_gtts)
+        data = await loop.run_in_executor(None, _create_with_gtts)
+        cache.store_async(gtts_key, "mp3", data)
+        return data, "mp3", gtts_key
         
     except Exception as e2:
         print(f"gTTS failed: {e2}")
@@ -163,12 +301,14 @@ async def create_audio_file(text, filename, is_phrase=False, speed="normal"):
 
 def cleanup_audio_file(file_path):
     """
-    Clean up temporary audio file
+    Clean up temporary audio file (files owned by the audio cache are kept)
     
     Args:
         file_path (str): Path to the audio file to delete
     """
     try:
+        if get_audio_cache().owns(file_path):
+            return
         if file_path and os.path.exists(file_path):
             os.remove(file_path)
     except Exception as e:
@@ -0,0 +1,136 @@
+"""
+Per-level, per-category word counters
+
+Counts for every store (level 1-3, learned, mailed) are computed once from
+the repository's cached data and then updated from its change notifications:
+an add or delete adjusts one counter, and a move is a delete from one store
+plus an add to another.  Reading the counts is a dict lookup with no file
+I/O, so pages can show them on every render.  A store that is reloaded from
+disk (changed by another process) is recounted on the next read.
+"""
+
+import os
+import threading
+
+from utils.vocab_repository import get_repository, LEVEL_FILES, STORE_FILES
+
+UNKNOWN_CATEGORY = "unknown"
+
+
+def _category_of(category, entry):
+    # History entries carry their category in the entry itself
+    return (category or entry.get('category') or UNKNOWN_CATEGORY).lower()
+
+
+class WordStatistics:
+    """Word counts per store and category, kept in step with the repository"""
+
+    def __init__(self, repository):
+        self._repository = repository
+        self._lock = threading.RLock()
+        self._labels = {os.path.abspath(path): label for label, path in STORE_FILES.items()}
+        self._counts = {}       # label -> {category: count}
+        self._totals = {}       # label -> count
+        repository.subscribe(self._on_change)
+
+    def _adjust(self, label, category, delta):
+        counts = self._counts[label]
+        count = counts.get(category, 0) + delta
+        if count > 0:
+            counts[category] = count
+        else:
+            counts.pop(category, None)
+        self._totals[label] += delta
+
+    def _on_change(self, event, key, details):
+        label = self._labels.get(key)
+        if label is None:
+            return
+        with self._lock:
+            if event == 'reload':
+                self._counts.pop(label, None)
+                self._totals.pop(label, None)
+                return
+            if label not in self._counts:
+                return
+            if event == 'add':
+                self._adjust(label, _category_of(details['category'], details['entry']), 1)
+            elif event == 'update':
+                old_category = _category_of(details['category'], details['old_entry'])
+                new_category = _category_of(details['category'], details['entry'])
+                if old_category != new_category:
+                    self._adjust(label, old_category, -1)
+                    self._adjust(label, new_category, 1)
+            elif event == 'remove':
+                for category, entry in details['entries']:
+                    self._adjust(label, _category_of(category, entry), -1)
+
+    def _count_store(self, label):
+        path = STORE_FILES[label]
+        empty = dict if label in LEVEL_FILES else list
+        try:
+            with self._repository.view(path, empty) as (_, data), self._lock:
+                if label in self._counts:
+                    return
+                self._counts[label] = {}
+                self._totals[label] = 0
+                if isinstance(data, dict):
+                    for category, words in data.items():
+                        if isinstance(words, list) and words:
+                            self._adjust(label, _category_of(category, {}), len(words))
+                else:
+                    for entry in data:
+                        self._adjust(label, _category_of(None, entry), 1)
+        except Exception as e:
+            print(f"Could not count words in {path}: {e}")
+
+    def category_counts(self, level):
+        """
+        Word counts by category for one store.
+
+        Args:
+            level: Level number (1-3), "learned" or "mailed"
+
+        Returns:
+            dict: {category: count}; empty for an unknown level
+        """
+        if level not in STORE_FILES:
+            return {}
+        with self._lock:
+            if level in self._counts:
+                return dict(self._counts[level])
+        self._count_store(level)
+        with self._lock:
+            return dict(self._counts.get(level, {}))
+
+    def total(self, level):
+        """Number of words in one store (0 for an unknown level)"""
+        if level not in STORE_FILES:
+            return 0
+        with self._lock:
+            if level in self._totals:
+                return self._totals[level]
+        self._count_store(level)
+        with self._lock:
+            return self._totals.get(level, 0)
+
+    def summary(self):
+        """Return {level: {"total": n, "categories": {category: count}}} for every store"""
+        return {
+            level: {"total": self.total(level), "categories": self.category_counts(level)}
+            for level in STORE_FILES
+        }
+
+
+_word_statistics = None
+_word_statistics_lock = threading.Lock()
+
+
+def get_word_statistics():
+    """Return the process-wide WordStatistics bound to the shared repository"""
+    global _word_statistics
+    if _word_statistics is None:
+        with _word_statistics_lock:
+            if _word_statistics is None:
+                _word_statistics = WordStatistics(get_repository())
+    return _word_statistics
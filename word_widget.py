@@ -4,6 +4,7 @@ import random
 import os
 import json
 from pathlib import Path
+from utils.json_manager import update_word_fields
 from video_play import play_video, display_photo,  _drive_embed_link, _drive_direct_link, _detect_media_type
 
 def get_difficulty(difficulty_level):
@@ -129,24 +130,15 @@ def create_word_widget(entry: dict, editable_expressions=True, editable_phrase=T
                     filename = level_files[current_level]
                     if os.path.exists(filename):
                         try:
-                            with open(filename, 'r', encoding='utf-8') as f:
-                                data = json.load(f)
-                            
-                            # Find and update the word in the appropriate category
-                            category = entry.get('category', '').lower()
-                            if category in data:
-                                for i, word_entry in enumerate(data[category]):
-                                    if word_entry['word'] == entry['word']:
-                                        data[category][i]['expressions'] = new_expressions
-                                        break
-                            
-                            # Save back to file
-                            with open(filename, 'w', encoding='utf-8') as f:
-                                json.dump(data, f, ensure_ascii=False, indent=2)
-                            
-                            # Show success message
-                            st.success(f"✅ {len(new_expressions)} expressions saved successfully!", icon="💾")
-                            st.rerun()  # Refresh to show updated data
+                            # Locked point update of this card's entry only (the same
+                            # headword may also be stored under another category)
+                            if update_word_fields(entry['word'], {'expressions': new_expressions}, filename,
+                                                  category=entry.get('category')):
+                                # Show success message
+                                st.success(f"✅ {len(new_expressions)} expressions saved successfully!", icon="💾")
+                                st.rerun()  # Refresh to show updated data
+                            else:
+                                st.error(f"❌ Word '{entry['word']}' not found in {filename}")
                         except Exception as e:
                             st.error(f"❌ Error saving expressions: {e}")
     else: